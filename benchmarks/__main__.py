@@ -0,0 +1,131 @@
+"""
+Suíte de benchmarks dos caminhos quentes do bot, executável offline com um único comando:
+
+    python -m benchmarks                      # todas as suítes, perfil completo
+    python -m benchmarks --quick              # tamanhos menores, para uma conferência rápida
+    python -m benchmarks dice_rolls startup   # só as suítes escolhidas
+    python -m benchmarks --save-baseline      # grava o resultado como nova linha de base
+
+O resultado vai para benchmarks/results/latest.json e é comparado com benchmarks/baseline.json
+(se existir). Medições que pioraram além da tolerância são listadas como regressões, e o
+processo termina com código 1, para poder barrar um deploy.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES = ("rules_search", "dice_rolls", "inline_rolls", "session_queries", "ai_pipelines", "pdf_preprocess", "startup")
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.20  # Piora relativa aceita antes de acusar regressão (ruído de máquina).
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Compara medições de mesmo nome e unidade. 'change' > 0 significa piora, na direção de cada métrica."""
+    previous = {(r["name"], r["unit"]): r for r in baseline}
+    comparisons = []
+    for result in results:
+        old = previous.get((result["name"], result["unit"]))
+        if not old or not old["value"] or not result["value"]:
+            continue
+        if result["better"] == "lower":
+            change = result["value"] / old["value"] - 1
+        else:
+            change = old["value"] / result["value"] - 1
+        comparisons.append({**result, "baseline": old["value"], "change": change, "regression": change > tolerance})
+    return comparisons
+
+
+def _format_value(value: float, unit: str) -> str:
+    if unit == "s":
+        return f"{value * 1000:.2f} ms" if value < 1 else f"{value:.2f} s"
+    return f"{value:,.0f} {unit}" if value >= 100 else f"{value:.2f} {unit}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks offline do MestreTatu.")
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"Suítes a rodar (padrão: todas). Opções: {', '.join(SUITES)}.")
+    parser.add_argument("--quick", action="store_true", help="Usa só os menores tamanhos de dados.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Arquivo JSON de saída.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON de referência para comparação.")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava este resultado como a linha de base.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Piora relativa tolerada antes de acusar regressão (padrão: 0.20).")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"suíte(s) desconhecida(s): {', '.join(unknown)}")
+
+    profile = "quick" if args.quick else "full"
+    results, errors = [], {}
+    for name in args.suites or SUITES:
+        print(f"▶ {name}")
+        start = time.perf_counter()
+        try:
+            suite_results = importlib.import_module(f"benchmarks.{name}").run(profile)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+            print(f"  ✗ falhou: {errors[name]}")
+            continue
+        for result in suite_results:
+            print(f"  {result['name']:<50} {_format_value(result['value'], result['unit']):>18}")
+        results.extend(suite_results)
+        print(f"  ({time.perf_counter() - start:.1f}s)")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "profile": profile,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "errors": errors,
+    }
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparisons = compare(results, baseline["results"], args.tolerance)
+        report["baseline"] = {"file": args.baseline, "meta": baseline.get("meta"), "comparisons": comparisons}
+        regressions = [c for c in comparisons if c["regression"]]
+
+        print(f"\nComparação com {args.baseline} (commit {baseline.get('meta', {}).get('commit')}):")
+        for c in comparisons:
+            flag = "  ⚠ REGRESSÃO" if c["regression"] else ""
+            print(f"  {c['name']:<50} {c['change'] * 100:>+8.1f}%{flag}")
+
+    output = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado gravado em {output}.")
+
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima de {args.tolerance:.0%}.")
+        return 1
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
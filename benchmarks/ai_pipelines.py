@@ -0,0 +1,53 @@
+"""
+Pipelines de IA completos (.rpg, .npc e o fallback das consultas) com o backend falso, sem
+latência nem rede: mede o custo do próprio bot por comando e o tamanho dos prompts enviados,
+para que um prompt que cresceu apareça como regressão.
+
+    python -m benchmarks ai_pipelines
+"""
+import asyncio
+import types
+
+from benchmarks.common import best_of, measurement
+from benchmarks.rules_search import build_corpus
+from benchmarks.session_queries import _FakeContext
+from src.cogs.lookup_cog import LookupCog
+from src.cogs.rpg_cog import RpgCog
+from src.utils.ai_backend import FLASH_MODEL, PRO_MODEL, FakeModel
+
+RPG_QUESTIONS = {
+    "vantagem": "como funciona vantagem?",
+    "concentracao": "concentração cai quando tomo dano?",
+    "contramagica": "posso usar contramágica em uma contramágica?",
+}
+CORPUS_MB = {"quick": 10, "full": 50}
+CALLS = {"quick": 20, "full": 50}
+
+
+def run(profile: str) -> list[dict]:
+    pro, flash = FakeModel(PRO_MODEL[0]), FakeModel(FLASH_MODEL[0])
+    bot = types.SimpleNamespace(ai_pro_model=pro, ai_flash_model=flash)
+    rpg = RpgCog(bot)
+    rpg.rules_text = build_corpus(CORPUS_MB[profile])
+    lookup = LookupCog(bot)
+    number = CALLS[profile]
+
+    def pipeline(name, invoke):
+        ctx = _FakeContext(1)
+        calls_before, chars_before = pro.calls, pro.prompt_chars
+        asyncio.run(invoke(ctx))
+        assert ctx.sent and getattr(ctx, "rpg_query", {}).get("outcome", "ok") == "ok", f"{name} não respondeu"
+        # Só o prompt principal (modelo pro); o da palavra-chave é pequeno e fica em cache depois da 1ª vez.
+        prompt_chars = (pro.prompt_chars - chars_before) / (pro.calls - calls_before)
+        per_call = best_of(lambda: asyncio.run(invoke(_FakeContext(1))), number=number, repeat=3)
+        return [
+            measurement(f"ai_pipelines.{name}", per_call, "s"),
+            measurement(f"ai_pipelines.{name}.prompt_chars", prompt_chars, "chars"),
+        ]
+
+    results = []
+    for label, question in RPG_QUESTIONS.items():
+        results += pipeline(f"rpg_{label}", lambda ctx, q=question: RpgCog.rpg_question.callback(rpg, ctx, question=q))
+    results += pipeline("npc", lambda ctx: RpgCog.generate_npc.callback(rpg, ctx, description="taverneiro anão"))
+    results += pipeline("lookup_fallback", lambda ctx: lookup._ask_gemini_fallback(ctx, "anel do tatu", "items"))
+    return results
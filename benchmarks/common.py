@@ -0,0 +1,40 @@
+"""
+Utilitários compartilhados pelas suítes de benchmark.
+
+Cada suíte expõe `run(profile) -> list[dict]`, onde cada medição tem nome, valor, unidade e
+direção ("lower" quando menor é melhor, "higher" para vazão). Os dados gerados (corpora,
+bancos, PDFs) ficam em cache em benchmarks/.data para que as próximas execuções comparem
+só o código, não a geração.
+"""
+import os
+import time
+import timeit
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+PROFILES = ("quick", "full")
+
+
+def measurement(name: str, value: float, unit: str, better: str = "lower") -> dict:
+    return {"name": name, "value": value, "unit": unit, "better": better}
+
+
+def best_of(func, *, number: int = 1, repeat: int = 5) -> float:
+    """Menor tempo por chamada (em segundos) entre 'repeat' rodadas de 'number' chamadas."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def cached_path(name: str) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+class Stopwatch:
+    """`with Stopwatch() as sw: ...` e depois `sw.elapsed`, em segundos."""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        return False
@@ -0,0 +1,39 @@
+"""
+Vazão de DiceCog._parse_and_roll, com o programa compilado já em cache (o caso comum do .roll).
+
+    python -m benchmarks dice_rolls
+"""
+import types
+
+from benchmarks.common import best_of, measurement
+from src.cogs.dice_cog import DiceCog
+from src.utils.dice import _compile
+
+EXPRESSIONS = {
+    "d20_mod": "1d20+5",
+    "multi_term": "2d6+1d4+3",
+    "keep_highest": "4d6kh3",
+    "exploding": "8d6!",
+    "comparison": "1d20+5 >= 15",
+    "reroll": "10d10r1",
+    "max_dice": "100d6",
+}
+CALLS = {"quick": 5_000, "full": 20_000}
+
+
+def run(profile: str) -> list[dict]:
+    cog = DiceCog(types.SimpleNamespace())
+    number = CALLS[profile]
+    results = []
+    for name, expression in EXPRESSIONS.items():
+        cog._parse_and_roll(expression)
+        per_call = best_of(lambda: cog._parse_and_roll(expression), number=number)
+        results.append(measurement(f"dice_rolls.{name}", 1 / per_call, "rolls/s", "higher"))
+
+    # Compilação a frio: o custo da primeira vez que uma expressão aparece.
+    def compile_all_cold():
+        _compile.cache_clear()
+        for expression in EXPRESSIONS.values():
+            cog._parse_and_roll(expression)
+    results.append(measurement("dice_rolls.cold_compile_all", best_of(compile_all_cold, number=100), "s"))
+    return results
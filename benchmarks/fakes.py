@@ -0,0 +1,314 @@
+"""
+Substitutos locais do Discord e da dnd5eapi para rodar as cogs de verdade sem rede
+(a IA falsa fica em src/utils/ai_backend.py).
+
+- FakeGuild / FakeChannel / FakeMember / FakeMessage: o mínimo dos objetos do discord.py que as
+  cogs usam. Toda chamada de "REST" (enviar, editar, apagar, responder interação, listar membros)
+  passa por DiscordRest, que simula a latência da API e conta as chamadas. Com chunked=False, o
+  servidor se comporta como no modo de pouca memória: os jogadores só vêm pela listagem da API.
+- SimulatedContext: um commands.Context de verdade (prefixo, conversores, checks e hooks das cogs
+  funcionam normalmente) cujas respostas vão para o canal falso.
+- FakeInteraction: o que os botões e menus das views recebem.
+- DndApiStandIn: servidor HTTP local que responde como a dnd5eapi para alguns nomes conhecidos e
+  com 404 para o resto, rodando em uma thread própria para não disputar o loop medido.
+"""
+import asyncio
+import contextlib
+import http.server
+import itertools
+import json
+import random
+import threading
+import time
+import types
+
+import discord
+from discord.ext import commands
+
+_ids = itertools.count(900_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class DiscordRest:
+    """Latência simulada da API do Discord; cada chamada espera entre 'latency' e 'latency + jitter' segundos."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: dict[str, int] = {}
+        self._rng = random.Random(seed)
+
+    async def call(self, kind: str):
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._rng.random() * self.jitter)
+
+
+class FakeMember:
+    def __init__(self, guild, name: str, roles=(), bot: bool = False):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.bot = bot
+        self.roles = list(roles)
+        self.color = discord.Color.default()
+        self.display_avatar = types.SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png")
+        self.mention = f"<@{self.id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+
+class FakeRole:
+    def __init__(self, guild, name: str):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+
+    @property
+    def members(self) -> list[FakeMember]:
+        return [m for m in self.guild.members if self in m.roles]
+
+
+class FakeGuild:
+    MEMBERS_PAGE_SIZE = 1000  # Tamanho da página de GET /guilds/{id}/members.
+
+    def __init__(self, guild_id: int, rest: DiscordRest, player_names=(), player_role: str = "Aventureiro",
+                 chunked: bool = True):
+        self.id = guild_id
+        self.name = f"Servidor {guild_id}"
+        self.rest = rest
+        self.chunked = chunked
+        role = FakeRole(self, player_role)
+        self.roles = [role]
+        self.members = [FakeMember(self, name, roles=[role]) for name in player_names]
+        self.channels: list[FakeChannel] = []
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def get_member(self, member_id: int):
+        if not self.chunked:
+            return None
+        return next((m for m in self.members if m.id == member_id), None)
+
+    async def fetch_members(self, *, limit: int | None = 1000):
+        members = self.members if limit is None else self.members[:limit]
+        for start in range(0, max(len(members), 1), self.MEMBERS_PAGE_SIZE):
+            await self.rest.call("fetch_members")
+            for member in members[start:start + self.MEMBERS_PAGE_SIZE]:
+                yield member
+
+    def add_channel(self) -> "FakeChannel":
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+
+class FakeChannel:
+    type = discord.ChannelType.text
+
+    def __init__(self, guild: FakeGuild):
+        self.id = next_id()
+        self.guild = guild
+        self.name = f"mesa-{self.id % 1000}"
+        self.rest = guild.rest
+        self.messages: dict[int, FakeMessage] = {}
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.call("send")
+        message = FakeMessage(self, content=content, **kwargs)
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id: int):
+        return self.messages.get(message_id) or FakeMessage(self, message_id=message_id)
+
+    @contextlib.asynccontextmanager
+    async def typing(self):
+        await self.rest.call("typing")
+        yield
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, content: str = None, author: FakeMember = None,
+                 message_id: int = None, **kwargs):
+        self.id = message_id or next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content or ""
+        self.author = author
+        self.embed = kwargs.get("embed")
+        self.view = kwargs.get("view")
+        self.attachments = []
+        self.mentions = []
+        self._state = None  # Lido pelo construtor do commands.Context.
+
+    async def edit(self, **kwargs):
+        await self.channel.rest.call("edit")
+        self.embed = kwargs.get("embed", self.embed)
+        self.view = kwargs.get("view", self.view)
+        return self
+
+    async def delete(self, *, delay: float = None):
+        await self.channel.rest.call("delete")
+        self.channel.messages.pop(self.id, None)
+
+    async def reply(self, content=None, **kwargs):
+        kwargs.pop("mention_author", None)
+        return await self.channel.send(content, **kwargs)
+
+
+class SimulatedContext(commands.Context):
+    """Context de verdade; só a saída é desviada para o canal falso e guardada em 'sent'."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent: list[FakeMessage] = []
+
+    async def send(self, content=None, **kwargs):
+        message = await self.channel.send(content, **kwargs)
+        self.sent.append(message)
+        return message
+
+    async def reply(self, content=None, **kwargs):
+        return await self.send(content, **kwargs)
+
+    def typing(self, *, ephemeral: bool = False):
+        return self.channel.typing()
+
+
+class _InteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, kind: str):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        await self._interaction.channel.rest.call(kind)
+
+    async def defer(self, **kwargs):
+        await self._respond("interaction_defer")
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond("interaction_message")
+
+    async def edit_message(self, **kwargs):
+        await self._respond("interaction_edit")
+        if self._interaction.message is not None:
+            self._interaction.message.embed = kwargs.get("embed", self._interaction.message.embed)
+            self._interaction.message.view = kwargs.get("view", self._interaction.message.view)
+
+    async def send_modal(self, modal):
+        await self._respond("interaction_modal")
+        self._interaction.modal = modal
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, channel: FakeChannel, message: FakeMessage = None):
+        self.id = next_id()
+        self.user = user
+        self.channel = channel
+        self.guild = channel.guild
+        self.message = message
+        self.modal = None
+        self.response = _InteractionResponse(self)
+        self.followup = types.SimpleNamespace(send=self._followup_send)
+
+    async def _followup_send(self, content=None, **kwargs):
+        await self.channel.rest.call("interaction_followup")
+
+    async def edit_original_response(self, **kwargs):
+        await self.channel.rest.call("interaction_edit")
+        if self.message is not None:
+            self.message.embed = kwargs.get("embed", self.message.embed)
+
+
+# --- dnd5eapi ---
+DND_API_DATA = {
+    "spells": {
+        "fireball": {
+            "name": "Fireball", "level": 3, "school": {"name": "Evocation"}, "casting_time": "1 action",
+            "range": "150 feet", "components": ["V", "S", "M"], "duration": "Instantaneous",
+            "material": "A tiny ball of bat guano and sulfur.",
+            "desc": ["A bright streak flashes from your pointing finger to a point you choose within range."],
+        },
+        "shield": {
+            "name": "Shield", "level": 1, "school": {"name": "Abjuration"}, "casting_time": "1 reaction",
+            "range": "Self", "components": ["V", "S"], "duration": "1 round",
+            "desc": ["An invisible barrier of magical force appears and protects you."],
+        },
+    },
+    "magic-items": {
+        "bag-of-holding": {
+            "name": "Bag of Holding", "rarity": {"name": "Uncommon"},
+            "equipment_category": {"name": "Wondrous Items"},
+            "desc": ["This bag has an interior space considerably larger than its outside dimensions."],
+        },
+    },
+    "weapons": {
+        "longsword": {
+            "name": "Longsword", "equipment_category": {"name": "Weapon"}, "cost": {"quantity": 15, "unit": "gp"},
+            "damage": {"damage_dice": "1d8", "damage_type": {"name": "Slashing"}}, "weight": 3,
+            "properties": [{"name": "Versatile"}],
+        },
+    },
+}
+
+
+class DndApiStandIn:
+    """Servidor HTTP local no formato da dnd5eapi (/api/<endpoint>/<índice>), com latência simulada."""
+
+    def __init__(self, latency: float = 0.08, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.requests = 0
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests += 1
+                time.sleep(stand_in.latency)
+                _, _, endpoint, index = (self.path.rstrip("/").split("/") + ["", ""])[:4]
+                data = DND_API_DATA.get(endpoint, {}).get(index)
+                body = json.dumps(data if data else {"error": "Not found"}).encode()
+                self.send_response(200 if data else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="dnd-api-stand-in", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
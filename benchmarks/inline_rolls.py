@@ -0,0 +1,44 @@
+"""
+Micro-benchmark do detector de rolagens [[...]] usado em DiceCog.on_message.
+
+Mede o custo por mensagem do caminho comum (sem rolagem), comparado a rodar a regex
+direto, e o custo de uma mensagem com rolagem (detecção + programa do cache + rolagem).
+
+    python -m benchmarks inline_rolls
+"""
+import random
+import timeit
+
+from benchmarks.common import measurement
+from src.utils.dice import INLINE_ROLL_RE, compile_expression, find_inline_rolls
+
+LIMIT = 5
+SHORT = "ataco o orc com a espada longa e depois recuo para trás da coluna, alguém me cura?"
+LONG = ("O grupo chega à taverna depois de três dias de viagem pela estrada do norte. " * 26)[:2000]
+WITH_ROLL = "ataco o orc [[1d20+5]] e se acertar [[2d6+3]] de dano"
+
+
+def _regex_only(content: str):
+    return [m.group(1) for m in INLINE_ROLL_RE.finditer(content)][:LIMIT]
+
+
+def _with_rolls(content: str, rng: random.Random):
+    return [compile_expression(expression).roll(rng).total for expression in find_inline_rolls(content, LIMIT)]
+
+
+def _per_call_ns(statement, number: int) -> float:
+    best = min(timeit.repeat(statement, number=number, repeat=5))
+    return best / number * 1e9
+
+
+def run(profile: str = "full") -> list[dict]:
+    rng = random.Random(0)
+    scale = 1 if profile == "full" else 10
+    timings = {
+        "sem_rolagem_curta_prefiltro": _per_call_ns(lambda: find_inline_rolls(SHORT, LIMIT), 200_000 // scale),
+        "sem_rolagem_curta_regex": _per_call_ns(lambda: _regex_only(SHORT), 200_000 // scale),
+        "sem_rolagem_longa_prefiltro": _per_call_ns(lambda: find_inline_rolls(LONG, LIMIT), 50_000 // scale),
+        "sem_rolagem_longa_regex": _per_call_ns(lambda: _regex_only(LONG), 50_000 // scale),
+        "com_duas_rolagens": _per_call_ns(lambda: _with_rolls(WITH_ROLL, rng), 20_000 // scale),
+    }
+    return [measurement(f"inline_rolls.{name}", ns, "ns/mensagem") for name, ns in timings.items()]
@@ -0,0 +1,380 @@
+"""
+Teste de carga offline: roda as cogs de verdade (RpgCog, LookupCog, SessionCog, DiceCog e
+InitiativeCog) em um commands.Bot sem conexão, com Contexts e Interactions simulados, Gemini
+falso com latência configurável e um substituto local da dnd5eapi.
+
+Os comandos chegam em um processo de Poisson na taxa pedida, espalhados por vários servidores e
+canais, seguindo um mix configurável. No fim, o relatório mostra vazão, latências p50/p95/p99 por
+tipo de comando, atraso do loop de eventos e pico de memória (RSS), para dimensionar o host.
+
+    python -m benchmarks.loadtest --rate 20 --duration 60 --guilds 10
+    python -m benchmarks.loadtest --mix roll=50,rpg=20,init_next=30 --gemini-latency 3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+DEFAULT_MIX = {
+    "roll": 30, "rpg": 12, "npc": 3, "lookup": 10, "lookup_fallback": 3,
+    "mvp": 5, "sessionstats": 5, "stats": 3, "init": 2, "init_add": 5, "init_next": 22,
+}
+ROLL_EXPRESSIONS = ("1d20+5", "2d6+3", "4d6kh3", "adv", "1d20+7 >= 15", "8d6", "1d8+1d6+4", "2d20kl1")
+RPG_QUESTIONS = (
+    "como funciona vantagem?", "concentração cai quando tomo dano?", "o que acontece quando estou agarrado?",
+    "posso usar contramágica em uma contramágica?", "quantas reações tenho por rodada?",
+    "como funciona ataque de oportunidade?", "descanso curto recupera espaços de magia?",
+)
+NPC_DESCRIPTIONS = ("taverneiro anão", "guarda élfica desconfiada", "mercador halfling", "sacerdote caído")
+LOOKUPS_FOUND = (("spell", "fireball"), ("spell", "shield"), ("item", "bag of holding"), ("weapon", "longsword"))
+LOOKUPS_MISSING = (("spell", "bola de fogo arcana"), ("item", "anel do tatu"), ("weapon", "espada de osso"))
+LAG_SAMPLE_INTERVAL = 0.05
+DRAIN_TIMEOUT = 120  # Segundos esperando os comandos em andamento depois do fim da chegada.
+
+log = logging.getLogger("loadtest")
+
+
+class CommandFailed(Exception):
+    """O comando terminou pelo tratador de erros do discord.py em vez de responder normalmente."""
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Percentil por posição mais próxima; a lista precisa estar ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS, em bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def parse_mix(spec: str | None) -> dict[str, int]:
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Tipo de comando desconhecido no mix: '{name}'. Opções: {', '.join(DEFAULT_MIX)}.")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.latencies: dict[str, list[float]] = {kind: [] for kind in self.mix}
+        self.errors: dict[str, int] = {kind: 0 for kind in self.mix}
+        self.loop_lag: list[float] = []
+        self.in_flight: set[asyncio.Task] = set()
+        self.max_in_flight = 0
+
+    # --- Preparação ---
+    def _prepare_data_dir(self) -> str:
+        """Diretório temporário para os bancos; precisa existir antes de importar as cogs (TATU_DATA_DIR)."""
+        data_dir = tempfile.mkdtemp(prefix="tatu-loadtest-")
+        os.environ["TATU_DATA_DIR"] = data_dir
+        if self.args.session_events:
+            from benchmarks.session_queries import build_database
+            shutil.copy(build_database(self.args.session_events), os.path.join(data_dir, "stats.db"))
+        return data_dir
+
+    async def setup(self):
+        self.data_dir = self._prepare_data_dir()
+
+        import discord
+        from discord.ext import commands
+        from benchmarks import fakes
+        from benchmarks.rules_search import build_corpus
+        from benchmarks.session_queries import PLAYERS
+        from src.cogs import dice_cog, initiative_cog, lookup_cog, rpg_cog, session_cog
+        from src.utils.ai_backend import FLASH_MODEL, PRO_MODEL, FakeModel
+
+        args = self.args
+        self.fakes = fakes
+        self.rest = fakes.DiscordRest(args.discord_latency, args.discord_latency / 2, seed=args.seed)
+        self.dnd_api = fakes.DndApiStandIn(args.api_latency)
+        self.dnd_api.start()
+        lookup_cog.DND_API_BASE_URL = self.dnd_api.base_url
+        session_cog.DB_FILE = os.path.join(self.data_dir, "stats.db")  # build_database reaponta o módulo.
+
+        self.pro_model = FakeModel(PRO_MODEL[0], args.gemini_latency, args.gemini_jitter, seed=args.seed)
+        self.flash_model = FakeModel(FLASH_MODEL[0], args.gemini_latency / 4, args.gemini_jitter / 4, seed=args.seed + 1)
+
+        # Os servidores 1 a 4 são os que têm dados no banco gerado pelo benchmark de sessão.
+        self.guilds = [
+            fakes.FakeGuild(guild_id, self.rest, PLAYERS, chunked=not args.low_memory)
+            for guild_id in range(1, args.guilds + 1)
+        ]
+        self.channels = [guild.add_channel() for guild in self.guilds for _ in range(args.channels)]
+        channels_by_id = {channel.id: channel for channel in self.channels}
+
+        bot_user = types.SimpleNamespace(id=fakes.next_id(), name="MestreTatu", display_name="MestreTatu", bot=True)
+
+        class LoadTestBot(commands.Bot):
+            @property
+            def user(self):
+                return bot_user
+
+            def get_channel(self, channel_id):
+                return channels_by_id.get(channel_id)
+
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        self.bot = LoadTestBot(command_prefix='.', intents=intents, help_command=None)
+        self.bot.ai_pro_model = self.pro_model
+        self.bot.ai_flash_model = self.flash_model
+        # Com um listener registrado, o discord.py não imprime o traceback de cada erro de comando.
+        self.bot.add_listener(self._on_command_error, "on_command_error")
+        await self.bot.__aenter__()
+
+        # A SessionCog vem primeiro: ela cria a tabela session_stats, usada pelo flush do DiceCog.
+        self.session = session_cog.SessionCog(self.bot)
+        await self.bot.add_cog(self.session)
+        self.rpg = rpg_cog.RpgCog(self.bot)
+        self.rpg.rules_text = build_corpus(args.rules_mb) if args.rules_mb else ""
+        await self.bot.add_cog(self.rpg)
+        await self.bot.add_cog(lookup_cog.LookupCog(self.bot))
+        await self.bot.add_cog(dice_cog.DiceCog(self.bot))
+        self.initiative = initiative_cog.InitiativeCog(self.bot)
+        await self.bot.add_cog(self.initiative)
+        self.initiative_view = initiative_cog.InitiativeView(self.initiative)
+        self.session_cog_module = session_cog
+
+    async def teardown(self):
+        for name in list(self.bot.cogs):
+            await self.bot.remove_cog(name)
+        await self.bot.close()
+        self.dnd_api.stop()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    async def _on_command_error(self, ctx, error):
+        log.debug(f"Erro no comando {ctx.command}: {error!r}")
+
+    # --- Ações simuladas ---
+    async def _command(self, channel, member, content: str):
+        message = self.fakes.FakeMessage(channel, content=content, author=member)
+        ctx = await self.bot.get_context(message, cls=self.fakes.SimulatedContext)
+        await self.bot.invoke(ctx)
+        if ctx.command_failed:
+            raise CommandFailed(content)
+        return ctx
+
+    async def _select_first(self, ctx, channel, member, view_type):
+        """Escolhe a primeira opção do menu enviado pelo comando, como o usuário faria."""
+        message = next((m for m in ctx.sent if isinstance(m.view, view_type)), None)
+        if message is None:
+            return
+        view = message.view
+        interaction = self.fakes.FakeInteraction(member, channel, message)
+        # Sem o gateway, o valor escolhido é posto direto no Select.
+        view.select_menu._values = [view.select_menu.options[0].value]
+        if await view.interaction_check(interaction):
+            await view.select_menu.callback(interaction)
+        view.stop()
+
+    async def _ensure_combat(self, channel, member):
+        if channel.id not in self.initiative.trackers:
+            await self._command(channel, member, ".init")
+
+    async def run_action(self, kind: str, channel, member):
+        rng = self.rng
+        if kind == "roll":
+            await self._command(channel, member, f".roll {rng.choice(ROLL_EXPRESSIONS)}")
+        elif kind == "rpg":
+            await self._command(channel, member, f".rpg {rng.choice(RPG_QUESTIONS)}")
+        elif kind == "npc":
+            await self._command(channel, member, f".npc {rng.choice(NPC_DESCRIPTIONS)}")
+        elif kind in ("lookup", "lookup_fallback"):
+            command, name = rng.choice(LOOKUPS_FOUND if kind == "lookup" else LOOKUPS_MISSING)
+            await self._command(channel, member, f".{command} {name}")
+        elif kind == "mvp":
+            await self._command(channel, member, ".mvp")
+        elif kind == "sessionstats":
+            ctx = await self._command(channel, member, ".sessionstats")
+            await self._select_first(ctx, channel, member, self.session_cog_module.SessionStatsSelectorView)
+        elif kind == "stats":
+            ctx = await self._command(channel, member, ".stats")
+            await self._select_first(ctx, channel, member, self.session_cog_module.StatsSelectorView)
+        elif kind == "init":
+            # Encerra o combate do canal, se houver, e abre outro.
+            if channel.id in self.initiative.trackers:
+                interaction = self.fakes.FakeInteraction(member, channel, self.initiative._panel_messages.get(channel.id))
+                await self.initiative_view.end_button.callback(interaction)
+            await self._command(channel, member, ".init")
+        elif kind == "init_add":
+            await self._ensure_combat(channel, member)
+            await self._command(channel, member, f".init add Goblin x{rng.randint(2, 8)} +2")
+        elif kind == "init_next":
+            await self._ensure_combat(channel, member)
+            interaction = self.fakes.FakeInteraction(member, channel, self.initiative._panel_messages.get(channel.id))
+            await self.initiative_view.next_button.callback(interaction)
+
+    async def _timed(self, kind: str):
+        channel = self.rng.choice(self.channels)
+        member = self.rng.choice(channel.guild.members)
+        start = time.perf_counter()
+        try:
+            await self.run_action(kind, channel, member)
+        except Exception as e:
+            self.errors[kind] += 1
+            log.debug(f"Falha em '{kind}': {e!r}", exc_info=True)
+            return
+        self.latencies[kind].append(time.perf_counter() - start)
+
+    async def _sample_loop_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self.loop_lag.append(max(0.0, time.perf_counter() - start - LAG_SAMPLE_INTERVAL))
+
+    # --- Execução ---
+    async def run(self) -> dict:
+        await self.setup()
+        kinds, weights = zip(*self.mix.items())
+        sampler = asyncio.create_task(self._sample_loop_lag())
+        sent = 0
+        start = time.perf_counter()
+        next_at = start
+        try:
+            while (now := time.perf_counter()) - start < self.args.duration:
+                if next_at > now:
+                    await asyncio.sleep(next_at - now)
+                task = asyncio.create_task(self._timed(self.rng.choices(kinds, weights)[0]))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+                self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+                sent += 1
+                next_at += self.rng.expovariate(self.args.rate)
+            arrival_elapsed = time.perf_counter() - start
+
+            if self.in_flight:
+                done, pending = await asyncio.wait(set(self.in_flight), timeout=DRAIN_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+            elapsed = time.perf_counter() - start
+        finally:
+            sampler.cancel()
+            await self.teardown()
+
+        return self.report(sent, arrival_elapsed, elapsed)
+
+    def report(self, sent: int, arrival_elapsed: float, elapsed: float) -> dict:
+        def summary(values: list[float]) -> dict:
+            values = sorted(values)
+            return {
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": (values[-1] if values else 0.0) * 1000,
+            }
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        completed = len(all_latencies)
+        return {
+            "config": {key: value for key, value in vars(self.args).items() if key != "output"} | {"mix": self.mix},
+            "sent": sent,
+            "completed": completed,
+            "errors": sum(self.errors.values()),
+            "target_rate": self.args.rate,
+            "offered_rate": sent / arrival_elapsed,
+            "throughput": completed / elapsed,
+            "elapsed_s": elapsed,
+            "max_in_flight": self.max_in_flight,
+            "latency": summary(all_latencies),
+            "commands": {
+                kind: {"count": len(self.latencies[kind]), "errors": self.errors[kind], **summary(self.latencies[kind])}
+                for kind in self.mix
+            },
+            "event_loop_lag": summary(self.loop_lag),
+            "peak_rss_mb": peak_rss_mb(),
+            "backends": {
+                "gemini_calls": self.pro_model.calls + self.flash_model.calls,
+                "gemini_prompt_chars": self.pro_model.prompt_chars + self.flash_model.prompt_chars,
+                "dnd_api_requests": self.dnd_api.requests,
+                "discord_calls": dict(sorted(self.rest.calls.items())),
+            },
+        }
+
+
+def print_report(report: dict):
+    latency = report["latency"]
+    print(f"\nEnviados: {report['sent']}  Concluídos: {report['completed']}  Erros: {report['errors']}  "
+          f"Máx. simultâneos: {report['max_in_flight']}")
+    print(f"Taxa alvo: {report['target_rate']:.1f}/s  Oferecida: {report['offered_rate']:.1f}/s  "
+          f"Vazão: {report['throughput']:.1f}/s em {report['elapsed_s']:.1f}s")
+    print(f"Latência geral: p50 {latency['p50_ms']:.0f} ms  p95 {latency['p95_ms']:.0f} ms  p99 {latency['p99_ms']:.0f} ms")
+
+    print(f"\n{'comando':<16}{'n':>7}{'erros':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for kind, stats in report["commands"].items():
+        print(f"{kind:<16}{stats['count']:>7}{stats['errors']:>7}{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}"
+              f"{stats['p99_ms']:>10.0f}{stats['max_ms']:>10.0f}")
+
+    lag = report["event_loop_lag"]
+    print(f"\nAtraso do loop de eventos: p50 {lag['p50_ms']:.1f} ms  p99 {lag['p99_ms']:.1f} ms  máx {lag['max_ms']:.1f} ms")
+    print(f"Pico de memória (RSS): {report['peak_rss_mb']:.0f} MB")
+    backends = report["backends"]
+    print(f"Gemini: {backends['gemini_calls']} chamadas ({backends['gemini_prompt_chars']} caracteres de prompt)  "
+          f"dnd5eapi: {backends['dnd_api_requests']} requisições  "
+          f"Discord: {sum(backends['discord_calls'].values())} chamadas")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Teste de carga offline do MestreTatu.")
+    parser.add_argument("--rate", type=float, default=20.0, help="Comandos por segundo, somando todos os servidores.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos gerando comandos.")
+    parser.add_argument("--guilds", type=int, default=10, help="Servidores simulados.")
+    parser.add_argument("--channels", type=int, default=2, help="Canais por servidor.")
+    parser.add_argument("--mix", help=f"Pesos por tipo de comando, ex.: roll=30,rpg=10. Tipos: {', '.join(DEFAULT_MIX)}.")
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="Latência base do Gemini Pro falso (s).")
+    parser.add_argument("--gemini-jitter", type=float, default=1.0, help="Variação aleatória somada à latência (s).")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="Latência de cada chamada à API do Discord (s).")
+    parser.add_argument("--api-latency", type=float, default=0.08, help="Latência da dnd5eapi local (s).")
+    parser.add_argument("--rules-mb", type=int, default=10, help="Tamanho do corpus de regras sintético (MB); 0 desativa.")
+    parser.add_argument("--session-events", type=int, default=10_000, help="Eventos no banco de sessões gerado; 0 começa vazio.")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Servidores sem cache de membros, como com LOW_MEMORY_MODE: jogadores vêm da API.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "loadtest.json"),
+                        help="Arquivo JSON com o relatório completo.")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs das cogs.")
+    args = parser.parse_args(argv)
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    if not args.verbose:
+        logging.getLogger("discord").setLevel(logging.WARNING)
+
+    print(f"Gerando {args.rate:.1f} comandos/s por {args.duration:.0f}s em {args.guilds} servidor(es)...")
+    report = asyncio.run(LoadTest(args).run())
+    print_report(report)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nRelatório gravado em {args.output}.")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
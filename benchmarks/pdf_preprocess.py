@@ -0,0 +1,68 @@
+"""
+Vazão do src/utils/preprocess_pdfs.py sobre PDFs gerados com o próprio PyMuPDF.
+
+Sem o PyMuPDF (fitz) instalado, a suíte é pulada.
+
+    python -m benchmarks pdf_preprocess
+"""
+import contextlib
+import io
+import os
+import random
+
+from benchmarks.common import Stopwatch, cached_path, measurement
+from benchmarks.rules_search import WORDS
+
+PDF_FILES = 3
+PAGES_PER_PDF = {"quick": 50, "full": 400}
+LINES_PER_PAGE = 45
+WORDS_PER_LINE = 12
+
+
+def build_pdfs(pages: int, seed: int = 0) -> str:
+    """Gera (ou reaproveita) PDF_FILES livros com 'pages' páginas de texto cada."""
+    import fitz
+
+    directory = cached_path(f"pdfs_{pages}")
+    if os.path.isdir(directory) and len([f for f in os.listdir(directory) if f.endswith(".pdf")]) == PDF_FILES:
+        return directory
+    os.makedirs(directory, exist_ok=True)
+
+    rng = random.Random(seed)
+    for book in range(PDF_FILES):
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            text = "\n".join(" ".join(rng.choices(WORDS, k=WORDS_PER_LINE)) for _ in range(LINES_PER_PAGE))
+            page.insert_text((40, 50), text, fontsize=9)
+        doc.save(os.path.join(directory, f"livro_{book}.pdf"))
+        doc.close()
+    return directory
+
+
+def run(profile: str) -> list[dict]:
+    try:
+        import fitz  # noqa: F401
+    except ImportError:
+        print("  PyMuPDF (fitz) não instalado; suíte pdf_preprocess pulada.")
+        return []
+    from src.utils import preprocess_pdfs
+
+    pages = PAGES_PER_PDF[profile]
+    preprocess_pdfs.PDF_DIR = build_pdfs(pages)
+    preprocess_pdfs.OUTPUT_FILE = cached_path("compiled_rules_benchmark.txt")
+
+    best = None
+    for _ in range(3):
+        # O script fala bastante no stdout; o benchmark só quer o tempo.
+        with Stopwatch() as sw, contextlib.redirect_stdout(io.StringIO()):
+            preprocess_pdfs.extract_text_from_pdfs()
+        best = sw.elapsed if best is None else min(best, sw.elapsed)
+
+    output_mb = os.path.getsize(preprocess_pdfs.OUTPUT_FILE) / (1024 * 1024)
+    total_pages = pages * PDF_FILES
+    return [
+        measurement(f"pdf_preprocess.{total_pages}_pages", best, "s"),
+        measurement(f"pdf_preprocess.{total_pages}_pages_throughput", total_pages / best, "pages/s", "higher"),
+        measurement(f"pdf_preprocess.{total_pages}_pages_output", output_mb / best, "MB/s", "higher"),
+    ]
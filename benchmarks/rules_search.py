@@ -0,0 +1,62 @@
+"""
+Benchmark de RpgCog._search_rules_for_term sobre corpora sintéticos de 10, 50 e 200 MB.
+
+Mede três casos: um termo comum (achado logo no início, para após 3 trechos), um termo raro
+(uma única ocorrência perto do fim) e um termo ausente (varredura completa, o pior caso).
+
+    python -m benchmarks rules_search
+"""
+import random
+import types
+
+from benchmarks.common import best_of, measurement
+from src.cogs.rpg_cog import RpgCog
+
+CORPUS_SIZES_MB = {"quick": (10,), "full": (10, 50, 200)}
+BLOCK_BYTES = 1024 * 1024
+COMMON_TERM = "Vantagem"
+RARE_TERM = "Contramágica Suprema"
+ABSENT_TERM = "Xyzzy Inexistente"
+WORDS = (
+    "ataque", "dano", "teste", "resistência", "magia", "nível", "espaço", "ação", "bônus", "reação",
+    "criatura", "alvo", "alcance", "duração", "concentração", "descanso", "curto", "longo", "pontos",
+    "vida", "classe", "armadura", "proficiência", "modificador", "força", "destreza", "constituição",
+    "inteligência", "sabedoria", "carisma", "rolagem", "dado", "desvantagem", "movimento", "turno",
+    "rodada", "condição", "caído", "agarrado", "invisível", "o", "a", "de", "um", "uma", "que", "se",
+    COMMON_TERM.lower(),
+)
+
+
+def build_corpus(size_mb: int, seed: int = 0) -> str:
+    """Texto com ~size_mb MiB, repetindo blocos de 1 MiB de palavras aleatórias; o termo raro vai perto do fim."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < BLOCK_BYTES:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    block = " ".join(words)
+    rare_at = size_mb - 1
+    return "".join(
+        block if i != rare_at else block[:len(block) // 2] + f" {RARE_TERM} " + block[len(block) // 2:]
+        for i in range(size_mb)
+    )
+
+
+def run(profile: str) -> list[dict]:
+    results = []
+    for size_mb in CORPUS_SIZES_MB[profile]:
+        cog = types.SimpleNamespace(rules_text=build_corpus(size_mb))
+        search = lambda term: RpgCog._search_rules_for_term(cog, term)
+        assert len(search(COMMON_TERM)) == 3 and len(search(RARE_TERM)) == 1 and not search(ABSENT_TERM)
+
+        repeat = 5 if size_mb <= 50 else 3
+        prefix = f"rules_search.{size_mb}mb"
+        results.append(measurement(f"{prefix}.common", best_of(lambda: search(COMMON_TERM), repeat=repeat), "s"))
+        results.append(measurement(f"{prefix}.rare", best_of(lambda: search(RARE_TERM), repeat=repeat), "s"))
+        absent = best_of(lambda: search(ABSENT_TERM), repeat=repeat)
+        results.append(measurement(f"{prefix}.absent", absent, "s"))
+        results.append(measurement(f"{prefix}.absent_throughput", size_mb / absent, "MB/s", "higher"))
+        del cog
+    return results
@@ -0,0 +1,125 @@
+"""
+Benchmark das consultas agregadas do SessionCog e do .mvp sobre bancos gerados de
+10 mil, 1 milhão e 10 milhões de eventos.
+
+Os bancos são gerados uma vez (com o mesmo esquema e índices do bot, via setup_database)
+e reaproveitados de benchmarks/.data nas execuções seguintes.
+
+    python -m benchmarks session_queries
+"""
+import asyncio
+import contextlib
+import os
+import random
+import sqlite3
+import types
+from datetime import datetime, timedelta
+
+from benchmarks.common import Stopwatch, best_of, cached_path, measurement
+from src.cogs import session_cog
+
+EVENT_COUNTS = {"quick": (10_000,), "full": (10_000, 1_000_000, 10_000_000)}
+GUILDS = ("1", "2", "3", "4")  # O servidor "1" é o medido; os outros existem para o índice ter o que filtrar.
+PLAYERS = ("Thorin", "Elara", "Grok", "Lyra", "Vex", "Bram", "Sylas", "Mira")
+ACTIONS = ("causado", "recebido", "cura", "eliminacao", "jogador_caido", "critico_sucesso", "critico_falha")
+EVENTS_PER_SESSION = 400
+INSERT_CHUNK = 50_000
+
+
+def _generate_events(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        guild = GUILDS[0] if rng.random() < 0.6 else rng.choice(GUILDS[1:])
+        yield (
+            (start + timedelta(seconds=i * 30)).isoformat(),
+            guild,
+            i // EVENTS_PER_SESSION + 1,
+            rng.choice(PLAYERS),
+            rng.choice(ACTIONS),
+            rng.randint(1, 30),
+        )
+
+
+def build_database(count: int) -> str:
+    """Cria (ou reaproveita) um banco com 'count' eventos e devolve o caminho."""
+    path = cached_path(f"session_stats_{count}.db")
+    if os.path.exists(path):
+        return path
+
+    partial = f"{path}.part"
+    if os.path.exists(partial):
+        os.remove(partial)
+    session_cog.DB_FILE = partial
+    session_cog.setup_database()
+
+    with contextlib.closing(sqlite3.connect(partial)) as conn, conn:
+        events = _generate_events(count)
+        while chunk := [event for _, event in zip(range(INSERT_CHUNK), events)]:
+            conn.executemany(
+                "INSERT INTO session_stats (timestamp, guild_id, session_number, player_name, action, amount) "
+                "VALUES (?, ?, ?, ?, ?, ?)", chunk
+            )
+        sessions = count // EVENTS_PER_SESSION + 1
+        ended = datetime(2024, 1, 1).isoformat()
+        conn.executemany(
+            "INSERT OR IGNORE INTO sessions (guild_id, session_number, title, description, end_timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((GUILDS[0], n, f"Sessão {n}", "Gerada para benchmark.", ended) for n in range(1, sessions + 1))
+        )
+    with contextlib.closing(sqlite3.connect(partial)) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    os.replace(partial, path)
+    for suffix in ("-wal", "-shm"):  # Já vazios após o checkpoint; o banco final cria os seus.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial + suffix)
+    return path
+
+
+class _FakeContext:
+    """O mínimo de commands.Context que o show_mvps usa."""
+
+    def __init__(self, guild_id: int):
+        self.guild = types.SimpleNamespace(id=guild_id, name="Benchmark")
+        self.sent = 0
+
+    def typing(self):
+        return contextlib.nullcontext()
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+    reply = send
+
+
+def run(profile: str) -> list[dict]:
+    results = []
+    for count in EVENT_COUNTS[profile]:
+        with Stopwatch() as generation:
+            path = build_database(count)
+        label = f"session_queries.{count // 1000}k" if count < 1_000_000 else f"session_queries.{count // 1_000_000}m"
+        if generation.elapsed > 1:
+            print(f"  banco de {count} eventos gerado em {generation.elapsed:.1f}s ({path})")
+
+        session_cog.DB_FILE = path
+        session_cog.SESSION_DATA_FILE = cached_path("session_data.json")
+        cog = session_cog.SessionCog(types.SimpleNamespace())
+        guild_id = int(GUILDS[0])
+        last_session = cog._get_sessions_page(guild_id, limit=1)[0][0]
+        repeat = 5 if count <= 1_000_000 else 3
+
+        results.append(measurement(
+            f"{label}.player_totals", best_of(lambda: cog._get_player_total_stats(guild_id, PLAYERS[0]), repeat=repeat), "s"))
+        results.append(measurement(
+            f"{label}.session_stats", best_of(lambda: cog._get_session_stats(guild_id, last_session // 2), repeat=repeat), "s"))
+        results.append(measurement(
+            f"{label}.sessions_page", best_of(lambda: cog._get_sessions_page(guild_id), repeat=repeat), "s"))
+        results.append(measurement(
+            f"{label}.sessions_search", best_of(lambda: cog._get_sessions_page(guild_id, search="Sessão 1"), repeat=repeat), "s"))
+
+        def mvps():
+            ctx = _FakeContext(guild_id)
+            asyncio.run(session_cog.SessionCog.show_mvps.callback(cog, ctx))
+            assert ctx.sent == 1
+        results.append(measurement(f"{label}.show_mvps", best_of(mvps, repeat=repeat), "s"))
+    return results
@@ -0,0 +1,81 @@
+"""
+Tempo de partida a frio do bot: importação do src.main, criação do TatuBot e setup_hook
+(carregamento de todas as cogs), sem conectar ao Discord.
+
+Cada medição roda em um processo novo, para que as importações sejam realmente a frio, com
+TATU_DATA_DIR apontando para um diretório temporário e uma GEMINI_API_KEY fictícia: os modelos
+são criados como em produção, e a medição falha se o SDK do Gemini for importado na partida.
+
+    python -m benchmarks startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import measurement
+
+RUNS = {"quick": 2, "full": 5}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _child():
+    """Executado no processo filho: mede e imprime um JSON na última linha do stdout."""
+    import asyncio
+    import time
+
+    start = time.perf_counter()
+    import discord
+    from src.main import TatuBot
+    imported = time.perf_counter()
+
+    async def measure():
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        bot = TatuBot(command_prefix='.', intents=intents, help_command=None)
+        created = time.perf_counter()
+        await bot.setup_hook()
+        loaded = time.perf_counter()
+        cogs = len(bot.cogs)
+        await bot.close()
+        return created, loaded, cogs
+
+    created, loaded, cogs = asyncio.run(measure())
+    if "google.generativeai" in sys.modules:
+        raise RuntimeError("google.generativeai foi importado durante a partida; ele deve carregar só depois do on_ready.")
+    print(json.dumps({
+        "import": imported - start,
+        "init": created - imported,
+        "setup_hook": loaded - created,
+        "total": loaded - start,
+        "cogs": cogs,
+    }))
+
+
+def run(profile: str) -> list[dict]:
+    samples = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Variáveis vazias (e não ausentes) para que o load_dotenv não as preencha a partir do .env.
+        env = {**os.environ, "GEMINI_API_KEY": "benchmark", "AI_BACKEND": "gemini", "METRICS_PORT": "",
+               "TATU_DATA_DIR": data_dir}
+        for _ in range(RUNS[profile]):
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.startup", "--child"],
+                cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=300
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"Processo de partida falhou:\n{completed.stderr[-2000:]}")
+            samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    results = [
+        measurement(f"startup.{key}", min(sample[key] for sample in samples), "s")
+        for key in ("import", "init", "setup_hook", "total")
+    ]
+    results.append(measurement("startup.cogs_loaded", min(sample["cogs"] for sample in samples), "cogs", "higher"))
+    return results
+
+
+if __name__ == "__main__" and "--child" in sys.argv:
+    _child()
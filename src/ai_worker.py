@@ -0,0 +1,179 @@
+# src/ai_worker.py
+"""
+Worker de IA do modo de fila (AI_JOB_QUEUE, ver src/utils/job_queue.py).
+
+Reivindica trabalhos da fila, roda a recuperação nas regras e a geração com o backend de IA
+configurado (AI_BACKEND, GEMINI_API_KEY) e grava o resultado para o gateway entregar. Cada
+processo mantém até --concurrency trabalhos em andamento; --processes sobe vários processos,
+cada um com seu próprio event loop e sua cópia das regras.
+
+    python -m src.ai_worker --processes 4 --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import types
+
+from dotenv import load_dotenv
+
+from src.utils import ai_backend, job_queue
+
+log = logging.getLogger(__name__)
+
+IDLE_SLEEP = 0.25  # Segundos entre buscas quando a fila está vazia.
+LEASE_SECONDS = 300  # Trabalho reivindicado há mais que isso é dado como abandonado e volta à fila.
+REQUEUE_INTERVAL = 30  # Segundos entre as varreduras de trabalhos abandonados.
+RULES_CHECK_INTERVAL = 30  # Segundos entre as verificações de um arquivo de regras novo.
+
+
+class AIWorker:
+    """Executa os trabalhos com as mesmas funções que as cogs usam fora do modo de fila."""
+
+    def __init__(self, broker: job_queue.Broker, concurrency: int, name: str):
+        self.broker = broker
+        self.concurrency = concurrency
+        self.name = name
+        self.processed = 0
+
+        # As cogs são importadas aqui (e não no topo) para que o processo pai do --processes não as carregue.
+        from src.cogs.lookup_cog import LookupCog
+        from src.cogs.rpg_cog import RULES_FILE, RpgCog
+
+        pro, flash = ai_backend.create_models()
+        if pro is None:
+            raise ai_backend.AIBackendError("O worker de IA precisa de um backend de IA configurado.")
+        # Só os atributos de que as cogs precisam; sem ai_jobs, elas geram localmente.
+        bot = types.SimpleNamespace(ai_pro_model=pro, ai_flash_model=flash)
+        self.models = (pro, flash)
+        self.rpg = RpgCog(bot)
+        self.rules_file = RULES_FILE
+        self.lookup = LookupCog(bot)
+        self.handlers = {"rpg": self._run_rpg, "npc": self._run_npc, "lookup": self._run_lookup}
+
+    async def _run_rpg(self, payload: dict) -> dict:
+        query = {"keyword": None, "passages": 0, "cache_hit": False, "stages_ms": {}}
+        text, source = await self.rpg.answer_question(payload["question"], query)
+        return {"text": text, "source": source, "query": query}
+
+    async def _run_npc(self, payload: dict) -> dict:
+        stages = {}
+        text = await self.rpg.forge_npc(payload["description"], stages)
+        return {"text": text, "stages_ms": stages}
+
+    async def _run_lookup(self, payload: dict) -> dict:
+        return {"text": await self.lookup.describe_with_ai(payload["query"], payload["category"])}
+
+    async def _execute(self, job: job_queue.Job):
+        if job.expired:
+            await asyncio.to_thread(self.broker.fail, job.id, "Prazo vencido antes de o trabalho começar.")
+            log.info(f"Trabalho {job.id} ({job.kind}) descartado: o gateway já desistiu dele.")
+            return
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await asyncio.to_thread(self.broker.fail, job.id, f"Tipo de trabalho desconhecido: '{job.kind}'.")
+            return
+        start = time.perf_counter()
+        try:
+            result = await handler(job.payload)
+        except Exception as e:
+            log.error(f"Trabalho {job.id} ({job.kind}) falhou.", exc_info=True)
+            await asyncio.to_thread(self.broker.fail, job.id, f"{type(e).__name__}: {e}")
+            return
+        await asyncio.to_thread(self.broker.complete, job.id, result)
+        self.processed += 1
+        log.info(f"Trabalho {job.id} ({job.kind}) concluído em {time.perf_counter() - start:.2f}s.")
+
+    async def _slot(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.broker.claim, self.name)
+            except Exception:
+                log.error("Falha ao reivindicar um trabalho da fila.", exc_info=True)
+                job = None
+            if job is None:
+                await asyncio.sleep(IDLE_SLEEP)
+                continue
+            await self._execute(job)
+
+    async def _requeue_abandoned(self):
+        while True:
+            try:
+                requeued = await asyncio.to_thread(self.broker.requeue_stale, LEASE_SECONDS)
+                if requeued:
+                    log.warning(f"{requeued} trabalho(s) abandonado(s) por outro worker voltaram para a fila.")
+            except Exception:
+                log.error("Falha ao varrer trabalhos abandonados.", exc_info=True)
+            await asyncio.sleep(REQUEUE_INTERVAL)
+
+    def _rules_mtime(self) -> float | None:
+        try:
+            return os.path.getmtime(self.rules_file)
+        except OSError:
+            return None
+
+    async def _watch_rules(self):
+        """O .reload do bot não alcança os workers; eles remontam as regras quando o arquivo muda."""
+        known = self._rules_mtime()
+        while True:
+            await asyncio.sleep(RULES_CHECK_INTERVAL)
+            current = self._rules_mtime()
+            if current is None or current == known:
+                continue
+            try:
+                if self.rpg.rules_text is not None:
+                    await self.rpg.reload_rules()
+                known = current
+            except Exception:
+                log.error("Falha ao recarregar as regras no worker; a versão anterior continua em uso.", exc_info=True)
+
+    async def run(self):
+        log.info(f"Worker de IA '{self.name}' pronto, com até {self.concurrency} trabalhos simultâneos.")
+        # O SDK é carregado antes do primeiro trabalho, não no meio dele.
+        await asyncio.gather(*(model.warm_up() for model in self.models if model is not None))
+        await asyncio.gather(
+            self._requeue_abandoned(), self._watch_rules(), *(self._slot() for _ in range(self.concurrency))
+        )
+
+
+def run_worker(index: int, concurrency: int):
+    """Ponto de entrada de cada processo."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    load_dotenv()
+    name = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    try:
+        worker = AIWorker(job_queue.create_broker(), concurrency, name)
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        log.info(f"Worker de IA '{name}' encerrado.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de IA do Mestre Tatu (modo de fila).")
+    parser.add_argument("--processes", type=int, default=1, help="Processos de worker a subir nesta máquina.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Trabalhos simultâneos por processo.")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(0, args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(index, args.concurrency), name=f"ai-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,97 +2,693 @@
 
 import discord
 from discord.ext import commands
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import shlex
+import shutil
 import sqlite3
+import tempfile
 import logging
+from collections import Counter
+from typing import BinaryIO
 from datetime import datetime
 
+from src.utils import metrics
+
 log = logging.getLogger(__name__)
 
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")
+DB_FILE = os.path.join(DATA_DIR, 'stats.db')
+
+# --- Constantes de Exportação/Importação ---
+EXPORT_CHUNK_SIZE = 500  # Linhas lidas do cursor por vez; mantém o uso de memória constante.
+EXPORT_FORMATS = ("csv", "ndjson")
+MAX_IMPORT_ERRORS_SHOWN = 10
+LOGS_PAGE_SIZE = 15  # Logs exibidos por página no visualizador do .sessionlogs.
+MAX_DELETE_RANGE = 10000  # Maior intervalo de IDs aceito por um único '.dellog a-b'.
+DELETE_FILTER_KEYS = {
+    "sessao": "session", "sessão": "session", "session": "session",
+    "jogador": "player", "player": "player",
+    "acao": "action", "ação": "action", "action": "action",
+}
+VALID_ACTIONS = {
+    "causado", "recebido", "cura", "eliminacao",
+    "jogador_caido", "critico_sucesso", "critico_falha",
+}
+EXPORT_QUERIES = {
+    "session_stats": (
+        ("id", "timestamp", "session_number", "player_name", "action", "amount"),
+        "SELECT id, timestamp, session_number, player_name, action, amount "
+        "FROM session_stats WHERE guild_id = ? ORDER BY id ASC",
+    ),
+    "sessions": (
+        ("session_number", "title", "description", "end_timestamp"),
+        "SELECT session_number, title, description, end_timestamp "
+        "FROM sessions WHERE guild_id = ? ORDER BY session_number ASC",
+    ),
+}
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="export_stats")
+def export_guild_stats(db_path: str, guild_id: int, fmt: str) -> list[tuple[str, BinaryIO]]:
+    """
+    Exporta as tabelas de um servidor para arquivos temporários, em blocos.
+    O cursor do SQLite é percorrido com fetchmany, então nunca há mais de
+    EXPORT_CHUNK_SIZE linhas em memória. Retorna uma lista de (nome_do_arquivo, arquivo).
+    Usa TemporaryFile, e não SpooledTemporaryFile: no Python 3.10 (o da imagem Docker) este
+    último não tem readable()/seekable() e não pode ser envolvido por um TextIOWrapper.
+    """
+    files = []
+    ndjson_out = None
+    with sqlite3.connect(db_path) as conn:
+        for table, (columns, query) in EXPORT_QUERIES.items():
+            cursor = conn.execute(query, (str(guild_id),))
+
+            if fmt == "csv":
+                out = io.TextIOWrapper(tempfile.TemporaryFile(), encoding="utf-8", newline="")
+                writer = csv.writer(out)
+                writer.writerow(columns)
+                while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                    writer.writerows(rows)
+                out.flush()
+                files.append((f"{table}_{guild_id}.csv", out.detach()))
+            else:
+                if ndjson_out is None:
+                    ndjson_out = io.TextIOWrapper(tempfile.TemporaryFile(), encoding="utf-8")
+                while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                    ndjson_out.writelines(
+                        json.dumps({"table": table, **dict(zip(columns, row))}, ensure_ascii=False) + "\n"
+                        for row in rows
+                    )
+
+    if ndjson_out is not None:
+        ndjson_out.flush()
+        files.append((f"stats_{guild_id}.ndjson", ndjson_out.detach()))
+
+    for _, f in files:
+        f.seek(0)
+    return files
+
+
+def _gzip_file(name: str, f) -> tuple[str, BinaryIO]:
+    """Comprime um arquivo exportado quando ele excede o limite de upload do servidor."""
+    compressed = tempfile.TemporaryFile()
+    with gzip.GzipFile(filename=name, fileobj=compressed, mode="wb") as gz:
+        shutil.copyfileobj(f, gz)
+    f.close()
+    compressed.seek(0)
+    return f"{name}.gz", compressed
+
+
+def _parse_stats_row(row: dict) -> tuple:
+    """Valida uma linha de 'session_stats' e a converte na tupla de inserção."""
+    session_number = int(row.get("session_number") or 0)
+    if session_number <= 0:
+        raise ValueError("session_number deve ser um inteiro positivo")
+
+    player_name = str(row.get("player_name") or "").strip()
+    if not player_name:
+        raise ValueError("player_name é obrigatório")
+
+    action = str(row.get("action") or "").strip().lower()
+    if action not in VALID_ACTIONS:
+        raise ValueError(f"ação desconhecida '{action}'")
+
+    amount = int(row.get("amount") if row.get("amount") not in (None, "") else 1)
+    if amount < 0:
+        raise ValueError("amount não pode ser negativo")
+
+    timestamp = str(row.get("timestamp") or "").strip() or datetime.utcnow().isoformat()
+    datetime.fromisoformat(timestamp)  # Levanta ValueError se o formato for inválido.
+
+    return timestamp, session_number, player_name, action, amount
+
+
+def _parse_session_row(row: dict) -> tuple:
+    """Valida uma linha de 'sessions' e a converte na tupla de inserção."""
+    session_number = int(row.get("session_number") or 0)
+    if session_number <= 0:
+        raise ValueError("session_number deve ser um inteiro positivo")
+
+    title = str(row.get("title") or "").strip() or None
+    description = str(row.get("description") or "").strip() or None
+    end_timestamp = str(row.get("end_timestamp") or "").strip() or datetime.utcnow().isoformat()
+    datetime.fromisoformat(end_timestamp)
+
+    return session_number, title, description, end_timestamp
+
+
+def _iter_import_rows(filename: str, data: bytes):
+    """
+    Gera tuplas (número_da_linha, tabela, linha) a partir de um arquivo CSV ou NDJSON.
+    Em CSV, a tabela é deduzida pelo cabeçalho; em NDJSON, pelo campo 'table'
+    (padrão: 'session_stats').
+    """
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"linha {line_number}: esperado um objeto JSON")
+            yield line_number, record.pop("table", "session_stats"), record
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        header = {(name or "").strip().lower() for name in reader.fieldnames or []}
+        table = "sessions" if "end_timestamp" in header or "title" in header else "session_stats"
+        for line_number, row in enumerate(reader, start=2):
+            yield line_number, table, {(k or "").strip().lower(): v for k, v in row.items()}
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="import_stats")
+def import_guild_stats(db_path: str, guild_id: int, filename: str, data: bytes, dry_run: bool) -> dict:
+    """
+    Valida e importa um arquivo de estatísticas para um servidor.
+    Todas as linhas são validadas antes de qualquer escrita; a inserção usa
+    executemany dentro de uma única transação, então o import é tudo-ou-nada.
+    Um evento idêntico já gravado (mesmo servidor, horário, sessão, jogador, ação e valor)
+    é ignorado, então reimportar uma exportação não duplica linhas. A comparação é com o
+    banco de antes do import: eventos repetidos dentro do próprio arquivo são mantidos.
+    Linhas sem 'timestamp' recebem o horário do import e, por isso, não são reconhecidas
+    numa segunda importação.
+    """
+    stats_rows, session_rows, errors = [], [], []
+    try:
+        for line_number, table, row in _iter_import_rows(filename, data):
+            try:
+                if table == "session_stats":
+                    stats_rows.append((str(guild_id), *_parse_stats_row(row)))
+                elif table == "sessions":
+                    session_rows.append((str(guild_id), *_parse_session_row(row)))
+                else:
+                    raise ValueError(f"tabela desconhecida '{table}'")
+            except (ValueError, TypeError) as e:
+                errors.append(f"Linha {line_number}: {e}")
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        errors.append(f"Arquivo ilegível: {e}")
+
+    report = {
+        "stats": len(stats_rows),
+        "sessions": len(session_rows),
+        "players": len({row[3] for row in stats_rows}),
+        "session_range": (min(r[2] for r in stats_rows), max(r[2] for r in stats_rows)) if stats_rows else None,
+        "errors": errors,
+        "written": False,
+        "duplicates": 0,
+    }
+    if errors or dry_run:
+        return report
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:  # Uma única transação: commit no sucesso, rollback em qualquer erro.
+            # IMMEDIATE: nenhum .log entra entre a leitura das linhas existentes e a inserção.
+            conn.execute("BEGIN IMMEDIATE")
+            existing = Counter()
+            for session_number in {row[2] for row in stats_rows}:
+                # Uma consulta por sessão, pelo índice (guild_id, session_number).
+                existing.update(conn.execute(
+                    "SELECT guild_id, timestamp, session_number, player_name, action, amount "
+                    "FROM session_stats WHERE guild_id = ? AND session_number = ?",
+                    (str(guild_id), session_number)
+                ))
+            new_rows = []
+            for row in stats_rows:
+                # Cada linha existente absorve uma única linha igual do arquivo; as demais entram.
+                if existing[row] > 0:
+                    existing[row] -= 1
+                else:
+                    new_rows.append(row)
+            conn.executemany(
+                "INSERT INTO session_stats (guild_id, timestamp, session_number, player_name, action, amount) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                new_rows
+            )
+            report["duplicates"] = len(stats_rows) - len(new_rows)
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions (guild_id, session_number, title, description, end_timestamp) "
+                "VALUES (?, ?, ?, ?, ?)",
+                session_rows
+            )
+    finally:
+        conn.close()
+    report["written"] = True
+    return report
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="session_logs_page")
+def fetch_session_logs_page(db_path: str, guild_id: int, session_number: int, *, after_id: int = None,
+                            before_id: int = None, player: str = None, action: str = None,
+                            limit: int = LOGS_PAGE_SIZE) -> tuple[list[sqlite3.Row], bool]:
+    """
+    Busca uma página de logs de uma sessão usando paginação por chave (keyset) sobre 'id'.
+    Com 'after_id' avança (id > after_id); com 'before_id' volta (id < before_id).
+    Retorna (linhas em ordem cronológica, se existem mais linhas na direção pedida).
+    """
+    clauses, params = ["guild_id = ?", "session_number = ?"], [str(guild_id), session_number]
+    if player:
+        clauses.append("player_name = ? COLLATE NOCASE")
+        params.append(player)
+    if action:
+        clauses.append("action = ?")
+        params.append(action)
+
+    backwards = before_id is not None
+    if backwards:
+        clauses.append("id < ?")
+        params.append(before_id)
+    elif after_id is not None:
+        clauses.append("id > ?")
+        params.append(after_id)
+
+    # O índice (guild_id, session_number) carrega o rowid ('id'), então a ordenação e o
+    # cursor usam o próprio índice; buscamos uma linha extra só para saber se há mais.
+    query = (
+        "SELECT id, timestamp, player_name, action, amount FROM session_stats "
+        f"WHERE {' AND '.join(clauses)} ORDER BY id {'DESC' if backwards else 'ASC'} LIMIT ?"
+    )
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(query, (*params, limit + 1)).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    return rows, has_more
+
+
+def parse_log_id_spec(spec: str) -> tuple[list[int], list[tuple[int, int]]]:
+    """
+    Interpreta uma lista de IDs e intervalos, como '3,7,9' ou '120-158, 200'.
+    Retorna (ids avulsos, intervalos inclusivos).
+    """
+    ids, ranges = [], []
+    for part in re.split(r"[,\s]+", spec.strip()):
+        if not part:
+            continue
+        if part.isdigit():
+            ids.append(int(part))
+            continue
+        match = re.fullmatch(r"(\d+)-(\d+)", part)
+        if not match:
+            raise ValueError(f"Trecho inválido: `{part}`. Use IDs (`3,7,9`) ou intervalos (`120-158`).")
+        low, high = sorted((int(match.group(1)), int(match.group(2))))
+        if high - low >= MAX_DELETE_RANGE:
+            raise ValueError(f"Intervalo `{part}` grande demais (máximo de {MAX_DELETE_RANGE} IDs).")
+        ranges.append((low, high))
+    if not ids and not ranges:
+        raise ValueError("Nenhum ID informado.")
+    return ids, ranges
+
+
+def parse_log_filter_spec(spec: str) -> dict:
+    """Interpreta filtros no formato 'sessao:5 jogador:"Nome do Jogador" acao:cura'."""
+    filters = {}
+    for token in shlex.split(spec):
+        key, sep, value = token.partition(":") if ":" in token else token.partition("=")
+        field = DELETE_FILTER_KEYS.get(key.lower())
+        if not sep or not field or not value:
+            raise ValueError(f"Filtro inválido: `{token}`. Use `sessao:N`, `jogador:Nome` e/ou `acao:tipo`.")
+        filters[field] = value
+
+    if "session" in filters:
+        if not filters["session"].isdigit():
+            raise ValueError("O filtro `sessao` deve ser um número.")
+        filters["session"] = int(filters["session"])
+    if "action" in filters:
+        filters["action"] = filters["action"].lower()
+        if filters["action"] not in VALID_ACTIONS:
+            raise ValueError(f"Ação desconhecida: `{filters['action']}`.")
+    if "session" not in filters and "player" not in filters:
+        raise ValueError("Informe ao menos `sessao:N` ou `jogador:Nome` para apagar por filtro.")
+    return filters
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="soft_delete_logs")
+def soft_delete_logs(db_path: str, guild_id: int, description: str, *, ids: list[int] = (),
+                     ranges: list[tuple[int, int]] = (), filters: dict = None) -> tuple[int | None, int]:
+    """
+    Move as entradas selecionadas de 'session_stats' para a lixeira ('session_stats_deleted')
+    em uma única transação, agrupadas em um lote que pode ser desfeito com .undolog.
+    Retorna (id do lote, quantidade de entradas) ou (None, 0) se nada foi encontrado.
+    """
+    clauses, params = [], []
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            if ids:
+                # IDs avulsos vão para uma tabela temporária via executemany; o resto é SQL em conjunto.
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS dellog_ids (id INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM temp.dellog_ids")
+                conn.executemany("INSERT OR IGNORE INTO temp.dellog_ids (id) VALUES (?)", ((i,) for i in ids))
+                clauses.append("id IN (SELECT id FROM temp.dellog_ids)")
+            for low, high in ranges:
+                clauses.append("id BETWEEN ? AND ?")
+                params.extend((low, high))
+
+            where = [f"({' OR '.join(clauses)})"] if clauses else []
+            if filters:
+                if "session" in filters:
+                    where.append("session_number = ?")
+                    params.append(filters["session"])
+                if "player" in filters:
+                    where.append("player_name = ? COLLATE NOCASE")
+                    params.append(filters["player"])
+                if "action" in filters:
+                    where.append("action = ?")
+                    params.append(filters["action"])
+
+            batch_id = conn.execute(
+                "INSERT INTO deletion_batches (guild_id, created_at, description) VALUES (?, ?, ?)",
+                (str(guild_id), datetime.utcnow().isoformat(), description)
+            ).lastrowid
+            moved = conn.execute(f"""
+                INSERT INTO session_stats_deleted
+                    (batch_id, id, timestamp, guild_id, session_number, player_name, action, amount)
+                SELECT ?, id, timestamp, guild_id, session_number, player_name, action, amount
+                FROM session_stats
+                WHERE guild_id = ? AND {' AND '.join(where)}
+            """, (batch_id, str(guild_id), *params)).rowcount
+
+            if moved == 0:
+                conn.rollback()
+                return None, 0
+
+            conn.execute(
+                "DELETE FROM session_stats WHERE id IN (SELECT id FROM session_stats_deleted WHERE batch_id = ?)",
+                (batch_id,)
+            )
+            conn.execute("UPDATE deletion_batches SET row_count = ? WHERE id = ?", (moved, batch_id))
+        return batch_id, moved
+    finally:
+        conn.close()
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="undo_deletion")
+def undo_last_deletion(db_path: str, guild_id: int) -> tuple[int, str, int] | None:
+    """
+    Restaura o lote de exclusão mais recente do servidor, com os IDs originais.
+    Retorna (id do lote, descrição, quantidade restaurada) ou None se não houver lotes.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            batch = conn.execute(
+                "SELECT id, description FROM deletion_batches WHERE guild_id = ? ORDER BY id DESC LIMIT 1",
+                (str(guild_id),)
+            ).fetchone()
+            if not batch:
+                return None
+
+            batch_id, description = batch
+            restored = conn.execute("""
+                INSERT INTO session_stats (id, timestamp, guild_id, session_number, player_name, action, amount)
+                SELECT id, timestamp, guild_id, session_number, player_name, action, amount
+                FROM session_stats_deleted WHERE batch_id = ?
+            """, (batch_id,)).rowcount
+            conn.execute("DELETE FROM session_stats_deleted WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM deletion_batches WHERE id = ?", (batch_id,))
+        return batch_id, description, restored
+    finally:
+        conn.close()
+
+
+class SessionLogsView(discord.ui.View):
+    """Uma View que navega pelos logs de uma sessão, buscando uma página por vez."""
+
+    def __init__(self, author: discord.abc.User, db_path: str, guild_id: int, session_number: int,
+                 player: str = None, action: str = None):
+        super().__init__(timeout=300)
+        self.author = author
+        self.db_path = db_path
+        self.guild_id = guild_id
+        self.session_number = session_number
+        self.player = player
+        self.action = action
+        self.message = None
+        self.rows = []
+        self.page = 1
+
+    async def load(self, *, after_id: int = None, before_id: int = None) -> bool:
+        """Carrega a página indicada pelo cursor e atualiza o estado dos botões."""
+        rows, has_more = await asyncio.to_thread(
+            fetch_session_logs_page, self.db_path, self.guild_id, self.session_number,
+            after_id=after_id, before_id=before_id, player=self.player, action=self.action
+        )
+        if not rows:
+            return False
+
+        self.rows = rows
+        if before_id is not None:
+            self.previous_page.disabled = not has_more
+            self.next_page.disabled = False
+        else:
+            self.previous_page.disabled = after_id is None
+            self.next_page.disabled = not has_more
+        return True
+
+    def build_embed(self) -> discord.Embed:
+        lines = []
+        for row in self.rows:
+            action_text = row['action'].replace('_', ' ').title()
+            ts_obj = datetime.fromisoformat(row['timestamp'])
+            formatted_ts = ts_obj.strftime('%d/%m %H:%M')
+            lines.append(
+                f"**ID do Log: `{row['id']}`** | `{formatted_ts}` | "
+                f"**{row['player_name']}** - `{action_text}: {row['amount']}`"
+            )
+
+        embed = discord.Embed(
+            title=f"📜 Logs da Sessão {self.session_number}",
+            description="\n".join(lines),
+            color=discord.Color.dark_gold()
+        )
+        filters = [f"Jogador: {self.player}" if self.player else None,
+                   f"Ação: {self.action}" if self.action else None]
+        footer = " | ".join(f for f in [f"Página {self.page}", *filters] if f)
+        embed.set_footer(text=footer)
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("Apenas quem iniciou o comando pode interagir.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message:
+            for item in self.children:
+                item.disabled = True
+            await self.message.edit(view=self)
+
+    @discord.ui.button(label="Anterior", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if await self.load(before_id=self.rows[0]['id']):
+            self.page -= 1
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Próximo", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if await self.load(after_id=self.rows[-1]['id']):
+            self.page += 1
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+
 class AdminCog(commands.Cog, name="Administração"):
     """Comandos para o gerenciamento do bot e seus dados."""
 
     def __init__(self, bot):
         self.bot = bot
         # --- CORREÇÃO: Usar o caminho absoluto para o volume ---
-        self.db_path = '/data/stats.db'
+        self.db_path = DB_FILE
 
-    @commands.command(name='sessionlogs', help='Lista todos os logs de uma sessão específica. (Dono do bot)')
+    @commands.command(name='sessionlogs', help='Navega pelos logs de uma sessão, com filtros opcionais de jogador e ação. (Dono do bot)')
     @commands.is_owner()
-    async def session_logs(self, ctx: commands.Context, session_id: int):
+    async def session_logs(self, ctx: commands.Context, session_id: int, player: str = None, action: str = None):
         """
-        Busca e exibe todas as entradas de log associadas a um ID de sessão.
+        Abre um visualizador paginado dos logs associados a um ID de sessão.
         Cada entrada terá um ID único para permitir a sua exclusão.
+        Ex: .sessionlogs 5 "Nome do Jogador" cura  |  .sessionlogs 5 eliminacao
+        """
+        # Permite filtrar só pela ação: '.sessionlogs 5 cura'.
+        if player and action is None and player.lower() in VALID_ACTIONS:
+            player, action = None, player
+        if action:
+            action = action.lower()
+            if action not in VALID_ACTIONS:
+                await ctx.send(f"🤔 Ação desconhecida. Use uma destas: {', '.join(f'`{a}`' for a in sorted(VALID_ACTIONS))}.")
+                return
+
+        view = SessionLogsView(ctx.author, self.db_path, ctx.guild.id, session_id, player=player, action=action)
+        try:
+            found = await view.load()
+        except sqlite3.Error as e:
+            log.error(f"Erro de banco de dados no comando sessionlogs: {e}")
+            await ctx.send(f"🔥 Ocorreu um erro no banco de dados: {e}")
+            return
+
+        if not found:
+            await ctx.send(f"Nenhum log encontrado para a sessão `{session_id}`. Verifique se o ID da sessão e os filtros estão corretos.")
+            return
+
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
+
+    @commands.command(name='dellog', help='Apaga logs por ID, lista, intervalo ou filtro. Pode ser desfeito com .undolog. (Dono do bot)')
+    @commands.is_owner()
+    @commands.guild_only()
+    async def delete_log(self, ctx: commands.Context, *, spec: str):
         """
+        Move entradas de log para a lixeira em uma única transação.
+        Ex: .dellog 42  |  .dellog 3,7,9  |  .dellog 120-158  |  .dellog sessao:5 jogador:"Nome"
+        """
+        try:
+            if ":" in spec or "=" in spec:
+                filters = parse_log_filter_spec(spec)
+                ids, ranges = [], []
+            else:
+                filters = None
+                ids, ranges = parse_log_id_spec(spec)
+        except ValueError as e:
+            await ctx.send(f"🤔 {e}")
+            return
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
-            cursor = conn.cursor()
-
-            # Busca os logs da sessão, ordenados pelo ID de inserção (ordem cronológica)
-            cursor.execute(
-                "SELECT id, timestamp, player_name, action, amount FROM session_stats WHERE guild_id = ? AND session_number = ? ORDER BY id ASC",
-                (str(ctx.guild.id), session_id)
+            batch_id, count = await asyncio.to_thread(
+                soft_delete_logs, self.db_path, ctx.guild.id, spec, ids=ids, ranges=ranges, filters=filters
             )
-            logs_data = cursor.fetchall()
+        except sqlite3.Error as e:
+            log.error(f"Erro de banco de dados no comando dellog: {e}")
+            await ctx.send(f"🔥 Ocorreu um erro no banco de dados. Nada foi apagado: {e}")
+            return
 
-            if not logs_data:
-                await ctx.send(f"Nenhum log encontrado para a sessão `{session_id}`. Verifique se o ID da sessão está correto.")
-                return
+        if not count:
+            await ctx.send(f"❌ Erro: Nenhuma entrada de log encontrada para `{spec}`.")
+            return
 
-            # Usa o paginador do discord.py para lidar com listas longas de forma limpa
-            paginator = commands.Paginator(prefix='', suffix='', max_size=2000)
-            paginator.add_line(f"**📜 Logs da Sessão `{session_id}`**\n---")
+        await ctx.send(
+            f"✅ Sucesso! {count} entrada(s) de log movida(s) para a lixeira (lote `#{batch_id}`). "
+            "Use `.undolog` para desfazer."
+        )
 
-            for row in logs_data:
-                action_text = row['action'].replace('_', ' ').title()
-                ts_obj = datetime.fromisoformat(row['timestamp'])
-                formatted_ts = ts_obj.strftime('%d/%m %H:%M')
+    @commands.command(name='undolog', help='Restaura o último lote de logs apagado com .dellog. (Dono do bot)')
+    @commands.is_owner()
+    @commands.guild_only()
+    async def undo_log(self, ctx: commands.Context):
+        """Desfaz a exclusão mais recente deste servidor, restaurando as entradas com seus IDs originais."""
+        try:
+            result = await asyncio.to_thread(undo_last_deletion, self.db_path, ctx.guild.id)
+        except sqlite3.Error as e:
+            log.error(f"Erro de banco de dados no comando undolog: {e}")
+            await ctx.send(f"🔥 Ocorreu um erro no banco de dados. Nada foi restaurado: {e}")
+            return
 
-                log_line = (
-                    f"**ID do Log: `{row['id']}`** | `{formatted_ts}` | "
-                    f"**{row['player_name']}** - `{action_text}: {row['amount']}`"
-                )
-                paginator.add_line(log_line)
+        if not result:
+            await ctx.send("Não há exclusões para desfazer neste servidor.")
+            return
 
-            # Envia as páginas para o usuário
-            for page in paginator.pages:
-                await ctx.send(page)
+        batch_id, description, restored = result
+        await ctx.send(f"♻️ Lote `#{batch_id}` (`{description}`) desfeito: {restored} entrada(s) restaurada(s).")
+
+    @commands.command(name='exportstats', help='Exporta as estatísticas do servidor em CSV ou NDJSON. (Dono do bot)')
+    @commands.is_owner()
+    @commands.guild_only()
+    async def export_stats(self, ctx: commands.Context, fmt: str = "csv"):
+        """
+        Gera arquivos com as tabelas 'session_stats' e 'sessions' deste servidor
+        e os envia como anexos. Ex: .exportstats ndjson
+        """
+        fmt = fmt.lower()
+        if fmt not in EXPORT_FORMATS:
+            await ctx.send(f"🤔 Formato inválido. Use um destes: {', '.join(f'`{f}`' for f in EXPORT_FORMATS)}.")
+            return
+
+        files = []
+        try:
+            async with ctx.typing():
+                files = await asyncio.to_thread(export_guild_stats, self.db_path, ctx.guild.id, fmt)
 
+                attachments = []
+                for i, (name, f) in enumerate(files):
+                    f.seek(0, io.SEEK_END)
+                    size = f.tell()
+                    f.seek(0)
+                    if size > ctx.guild.filesize_limit:
+                        name, f = await asyncio.to_thread(_gzip_file, name, f)
+                        files[i] = (name, f)
+                    attachments.append(discord.File(f, filename=name))
+
+                await ctx.send(f"📦 Exportação de **{ctx.guild.name}** concluída ({fmt.upper()}).", files=attachments)
         except sqlite3.Error as e:
-            log.error(f"Erro de banco de dados no comando sessionlogs: {e}")
+            log.error(f"Erro de banco de dados no comando exportstats: {e}")
             await ctx.send(f"🔥 Ocorreu um erro no banco de dados: {e}")
+        except discord.HTTPException as e:
+            log.error(f"Falha ao enviar a exportação: {e}")
+            await ctx.send("🔥 Não consegui enviar os arquivos. Eles podem ter excedido o limite de upload do servidor.")
         finally:
-            if 'conn' in locals() and conn:
-                conn.close()
+            for _, f in files:
+                f.close()
 
-    @commands.command(name='dellog', help='Deleta uma entrada de log específica pelo seu ID. (Dono do bot)')
+    @commands.command(name='importstats', help='Importa estatísticas de um arquivo anexado. Use "simular" para testar. (Dono do bot)')
     @commands.is_owner()
-    async def delete_log(self, ctx: commands.Context, log_id: int):
+    @commands.guild_only()
+    async def import_stats(self, ctx: commands.Context, mode: str = None):
         """
-        Deleta uma única entrada de log do banco de dados 'session_stats'.
+        Importa um arquivo CSV ou NDJSON anexado à mensagem para este servidor.
+        Colunas de 'session_stats': session_number, player_name, action, amount e timestamp (opcional).
+        Colunas de 'sessions': session_number, title, description e end_timestamp (opcional).
+        Ex: .importstats simular  (valida e mostra o relatório sem gravar nada)
         """
+        if not ctx.message.attachments:
+            await ctx.send("📎 Anexe um arquivo `.csv` ou `.ndjson` à mensagem do comando.")
+            return
+
+        dry_run = mode is not None and mode.lower() in ("simular", "dryrun", "dry-run", "teste")
+        attachment = ctx.message.attachments[0]
+
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            async with ctx.typing():
+                data = await attachment.read()
+                report = await asyncio.to_thread(
+                    import_guild_stats, self.db_path, ctx.guild.id, attachment.filename, data, dry_run
+                )
+        except sqlite3.Error as e:
+            log.error(f"Erro de banco de dados no comando importstats: {e}")
+            await ctx.send(f"🔥 Ocorreu um erro no banco de dados. Nada foi importado: {e}")
+            return
 
-            # Verifica se o log existe antes de deletar para dar um feedback melhor
-            cursor.execute("SELECT id FROM session_stats WHERE id = ?", (log_id,))
-            if not cursor.fetchone():
-                await ctx.send(f"❌ Erro: Nenhuma entrada de log encontrada com o ID `{log_id}`.")
-                return
+        if report["errors"]:
+            color, title = discord.Color.red(), "❌ Importação Rejeitada"
+        elif report["written"]:
+            color, title = discord.Color.green(), "✅ Importação Concluída"
+        else:
+            color, title = discord.Color.blue(), "🔎 Simulação de Importação"
 
-            # Deleta o log
-            cursor.execute("DELETE FROM session_stats WHERE id = ?", (log_id,))
-            conn.commit()
+        embed = discord.Embed(title=title, color=color)
+        embed.add_field(name="Eventos", value=f"`{report['stats']}`", inline=True)
+        embed.add_field(name="Resumos de Sessão", value=f"`{report['sessions']}`", inline=True)
+        embed.add_field(name="Jogadores", value=f"`{report['players']}`", inline=True)
+        if report["session_range"]:
+            first, last = report["session_range"]
+            embed.add_field(name="Sessões", value=f"`{first}` a `{last}`", inline=True)
+        if report["duplicates"]:
+            embed.add_field(name="Já Existentes (ignorados)", value=f"`{report['duplicates']}`", inline=True)
 
-            await ctx.send(f"✅ Sucesso! A entrada de log com ID `{log_id}` foi permanentemente deletada.")
+        if report["errors"]:
+            shown = report["errors"][:MAX_IMPORT_ERRORS_SHOWN]
+            hidden = len(report["errors"]) - len(shown)
+            errors_text = "\n".join(shown) + (f"\n... e mais {hidden} erro(s)." if hidden else "")
+            embed.add_field(name="Erros (nada foi gravado)", value=f"```{errors_text[:1000]}```", inline=False)
+        elif not report["written"]:
+            embed.set_footer(text="Nenhuma alteração foi feita. Rode sem 'simular' para gravar.")
 
-        except sqlite3.Error as e:
-            log.error(f"Erro de banco de dados no comando dellog: {e}")
-            await ctx.send(f"🔥 Ocorreu um erro no banco de dados: {e}")
-        finally:
-            if 'conn' in locals() and conn:
-                conn.close()
+        await ctx.send(embed=embed)
 
     async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError):
         """Trata erros comuns para os comandos deste cog."""
@@ -0,0 +1,165 @@
+# src/cogs/diagnostics_cog.py
+
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime
+
+from src.utils import tracing
+from src.utils.query_log import NdjsonWriter
+from src.utils.stall_watchdog import LoopStallWatchdog, DEFAULT_THRESHOLD
+
+log = logging.getLogger(__name__)
+
+# --- Caminhos e Constantes de Diagnóstico ---
+LOGS_DIR = "src/logs"
+TRACES_FILE = os.path.join(LOGS_DIR, "traces.ndjson")
+TRACE_DEFAULT_LAST = 20
+TRACE_SHOWN = 5  # Quantos dos traces mais lentos aparecem no embed.
+TRACE_MAX_SPANS = 15  # Spans listados por trace; o resto é resumido em uma linha.
+STALLS_SHOWN = 8
+# Limite do detector de travamentos do loop, em milissegundos (variável de ambiente STALL_THRESHOLD_MS).
+STALL_THRESHOLD = float(os.getenv("STALL_THRESHOLD_MS", DEFAULT_THRESHOLD * 1000)) / 1000
+
+
+def _span_tree(trace: dict) -> list[tuple[int, dict]]:
+    """Ordena os spans do trace em profundidade (pai antes dos filhos), com o nível de cada um."""
+    children: dict[str | None, list[dict]] = {}
+    for span in trace["spans"]:
+        children.setdefault(span["parent_id"], []).append(span)
+
+    ordered = []
+    stack = [(0, span) for span in reversed(children.get(None, []))]
+    while stack:
+        depth, span = stack.pop()
+        ordered.append((depth, span))
+        stack.extend((depth + 1, child) for child in reversed(children.get(span["span_id"], [])))
+    return ordered
+
+
+def format_trace(trace: dict, max_chars: int = 1024) -> str:
+    """Bloco de texto com a quebra do trace por span: duração, deslocamento e erro."""
+    tree = _span_tree(trace)
+    lines, size = [], 8  # As cercas ``` e as quebras de linha.
+    for shown, (depth, span) in enumerate(tree):
+        duration = f"{span['duration_ms']:.0f} ms" if span["duration_ms"] is not None else "?"
+        error = f" ✗ {span['error']}" if span["error"] else ""
+        line = f"{'  ' * depth}{span['name']:<{max(0, 28 - 2 * depth)}} {duration:>9}  +{span['offset_ms']:.0f}{error}"
+        if shown == TRACE_MAX_SPANS or size + len(line) + 40 > max_chars:
+            lines.append(f"... mais {len(tree) - shown} span(s)")
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+class DiagnosticsCog(commands.Cog, name="Diagnóstico"):
+    """Ferramentas de diagnóstico para o dono do bot: traces das requisições mais lentas e travamentos do loop."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.trace_writer = NdjsonWriter(TRACES_FILE)
+        self.watchdog = None
+        self._loop_thread = None
+
+    async def cog_load(self):
+        self.trace_writer.start()
+        self._loop_thread = threading.get_ident()
+        tracing.set_exporter(self._export_trace)
+        self.watchdog = LoopStallWatchdog(asyncio.get_running_loop(), STALL_THRESHOLD)
+        self.watchdog.start()
+
+    async def cog_unload(self):
+        self.watchdog.stop()
+        tracing.set_exporter(None)
+        await self.trace_writer.close()
+
+    def _export_trace(self, record: dict):
+        # A fila do escritor só pode ser usada do loop; traces fechados em threads passam pelo loop.
+        if threading.get_ident() == self._loop_thread:
+            self.trace_writer.submit(record)
+        else:
+            self.bot.loop.call_soon_threadsafe(self.trace_writer.submit, record)
+
+    @commands.command(name='trace', help='Mostra as requisições mais lentas entre as últimas N. Ex: .trace last 20 (Dono do bot)')
+    @commands.is_owner()
+    async def trace(self, ctx: commands.Context, *args: str):
+        """Lista os traces mais lentos entre os últimos N, com a duração de cada etapa."""
+        words = [a for a in args if a.lower() not in ("last", "ultimos", "últimos")]
+        if len(words) > 1 or (words and not words[0].isdigit()):
+            await ctx.send("Uso: `.trace last 20`")
+            return
+        last = int(words[0]) if words else TRACE_DEFAULT_LAST
+
+        traces = tracing.recent_traces(last)
+        if not traces:
+            await ctx.send("Nenhuma requisição rastreada ainda.")
+            return
+
+        slowest = sorted(traces, key=lambda t: t["duration_ms"] or 0, reverse=True)[:TRACE_SHOWN]
+        embed = discord.Embed(
+            title="🔬 Requisições Mais Lentas",
+            description=f"As {len(slowest)} mais lentas entre as últimas {len(traces)} rastreadas.",
+            color=discord.Color.dark_teal()
+        )
+        for trace in slowest:
+            started = datetime.fromtimestamp(trace["start"]).strftime("%d/%m %H:%M:%S")
+            status = f" · ✗ {trace['error']}" if trace["error"] else ""
+            embed.add_field(
+                name=f"{trace['name']} · {trace['duration_ms']:.0f} ms · {started}{status}",
+                value=format_trace(trace),
+                inline=False
+            )
+        embed.set_footer(text=f"Traces completos em {TRACES_FILE}.")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='stalls', help='Mostra os travamentos do loop de eventos por local do código. Use "reset" para zerar. (Dono do bot)')
+    @commands.is_owner()
+    async def stalls(self, ctx: commands.Context, mode: str = None):
+        """Resume os travamentos detectados: locais mais frequentes e a pilha do pior caso."""
+        if mode and mode.lower() == "reset":
+            self.watchdog.reset()
+            await ctx.send("🧹 Estatísticas de travamento zeradas.")
+            return
+
+        sites = self.watchdog.top_sites(STALLS_SHOWN)
+        if not sites:
+            await ctx.send(f"✅ Nenhum travamento acima de {self.watchdog.threshold * 1000:.0f} ms desde o início.")
+            return
+
+        embed = discord.Embed(
+            title="🐢 Travamentos do Loop de Eventos",
+            description=(f"{self.watchdog.total_stalls} travamento(s) acima de {self.watchdog.threshold * 1000:.0f} ms, "
+                         f"em {len(self.watchdog.sites)} local(is)."),
+            color=discord.Color.orange()
+        )
+        lines = [
+            f"`{site.count:>4}x` pior `{site.worst * 1000:.0f} ms`, média `{site.average * 1000:.0f} ms`: {site.site}"
+            for site in sites
+        ]
+        embed.add_field(name="Locais mais frequentes", value="\n".join(lines)[:1024], inline=False)
+
+        worst = self.watchdog.worst_site()
+        stack = "".join(worst.worst_stack)
+        # Mantém o fim da pilha (o frame que travou) se ela não couber no campo.
+        embed.add_field(
+            name=f"Pior travamento: {worst.worst * 1000:.0f} ms",
+            value=f"```\n{stack[-(1024 - 8):]}\n```",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError):
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("🚫 Você não tem permissão para usar este comando.")
+        else:
+            log.error(f"Erro inesperado no cog de Diagnóstico: {error}", exc_info=True)
+            await ctx.send("🔥 Ocorreu um erro inesperado ao processar o comando.")
+
+
+async def setup(bot: commands.Bot):
+    """Função que o discord.py chama para carregar a cog."""
+    await bot.add_cog(DiagnosticsCog(bot))
@@ -1,105 +1,296 @@
 import discord
-from discord.ext import commands
-import random
-import re
-from typing import Dict, Any
+from discord.ext import commands, tasks
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from src.utils import metrics
+from src.utils.dice import RollResult, compile_expression, find_inline_rolls
+from src.utils.dice_math import Analysis, analyze
+from src.utils.combat_sim import parse_attack_spec, simulate, MAX_ROUNDS
+from src.utils.roll_history import RollRingBuffer, luck_report
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")
+DB_FILE = os.path.join(DATA_DIR, 'stats.db')
+HISTORY_FLUSH_SECONDS = 30  # As rolagens em memória são gravadas no banco em lotes, neste intervalo.
+MAX_INLINE_ROLLS = 5  # Expressões [[...]] avaliadas por mensagem; as demais são ignoradas.
+
+# Atalhos aceitos no lugar de uma expressão.
+ROLL_ALIASES = {
+    'adv': '2d20kh1',
+    'advantage': '2d20kh1',
+    'dis': '2d20kl1',
+    'disadvantage': '2d20kl1',
+}
+
+
+def setup_database() -> tuple[set[int], set[int]]:
+    """
+    Cria as tabelas do rolador e retorna (servidores com críticos automáticos ativos,
+    canais com rolagens [[...]] ativadas).
+    """
+    with sqlite3.connect(DB_FILE) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS roll_history (
+                id INTEGER PRIMARY KEY,
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                die INTEGER NOT NULL,
+                face INTEGER NOT NULL,
+                timestamp REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_roll_history_guild_user ON roll_history (guild_id, user_id, die)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS dice_settings (
+                guild_id TEXT PRIMARY KEY,
+                auto_crits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS inline_roll_channels (
+                channel_id TEXT PRIMARY KEY,
+                guild_id TEXT NOT NULL
+            )
+        """)
+        auto_crits = {int(guild_id) for guild_id, in conn.execute("SELECT guild_id FROM dice_settings WHERE auto_crits = 1")}
+        inline_channels = {int(channel_id) for channel_id, in conn.execute("SELECT channel_id FROM inline_roll_channels")}
+        return auto_crits, inline_channels
 
 
 class DiceCog(commands.Cog, name="Rolador de Dados"):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Histórico recente por servidor, em buffers circulares; o banco recebe as rolagens em lotes.
+        self.history: Dict[int, RollRingBuffer] = {}
+        self.auto_crits: set[int] = set()
+        self.inline_channels: set[int] = set()
+        self._pending_crits: list[tuple] = []
 
-    def _parse_and_roll(self, expression: str) -> Dict[str, Any]:
+    async def cog_load(self):
+        self.auto_crits, self.inline_channels = await asyncio.to_thread(setup_database)
+        self.flush_history.start()
+        metrics.QUEUE_DEPTH.set_function(self._pending_count, queue="roll_history")
 
-        match = re.match(r'(\d+)?d(\d+)((?:[kd][hl])?\d+)?([+-]\d+)?', expression, re.IGNORECASE)
+    async def cog_unload(self):
+        self.flush_history.cancel()
+        metrics.QUEUE_DEPTH.remove(queue="roll_history")
+        await self._flush()
 
-        if not match:
-            raise ValueError("Formato de rolagem inválido. Use algo como `2d6`, `d20+5` ou `4d6kh3`.")
+    def snapshot_state(self) -> dict:
+        """Estado em memória passado para a nova instância no .reload; o cog_unload já gravou o pendente."""
+        return {"history": self.history}
 
-        num_dice_str, num_sides_str, keep_drop_str, modifier_str = match.groups()
+    def restore_state(self, state: dict):
+        self.history = state["history"]
 
-        num_dice = int(num_dice_str) if num_dice_str else 1
-        num_sides = int(num_sides_str)
-        modifier = int(modifier_str) if modifier_str else 0
+    def _pending_count(self) -> int:
+        """Rolagens e críticos ainda não gravados no banco."""
+        return sum(buffer.total - buffer.flushed for buffer in self.history.values()) + len(self._pending_crits)
 
-        if num_dice <= 0 or num_sides <= 0 or num_dice > 100:
-            raise ValueError("Número de dados ou lados inválido. Use valores positivos e no máximo 100 dados.")
+    # --- Histórico de rolagens ---
+    def _record_roll(self, ctx: commands.Context | discord.Message, roll_data: RollResult):
+        """
+        Guarda cada dado rolado no buffer do servidor e separa os críticos naturais de d20, se ativados.
+        Aceita um Context ou uma Message (rolagens [[...]]); só usa .guild e .author.
+        """
+        buffer = self.history.get(ctx.guild.id)
+        if buffer is None:
+            buffer = self.history[ctx.guild.id] = RollRingBuffer()
 
-        all_rolls = [random.randint(1, num_sides) for _ in range(num_dice)]
-        rolls_to_sum = list(all_rolls)
-        dropped_rolls = []
+        now = time.time()
+        for group in roll_data.groups:
+            # Todas as rolagens feitas, inclusive as rerroladas, para que a análise de sorte veja o dado cru.
+            buffer.extend(ctx.author.id, group.sides, group.rerolled + group.rolls, now)
 
-        if keep_drop_str:
-            kd_match = re.match(r'([kd])([hl])?(\d+)', keep_drop_str, re.IGNORECASE)
-            if kd_match:
-                mode, high_low, count_str = kd_match.groups()
-                count = int(count_str)
+            # Só conta como crítico um d20 que decide o teste sozinho (1d20, vantagem ou desvantagem).
+            if ctx.guild.id in self.auto_crits and group.sides == 20 and len(group.kept) == 1 and group.kept[0] in (1, 20):
+                action = "critico_sucesso" if group.kept[0] == 20 else "critico_falha"
+                session_cog = self.bot.get_cog("Estatísticas de Sessão")
+                session_number = session_cog.session_data.get(str(ctx.guild.id), 1) if session_cog else 1
+                self._pending_crits.append(
+                    (datetime.utcnow().isoformat(), str(ctx.guild.id), session_number, ctx.author.display_name, action, 1)
+                )
 
-                if count >= num_dice:
-                    raise ValueError("Não é possível manter/descartar mais dados do que o total rolado.")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="roll_history_flush")
+    def _write_history(self, rolls: list[tuple], crits: list[tuple]):
+        with sqlite3.connect(DB_FILE) as conn:
+            conn.executemany(
+                "INSERT INTO roll_history (guild_id, user_id, die, face, timestamp) VALUES (?, ?, ?, ?, ?)", rolls
+            )
+            conn.executemany(
+                "INSERT INTO session_stats (timestamp, guild_id, session_number, player_name, action, amount) VALUES (?, ?, ?, ?, ?, ?)",
+                crits
+            )
 
-                sorted_rolls = sorted(rolls_to_sum)
+    async def _flush(self):
+        """Grava em uma transação as rolagens novas de todos os servidores e os críticos pendentes."""
+        batches = []
+        for guild_id, buffer in self.history.items():
+            mark, rows, lost = buffer.pending()
+            if lost:
+                log.warning(f"{lost} rolagem(ns) do servidor {guild_id} saíram do buffer antes de serem gravadas.")
+            if rows:
+                batches.append((guild_id, buffer, mark, rows))
 
-                if mode.lower() == 'k':
-                    if high_low and high_low.lower() == 'l':
-                        rolls_to_sum = sorted_rolls[:count]
-                        dropped_rolls = sorted_rolls[count:]
-                    else:
-                        rolls_to_sum = sorted_rolls[-count:]
-                        dropped_rolls = sorted_rolls[:-count]
+        crits, self._pending_crits = self._pending_crits, []
+        if not batches and not crits:
+            return
 
-                elif mode.lower() == 'd':
-                    if high_low and high_low.lower() == 'h':
-                        rolls_to_sum = sorted_rolls[:-count]
-                        dropped_rolls = sorted_rolls[-count:]
-                    else:
-                        rolls_to_sum = sorted_rolls[count:]
-                        dropped_rolls = sorted_rolls[:count]
+        rolls = [
+            (str(guild_id), str(user_id), die, face, timestamp)
+            for guild_id, _, _, rows in batches
+            for user_id, die, face, timestamp in rows
+        ]
+        try:
+            await asyncio.to_thread(self._write_history, rolls, crits)
+        except sqlite3.Error as e:
+            log.error(f"Falha ao gravar o histórico de rolagens: {e}", exc_info=True)
+            # As rolagens continuam pendentes no buffer; os críticos voltam para a fila.
+            self._pending_crits[:0] = crits
+            return
 
-        total = sum(rolls_to_sum) + modifier
-        return {
-            "total": total,
-            "initial_rolls": all_rolls,
-            "final_rolls": rolls_to_sum,
-            "dropped_rolls": dropped_rolls,
-            "modifier": modifier
-        }
+        for _, buffer, mark, _ in batches:
+            buffer.mark_flushed(mark)
 
-    @commands.command(name='roll', aliases=['r'],
-                      help='Rola dados usando a notação de RPG (ex: 2d6, d20+5, 4d6kh3, adv).')
-    async def roll(self, ctx: commands.Context, *, expression: str):
+    @tasks.loop(seconds=HISTORY_FLUSH_SECONDS)
+    async def flush_history(self):
+        await self._flush()
+
+    def _parse_and_roll(self, expression: str) -> RollResult:
+        """Compila a expressão (ou reaproveita do cache) e rola. Erros de sintaxe viram ValueError."""
+        return compile_expression(expression).roll()
+
+    def _normalize_expression(self, expression: str) -> str:
         expression = expression.lower().strip().replace(" ", "")
+        return ROLL_ALIASES.get(expression, expression)
+
+    def _distribution_embed(self, expression: str, analysis: Analysis) -> discord.Embed:
+        distribution = analysis.distribution
+        description = f"Distribuição exata de `{expression}`"
+        if analysis.success is not None:
+            description += f"\nChance de sucesso: **{analysis.success * 100:.2f}%**"
+        description += f"\n```\n{distribution.histogram()}\n```"
+
+        embed = discord.Embed(title="📊 Probabilidades", description=description, color=discord.Color.purple())
+        embed.add_field(name="Média", value=f"`{distribution.mean:.2f}`", inline=True)
+        embed.add_field(name="Desvio Padrão", value=f"`{distribution.std:.2f}`", inline=True)
+        embed.add_field(name="Mínimo / Máximo", value=f"`{distribution.minimum}` / `{distribution.maximum}`", inline=True)
+        percentiles = " · ".join(f"P{q}: `{value}`" for q, value in analysis.percentiles.items())
+        embed.add_field(name="Percentis", value=percentiles, inline=False)
+        return embed
+
+    async def _send_distribution(self, ctx: commands.Context, expression: str, require_comparison: bool):
+        expression = self._normalize_expression(expression)
+        try:
+            # O cálculo é rápido, mas expressões grandes podem levar algumas centenas de ms.
+            analysis = await asyncio.to_thread(analyze, expression)
+            if require_comparison and analysis.success is None:
+                raise ValueError("Use uma comparação, como `.prob 2d6+3 >= 10`. Para ver só a distribuição, use `.dist`.")
+        except ValueError as e:
+            embed = discord.Embed(title="❌ Erro no Cálculo", description=str(e), color=discord.Color.orange())
+            await ctx.reply(embed=embed)
+            return
 
-        # Casos especiais: Vantagem e Desvantagem
-        if expression in ['adv', 'advantage']:
-            expression = '2d20kh1'
+        await ctx.reply(embed=self._distribution_embed(expression, analysis))
 
-        if expression in ['dis', 'disadvantage']:
-            expression = '2d20kl1'
+    @commands.command(name='prob',
+                      help='Calcula a chance exata de uma rolagem atingir um alvo (ex: .prob 2d6+3 >= 10).')
+    async def prob(self, ctx: commands.Context, *, expression: str):
+        await self._send_distribution(ctx, expression, require_comparison=True)
+
+    @commands.command(name='dist',
+                      help='Mostra a distribuição exata de uma rolagem, com média, percentis e histograma (ex: .dist 4d6kh3).')
+    async def dist(self, ctx: commands.Context, *, expression: str):
+        await self._send_distribution(ctx, expression, require_comparison=False)
+
+    @commands.command(name='sim',
+                      help='Simula ataques para balancear encontros (ex: .sim +7 vs CA 15, 2d6+4, crit 19, 3 ataques, pv 45).')
+    async def sim(self, ctx: commands.Context, *, spec: str):
+        try:
+            profile, trials, seed = parse_attack_spec(spec)
+            async with ctx.typing():
+                result = await asyncio.to_thread(simulate, profile, trials, seed)
+        except ValueError as e:
+            embed = discord.Embed(title="❌ Erro na Simulação", description=str(e), color=discord.Color.orange())
+            await ctx.reply(embed=embed)
+            return
+
+        attack = f"{profile.bonus:+} vs CA {profile.armor_class}, {profile.damage}"
+        if profile.attacks > 1:
+            attack += f", {profile.attacks} ataques"
+        embed = discord.Embed(title="⚔️ Simulação de Combate", description=f"`{attack}`", color=discord.Color.dark_teal())
+        embed.add_field(name="Chance de Acerto", value=f"`{result.hit_chance * 100:.1f}%`", inline=True)
+        embed.add_field(name="Chance de Crítico", value=f"`{result.crit_chance * 100:.1f}%`", inline=True)
+        embed.add_field(name="Dano por Ataque", value=f"`{result.damage_per_attack:.2f}`", inline=True)
+        percentiles = " · ".join(f"P{q}: `{value:g}`" for q, value in result.damage_percentiles.items())
+        embed.add_field(
+            name="Dano por Rodada",
+            value=f"`{result.damage_per_round:.2f}` (± {result.damage_std:.2f})\n{percentiles}",
+            inline=False
+        )
+
+        if profile.hit_points:
+            if result.rounds_to_kill is None:
+                rounds = f"O alvo não cai em {MAX_ROUNDS} rodadas."
+            else:
+                rounds = f"`{result.rounds_to_kill:.2f}` em média\n" + " · ".join(
+                    f"P{q}: `{value:g}`" for q, value in result.rounds_percentiles.items()
+                )
+                if result.unresolved:
+                    rounds += f"\n{result.unresolved * 100:.1f}% não derrubaram o alvo em {MAX_ROUNDS} rodadas."
+            embed.add_field(name=f"Derrubar em 1 Rodada ({profile.hit_points} PV)", value=f"`{result.kill_chance * 100:.1f}%`", inline=True)
+            embed.add_field(name="Rodadas até Derrubar", value=rounds, inline=True)
+
+        footer = f"{result.trials:,} tentativas".replace(",", ".")
+        if seed is not None:
+            footer += f" · seed {seed}"
+        embed.set_footer(text=footer)
+        await ctx.reply(embed=embed)
+
+    @commands.command(name='roll', aliases=['r'],
+                      help='Rola dados usando a notação de RPG (ex: 2d6+1d4+3, 4d6kh3, 1d6!, 1d20r1, 1d20+5>=15, adv).')
+    async def roll(self, ctx: commands.Context, *, expression: str):
+        # Vantagem e desvantagem viram 2d20kh1 e 2d20kl1.
+        expression = self._normalize_expression(expression)
 
-        # Caso geral
         try:
             roll_data = self._parse_and_roll(expression)
 
+            description = f"Resultado para `{expression}`: **{roll_data.total}**"
+            if roll_data.success is not None:
+                description += " — ✅ **Sucesso**" if roll_data.success else " — ❌ **Falha**"
             embed = discord.Embed(
                 title="🎲 Rolagem de Dados",
-                description=f"Resultado para `{expression}`: **{roll_data['total']}**",
+                description=description,
                 color=discord.Color.blue()
             )
 
-            rolls_str = " + ".join(map(str, roll_data['final_rolls']))
-            modifier_str = f" {roll_data['modifier']:+}" if roll_data['modifier'] != 0 else ""
-            calculation = f"Soma: ({rolls_str}){modifier_str} = {roll_data['total']}"
-
-            embed.add_field(name="Rolagens Iniciais", value=f"`{roll_data['initial_rolls']}`", inline=False)
-            if roll_data['dropped_rolls']:
-                embed.add_field(name="Dados Descartados", value=f"`{sorted(roll_data['dropped_rolls'])}`", inline=True)
+            if roll_data.groups:
+                initial_rolls = "\n".join(
+                    f"`{group.expression}`: `{group.rolls}`"
+                    + (f" (rerrolados: `{group.rerolled}`)" if group.rerolled else "")
+                    for group in roll_data.groups
+                )
+                embed.add_field(name="Rolagens Iniciais", value=initial_rolls[:1024], inline=False)
+            if roll_data.dropped:
+                embed.add_field(name="Dados Descartados", value=f"`{sorted(roll_data.dropped)}`"[:1024], inline=True)
 
-            embed.add_field(name="Cálculo", value=calculation, inline=False)
+            calculation = roll_data.calculation
+            if roll_data.success is None:
+                calculation += f" = {roll_data.total}"
+            embed.add_field(name="Cálculo", value=f"Soma: {calculation}"[:1024], inline=False)
             embed.set_footer(text=f"Rolado por {ctx.author.display_name}")
 
             await ctx.reply(embed=embed)
+            if ctx.guild:
+                self._record_roll(ctx, roll_data)
 
         except ValueError as e:
             embed = discord.Embed(
@@ -109,6 +300,146 @@ class DiceCog(commands.Cog, name="Rolador de Dados"):
             )
             await ctx.reply(embed=embed)
 
+    # --- Rolagens [[...]] em mensagens comuns ---
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # Roda para toda mensagem que o bot vê: o caminho sem rolagem precisa ser só uma checagem de substring.
+        expressions = find_inline_rolls(message.content, MAX_INLINE_ROLLS)
+        if not expressions or message.author.bot or message.channel.id not in self.inline_channels:
+            return
+
+        lines = []
+        for expression in expressions:
+            try:
+                roll_data = self._parse_and_roll(expression)
+            except ValueError as e:
+                lines.append(f"⚠️ `{expression}`: {e}")
+                continue
+
+            result = f"🎲 `{expression.strip()}` → **{roll_data.total}**"
+            if roll_data.success is not None:
+                result += " ✅" if roll_data.success else " ❌"
+            if roll_data.groups:
+                result += f" ({roll_data.calculation})"
+            lines.append(result[:300])
+            if message.guild:
+                self._record_roll(message, roll_data)
+
+        await message.reply("\n".join(lines), mention_author=False)
+
+    @commands.command(name='inline',
+                      help='Liga/desliga as rolagens [[1d20+5]] dentro de mensagens comuns neste canal.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    async def inline(self, ctx: commands.Context, mode: str = None):
+        channel_id = ctx.channel.id
+        if mode is None:
+            enabled = channel_id not in self.inline_channels
+        elif mode.lower() in ('on', 'ligar', 'sim'):
+            enabled = True
+        elif mode.lower() in ('off', 'desligar', 'nao', 'não'):
+            enabled = False
+        else:
+            await ctx.reply("Use `.inline on` ou `.inline off`.")
+            return
+
+        def save():
+            with sqlite3.connect(DB_FILE) as conn:
+                if enabled:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO inline_roll_channels (channel_id, guild_id) VALUES (?, ?)",
+                        (str(channel_id), str(ctx.guild.id))
+                    )
+                else:
+                    conn.execute("DELETE FROM inline_roll_channels WHERE channel_id = ?", (str(channel_id),))
+
+        await asyncio.to_thread(save)
+        if enabled:
+            self.inline_channels.add(channel_id)
+            await ctx.reply(f"✅ Rolagens `[[...]]` ativadas neste canal (até {MAX_INLINE_ROLLS} por mensagem).")
+        else:
+            self.inline_channels.discard(channel_id)
+            await ctx.reply("☑️ Rolagens `[[...]]` desativadas neste canal.")
+
+    @commands.command(name='luck', aliases=['sorte'],
+                      help='Analisa a sorte de um jogador nas rolagens recentes (ex: .luck @jogador 20).')
+    @commands.guild_only()
+    async def luck(self, ctx: commands.Context, member: Optional[discord.Member] = None, die: int = 20):
+        member = member or ctx.author
+        buffer = self.history.get(ctx.guild.id)
+        report = luck_report(buffer.faces_for(member.id, die), die) if buffer else None
+        if report is None:
+            available = buffer.dice_for(member.id) if buffer else {}
+            hint = ""
+            if available:
+                hint = " Há rolagens de: " + ", ".join(f"d{size} ({count})" for size, count in sorted(available.items())) + "."
+            await ctx.reply(f"Não há rolagens de d{die} de **{member.display_name}** na memória recente.{hint}")
+            return
+
+        if report.p_value < 0.01:
+            verdict = "🚨 Muito improvável para um dado justo. Alguém está com sorte (ou azar) demais!"
+        elif report.p_value < 0.05:
+            verdict = "🤨 Desvio incomum, mas ainda pode ser acaso."
+        else:
+            verdict = "✅ Dentro do esperado para um dado justo."
+        if not report.reliable:
+            verdict += "\n*Poucas rolagens por face: o teste ainda é pouco confiável.*"
+
+        embed = discord.Embed(title=f"🍀 Sorte de {member.display_name} no d{die}", description=verdict, color=discord.Color.green())
+        embed.add_field(name="Rolagens", value=f"`{report.rolls}`", inline=True)
+        embed.add_field(name="Média", value=f"`{report.mean:.2f}` (esperado `{report.expected_mean:.1f}`)", inline=True)
+        embed.add_field(name="Qui-quadrado", value=f"`χ² = {report.chi_square:.1f}`, `p = {report.p_value:.3f}`", inline=True)
+        if die == 20:
+            embed.add_field(name="20 Naturais", value=f"`{report.counts[-1]}` ({report.max_rate * 100:.1f}%, esperado 5%)", inline=True)
+            embed.add_field(name="1 Naturais", value=f"`{report.counts[0]}` ({report.min_rate * 100:.1f}%, esperado 5%)", inline=True)
+        if die <= 20:
+            cells = [f"{face:>2}:{count:<4}" for face, count in enumerate(report.counts.tolist(), start=1)]
+            table = "\n".join(" ".join(cells[i:i + 5]) for i in range(0, len(cells), 5))
+            embed.add_field(name="Frequência por Face", value=f"```\n{table}\n```", inline=False)
+        embed.set_footer(text=f"Baseado nas últimas {len(buffer)} rolagens do servidor guardadas em memória.")
+        await ctx.reply(embed=embed)
+
+    @commands.command(name='autocrit',
+                      help='Liga/desliga o registro automático de 20 e 1 naturais nas estatísticas da sessão.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def autocrit(self, ctx: commands.Context, mode: str = None):
+        if mode is None:
+            enabled = ctx.guild.id not in self.auto_crits
+        elif mode.lower() in ('on', 'ligar', 'sim'):
+            enabled = True
+        elif mode.lower() in ('off', 'desligar', 'nao', 'não'):
+            enabled = False
+        else:
+            await ctx.reply("Use `.autocrit on` ou `.autocrit off`.")
+            return
+
+        def save():
+            with sqlite3.connect(DB_FILE) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dice_settings (guild_id, auto_crits) VALUES (?, ?)",
+                    (str(ctx.guild.id), int(enabled))
+                )
+
+        await asyncio.to_thread(save)
+        if enabled:
+            self.auto_crits.add(ctx.guild.id)
+            await ctx.reply("✅ 20 e 1 naturais em d20 agora são registrados automaticamente como críticos da sessão.")
+        else:
+            self.auto_crits.discard(ctx.guild.id)
+            await ctx.reply("☑️ Registro automático de críticos desligado.")
+
+    async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.reply("🚫 Você não tem permissão para usar este comando.")
+        elif isinstance(error, commands.MemberNotFound):
+            await ctx.reply(f"Não encontrei o membro `{error.argument}`.")
+        elif isinstance(error, (commands.BadArgument, commands.MissingRequiredArgument)):
+            await ctx.reply(f"Argumento inválido. Veja `.help {ctx.command.qualified_name}`.")
+        else:
+            log.error(f"Erro inesperado no cog de Dados: {error}", exc_info=True)
+            await ctx.reply("🔥 Ocorreu um erro inesperado ao processar o comando.")
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(DiceCog(bot))
\ No newline at end of file
@@ -23,6 +23,12 @@ class HelpCog(commands.Cog, name="Ajuda"):
             )
 
             cogs = {cog_name: cog for cog_name, cog in self.bot.cogs.items() if cog.get_commands()}
+            # As cogs carregam em paralelo; a ordem das categorias segue a lista do bot, não a de carga.
+            order = getattr(self.bot, 'extension_order', [])
+            cogs = dict(sorted(
+                cogs.items(),
+                key=lambda item: order.index(item[1].__module__) if item[1].__module__ in order else len(order)
+            ))
 
             for cog_name, cog in cogs.items():
                 if cog_name == "Ajuda":
@@ -1,6 +1,75 @@
 import discord
-from discord.ext import commands
-from typing import Dict, Any, Optional
+from discord.ext import commands, tasks
+import asyncio
+import bisect
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+from typing import Dict, Any, Callable, Optional
+
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+# --- Persistência dos Rastreadores ---
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")
+DB_FILE = os.path.join(DATA_DIR, 'stats.db')
+JOURNAL_FLUSH_SECONDS = 2  # Alterações feitas dentro desta janela são gravadas juntas.
+TRACKER_TTL_HOURS = 12  # Combates sem nenhuma ação por este tempo são descartados.
+RENDER_DEBOUNCE_SECONDS = 0.4  # Cliques dentro desta janela resultam em uma única edição do painel.
+MAX_GROUP_SIZE = 50  # Maior grupo de criaturas aceito em uma única adição.
+RELOAD_HANDOFF_SECONDS = 30  # Quanto um comando que chegou à instância descarregada espera pela nova.
+
+
+def setup_database():
+    """Garante que as tabelas do rastreador de iniciativa existam."""
+    with sqlite3.connect(DB_FILE) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS initiative_trackers (
+                channel_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS initiative_modifiers (
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                modifier INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        """)
+
+
+class InitiativeError(Exception):
+    """Comando de iniciativa recusado; a mensagem é mostrada ao usuário."""
+
+
+def _initiative_order(participant: Dict[str, Any]) -> tuple[int, int]:
+    """Chave de ordenação: maior iniciativa primeiro; empates vão para o maior modificador."""
+    return -participant["initiative"], -participant.get("modifier", 0)
+
+
+def parse_group_spec(spec: str) -> tuple[str, int, int]:
+    """Interpreta 'Goblin x12 +2' como (nome, quantidade, modificador)."""
+    match = re.fullmatch(r"\s*(?P<name>.+?)(?:\s+x(?P<count>\d+))?(?:\s*(?P<mod>[+-]\s*\d+))?\s*", spec, re.IGNORECASE)
+    if not match:
+        raise ValueError("Formato inválido. Use algo como `Goblin x12 +2`.")
+
+    count = int(match.group("count") or 1)
+    modifier = int(match.group("mod").replace(" ", "")) if match.group("mod") else 0
+    if not 1 <= count <= MAX_GROUP_SIZE:
+        raise ValueError(f"A quantidade deve estar entre 1 e {MAX_GROUP_SIZE}.")
+    return match.group("name").strip(), count, modifier
+
+
+def _require_tracker(tracker: Optional[Dict[str, Any]], message: str):
+    if tracker is None:
+        raise InitiativeError(message)
 
 # --- Modals for User Input ---
 
@@ -25,11 +94,6 @@ class AddCharacterModal(discord.ui.Modal, title="Adicionar Personagem"):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
-        tracker = self.cog._get_tracker(interaction.channel.id)
-        if not tracker:
-            await interaction.response.send_message("O combate neste canal já foi encerrado.", ephemeral=True)
-            return
-
         try:
             initiative = int(self.initiative_input.value)
         except ValueError:
@@ -38,16 +102,64 @@ class AddCharacterModal(discord.ui.Modal, title="Adicionar Personagem"):
 
         character_name = self.name_input.value.strip() if self.name_input.value else interaction.user.display_name
 
-        if any(p['name'].lower() == character_name.lower() for p in tracker['participants']):
-            await interaction.response.send_message(f"O personagem '{character_name}' já está na iniciativa.", ephemeral=True)
-            return
+        def add(cog, tracker):
+            _require_tracker(tracker, "O combate neste canal já foi encerrado.")
+            if any(p['name'].lower() == character_name.lower() for p in tracker['participants']):
+                raise InitiativeError(f"O personagem '{character_name}' já está na iniciativa.")
+            cog._add_participants(tracker, [{"name": character_name, "initiative": initiative}])
 
-        tracker["participants"].append({"name": character_name, "initiative": initiative})
-        tracker["participants"].sort(key=lambda x: x["initiative"], reverse=True)
+        try:
+            await self.cog._submit(interaction.channel.id, add, interaction.message)
+        except InitiativeError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
 
-        await self.cog._update_tracker_message(interaction, tracker)
         await interaction.response.send_message(f"✅ Personagem '{character_name}' adicionado com iniciativa {initiative}.", ephemeral=True, delete_after=5)
 
+class AddGroupModal(discord.ui.Modal, title="Adicionar Grupo de Criaturas"):
+    """Um formulário para adicionar várias criaturas iguais, com iniciativa rolada pelo bot."""
+    def __init__(self, cog_instance):
+        super().__init__()
+        self.cog = cog_instance
+
+    name_input = discord.ui.TextInput(
+        label="Nome da Criatura",
+        placeholder="Ex: Goblin",
+        required=True,
+        style=discord.TextStyle.short
+    )
+
+    count_input = discord.ui.TextInput(
+        label="Quantidade",
+        placeholder=f"De 1 a {MAX_GROUP_SIZE}",
+        default="1",
+        required=True,
+        style=discord.TextStyle.short
+    )
+
+    modifier_input = discord.ui.TextInput(
+        label="Modificador de Iniciativa",
+        placeholder="Ex: +2",
+        default="+0",
+        required=False,
+        style=discord.TextStyle.short
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            name, count, modifier = parse_group_spec(
+                f"{self.name_input.value} x{self.count_input.value.strip()} {self.modifier_input.value or ''}"
+            )
+            added = await self.cog._submit(
+                interaction.channel.id, self.cog._add_group_command(name, count, modifier), interaction.message
+            )
+        except (ValueError, InitiativeError) as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
+        await interaction.response.send_message(f"✅ {self.cog._describe_rolls(added)}", ephemeral=True, delete_after=10)
+
+
 class RemoveCharacterModal(discord.ui.Modal, title="Remover Personagem"):
     """Um formulário para remover um personagem da iniciativa."""
     def __init__(self, cog_instance):
@@ -62,17 +174,15 @@ class RemoveCharacterModal(discord.ui.Modal, title="Remover Personagem"):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
-        tracker = self.cog._get_tracker(interaction.channel.id)
-        if not tracker:
-            await interaction.response.send_message("O combate neste canal já foi encerrado.", ephemeral=True)
-            return
-
         name_to_remove = self.name_input.value.strip()
         name_lower = name_to_remove.lower()
 
-        participant_to_remove = next((p for p in tracker["participants"] if p["name"].lower() == name_lower), None)
+        def remove(cog, tracker):
+            _require_tracker(tracker, "O combate neste canal já foi encerrado.")
+            participant_to_remove = next((p for p in tracker["participants"] if p["name"].lower() == name_lower), None)
+            if not participant_to_remove:
+                raise InitiativeError(f"❌ Personagem '{name_to_remove}' não encontrado.")
 
-        if participant_to_remove:
             current_participant_name = tracker["participants"][tracker["current_turn"]]["name"]
             tracker["participants"].remove(participant_to_remove)
 
@@ -85,10 +195,13 @@ class RemoveCharacterModal(discord.ui.Modal, title="Remover Personagem"):
             if tracker["participants"] and tracker["current_turn"] >= len(tracker["participants"]):
                 tracker["current_turn"] = 0
 
-            await self.cog._update_tracker_message(interaction, tracker)
-            await interaction.response.send_message(f"✅ Personagem '{name_to_remove}' removido.", ephemeral=True, delete_after=5)
-        else:
-            await interaction.response.send_message(f"❌ Personagem '{name_to_remove}' não encontrado.", ephemeral=True)
+        try:
+            await self.cog._submit(interaction.channel.id, remove, interaction.message)
+        except InitiativeError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
+        await interaction.response.send_message(f"✅ Personagem '{name_to_remove}' removido.", ephemeral=True, delete_after=5)
 
 # --- The Main View with Buttons ---
 
@@ -99,29 +212,37 @@ class InitiativeView(discord.ui.View):
         self.cog = cog_instance
 
     async def _handle_turn_change(self, interaction: discord.Interaction, direction: str):
-        tracker = self.cog._get_tracker(interaction.channel.id)
-        if not tracker or not tracker.get("participants"):
-            await interaction.response.send_message("O combate não foi iniciado ou não há participantes.", ephemeral=True)
-            return
-
-        if direction == 'next':
-            tracker["current_turn"] += 1
-            if tracker["current_turn"] >= len(tracker["participants"]):
-                tracker["current_turn"] = 0
-                tracker["round"] += 1
-                await interaction.channel.send(f"**--- Rodada {tracker['round']} ---**", delete_after=10)
-        elif direction == 'prev':
-            tracker["current_turn"] -= 1
-            if tracker["current_turn"] < 0:
-                if tracker["round"] > 1:
-                    tracker["current_turn"] = len(tracker["participants"]) - 1
-                    tracker["round"] -= 1
-                else:
+        def change_turn(cog, tracker) -> Optional[int]:
+            """Avança ou volta o turno; retorna o número da nova rodada quando ela começa."""
+            if not tracker or not tracker.get("participants"):
+                raise InitiativeError("O combate não foi iniciado ou não há participantes.")
+
+            if direction == 'next':
+                tracker["current_turn"] += 1
+                if tracker["current_turn"] >= len(tracker["participants"]):
                     tracker["current_turn"] = 0
+                    tracker["round"] += 1
+                    return tracker["round"]
+            elif direction == 'prev':
+                tracker["current_turn"] -= 1
+                if tracker["current_turn"] < 0:
+                    if tracker["round"] > 1:
+                        tracker["current_turn"] = len(tracker["participants"]) - 1
+                        tracker["round"] -= 1
+                    else:
+                        tracker["current_turn"] = 0
+            return None
 
-        await self.cog._update_tracker_message(interaction, tracker)
-        if not interaction.response.is_done():
-            await interaction.response.defer()
+        try:
+            new_round = await self.cog._submit(interaction.channel.id, change_turn, interaction.message)
+        except InitiativeError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
+        # Confirma o clique na hora; o painel é atualizado depois, pelo agendador de renderização.
+        await interaction.response.defer()
+        if new_round is not None:
+            await interaction.channel.send(f"**--- Rodada {new_round} ---**", delete_after=10)
 
     @discord.ui.button(label="Próximo", style=discord.ButtonStyle.green, custom_id="init_next")
     async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -141,9 +262,17 @@ class InitiativeView(discord.ui.View):
 
     @discord.ui.button(label="Encerrar", style=discord.ButtonStyle.danger, custom_id="init_end")
     async def end_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        tracker = self.cog._get_tracker(interaction.channel.id)
-        if not tracker:
-            await interaction.response.send_message("O combate já foi encerrado.", ephemeral=True)
+        channel_id = interaction.channel.id
+
+        def end(cog, tracker):
+            _require_tracker(tracker, "O combate já foi encerrado.")
+            cog._remove_tracker(channel_id)
+            return tracker
+
+        try:
+            tracker = await self.cog._submit(channel_id, end)
+        except InitiativeError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
             return
 
         for item in self.children:
@@ -155,7 +284,35 @@ class InitiativeView(discord.ui.View):
         embed.set_footer(text="Use .init para um novo combate.")
 
         await interaction.response.edit_message(embed=embed, view=self)
-        del self.cog.trackers[interaction.channel.id]
+
+    @discord.ui.button(label="Grupo", style=discord.ButtonStyle.primary, custom_id="init_add_group", row=1)
+    async def add_group_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(AddGroupModal(self.cog))
+
+    @discord.ui.button(label="Jogadores", style=discord.ButtonStyle.primary, custom_id="init_add_players", row=1)
+    async def add_players_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Sem checagem prévia do tracker: depois de um .reload, self.cog é a instância antiga. O
+        # _require_tracker abaixo roda na instância que aplica o comando.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        rolls = await self.cog._roll_players(interaction.guild)
+
+        def add_players(cog, tracker):
+            _require_tracker(tracker, "O combate não foi iniciado.")
+            # A checagem de nomes repetidos acontece aqui, já na vez deste comando.
+            taken = {p["name"].lower() for p in tracker["participants"]}
+            added = [roll for roll in rolls if roll["name"].lower() not in taken]
+            if not added:
+                raise InitiativeError("Nenhum jogador novo para adicionar.")
+            cog._add_participants(tracker, added)
+            return added
+
+        try:
+            added = await self.cog._submit(interaction.channel.id, add_players, interaction.message)
+        except InitiativeError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
+            return
+
+        await interaction.followup.send(f"✅ {self.cog._describe_rolls(added)}", ephemeral=True)
 
 # --- The Cog itself ---
 
@@ -163,19 +320,320 @@ class InitiativeCog(commands.Cog, name="Rastreador de Iniciativa"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.trackers: Dict[int, Dict[str, Any]] = {}
+        # Canais com alterações ainda não gravadas (write-behind) e canais cujo combate foi encerrado.
+        self._dirty: set[int] = set()
+        self._removed: set[int] = set()
+        # Estado do agendador de renderização: última mensagem do painel e tarefas de edição por canal.
+        self._panel_messages: Dict[int, discord.Message] = {}
+        self._render_pending: set[int] = set()
+        self._render_tasks: Dict[int, asyncio.Task] = {}
+        # Atores por canal: cada canal tem sua fila de comandos e, enquanto houver trabalho, um worker.
+        self._command_queues: Dict[int, asyncio.Queue] = {}
+        self._actor_tasks: Dict[int, asyncio.Task] = {}
+        self._unloaded = False
         self.bot.add_view(InitiativeView(self))
 
+    async def cog_load(self):
+        await asyncio.to_thread(setup_database)
+        restored = await asyncio.to_thread(self._restore_trackers)
+        self.trackers.update(restored)
+        if restored:
+            log.info(f"{len(restored)} combate(s) de iniciativa restaurado(s) do banco.")
+        self.flush_journal.start()
+        self.evict_idle_trackers.start()
+        metrics.QUEUE_DEPTH.set_function(
+            lambda: sum(queue.qsize() for queue in self._command_queues.values()), queue="initiative_commands"
+        )
+
+    async def cog_unload(self):
+        metrics.QUEUE_DEPTH.remove(queue="initiative_commands")
+        self.flush_journal.cancel()
+        self.evict_idle_trackers.cancel()
+        # Os comandos já enfileirados são aplicados aqui, antes da gravação final, e respondem
+        # normalmente. Os que chegarem depois vão para a nova instância (ver _submit).
+        while self._actor_tasks:
+            await asyncio.gather(*self._actor_tasks.values(), return_exceptions=True)
+        self._unloaded = True
+        # As edições de painel pendentes são refeitas pela nova instância (restore_state).
+        for channel_id, task in self._render_tasks.items():
+            self._render_pending.add(channel_id)
+            task.cancel()
+        await self._flush()
+
+    def snapshot_state(self) -> dict:
+        """
+        Estado passado para a nova instância no .reload. Os combates em si voltam pelo journal
+        (gravado no cog_unload e lido no cog_load); aqui vão as mensagens dos painéis e os painéis
+        à espera de edição. São as próprias estruturas, e não cópias, porque o cog_unload ainda as
+        altera depois do snapshot.
+        """
+        return {"panel_messages": self._panel_messages, "render_pending": self._render_pending}
+
+    def restore_state(self, state: dict):
+        self._panel_messages.update(state["panel_messages"])
+        for channel_id in state["render_pending"]:
+            self._request_render(channel_id)
+
     def _get_tracker(self, channel_id: int) -> Optional[Dict[str, Any]]:
         return self.trackers.get(channel_id)
 
-    async def _update_tracker_message(self, interaction: discord.Interaction, tracker: Dict[str, Any]):
-        embed = self._generate_embed(tracker)
+    def _mark_dirty(self, channel_id: int):
+        """Registra que o combate do canal mudou; a gravação acontece no próximo flush do journal."""
+        tracker = self.trackers.get(channel_id)
+        if tracker is not None:
+            tracker["last_activity"] = time.time()
+            self._dirty.add(channel_id)
+
+    # --- Ator por canal ---
+    def _submit(self, channel_id: int, command: Callable[["InitiativeCog", Optional[Dict[str, Any]]], Any],
+                message: discord.Message = None) -> asyncio.Future:
+        """
+        Enfileira um comando para o combate do canal e devolve um future com o resultado.
+        O comando recebe a cog que o executa e o tracker (ou None) e roda sem 'await', então nunca
+        é intercalado com outro comando do mesmo canal. InitiativeError recusa o comando sem
+        alterar nada. Depois de um .reload, a cog que executa é a nova: o comando deve usar a cog
+        recebida, e não a instância em que foi criado.
+        """
+        if self._unloaded:
+            return asyncio.ensure_future(self._submit_to_successor(channel_id, command, message))
+        if message is not None:
+            self._panel_messages[channel_id] = message
+
+        future = asyncio.get_running_loop().create_future()
+        self._command_queues.setdefault(channel_id, asyncio.Queue()).put_nowait((command, future))
+        task = self._actor_tasks.get(channel_id)
+        if task is None or task.done():
+            self._actor_tasks[channel_id] = asyncio.create_task(self._actor_worker(channel_id))
+        return future
+
+    async def _submit_to_successor(self, channel_id: int, command: Callable[["InitiativeCog", Optional[Dict[str, Any]]], Any],
+                                   message: Optional[discord.Message]) -> Any:
+        """
+        Um comando que começou nesta instância e só chegou ao _submit depois do .reload é aplicado
+        pela instância nova, que já tem o estado do journal. Espera a nova carregar, se preciso.
+        """
+        deadline = time.monotonic() + RELOAD_HANDOFF_SECONDS
+        while True:
+            successor = self.bot.get_cog(self.qualified_name)
+            if successor is not None and successor is not self:
+                return await successor._submit(channel_id, command, message)
+            if time.monotonic() > deadline:
+                raise InitiativeError("O rastreador de iniciativa está sendo recarregado. Tente de novo em instantes.")
+            await asyncio.sleep(0.1)
+
+    async def _actor_worker(self, channel_id: int):
+        """
+        Aplica os comandos do canal em ordem de chegada. Tudo o que chegou desde o último lote
+        é aplicado de uma vez, seguido de uma única gravação e um único pedido de renderização.
+        Sai quando a fila esvazia, para que canais sem atividade não tenham tarefas vivas.
+        """
+        queue = self._command_queues[channel_id]
+        try:
+            while not queue.empty():
+                applied = False
+                while not queue.empty():
+                    command, future = queue.get_nowait()
+                    if future.cancelled():
+                        continue
+                    try:
+                        future.set_result(command(self, self.trackers.get(channel_id)))
+                        applied = True
+                    except InitiativeError as e:
+                        future.set_exception(e)
+                    except Exception as e:
+                        log.error(f"Erro ao aplicar comando de iniciativa no canal {channel_id}: {e}", exc_info=True)
+                        future.set_exception(e)
+
+                if applied and channel_id in self.trackers:
+                    self._mark_dirty(channel_id)
+                    self._request_render(channel_id)
+                # Cede o loop: quem aguardava os futures responde, e novos cliques formam o próximo lote.
+                await asyncio.sleep(0)
+        finally:
+            self._actor_tasks.pop(channel_id, None)
+            if queue.empty():
+                self._command_queues.pop(channel_id, None)
+
+    # --- Participantes e rolagens ---
+    def _add_participants(self, tracker: Dict[str, Any], participants: list[Dict[str, Any]]):
+        """
+        Insere os participantes na ordem de iniciativa com busca binária, sem reordenar a lista
+        inteira. Empates ficam na ordem de chegada, e o turno atual continua no mesmo participante.
+        """
+        current = tracker["participants"][tracker["current_turn"]] if tracker["participants"] else None
+        for participant in participants:
+            bisect.insort_right(tracker["participants"], participant, key=_initiative_order)
+        if current is not None:
+            tracker["current_turn"] = next(i for i, p in enumerate(tracker["participants"]) if p is current)
+
+    def _roll_group(self, tracker: Dict[str, Any], name: str, count: int, modifier: int) -> list[Dict[str, Any]]:
+        """Rola 1d20 + modificador para cada criatura, numerando os nomes sem colidir com os existentes."""
+        taken = {p["name"].lower() for p in tracker["participants"]}
+        if count == 1 and name.lower() not in taken:
+            names = [name]
+        else:
+            names, index = [], 1
+            while len(names) < count:
+                candidate = f"{name} {index}"
+                if candidate.lower() not in taken:
+                    names.append(candidate)
+                index += 1
+
+        return [
+            {"name": creature, "initiative": random.randint(1, 20) + modifier, "modifier": modifier}
+            for creature in names
+        ]
+
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="initiative_modifiers")
+    def _get_modifiers(self, guild_id: int, user_ids: list[int]) -> Dict[int, int]:
+        with sqlite3.connect(DB_FILE) as conn:
+            placeholders = ",".join("?" * len(user_ids))
+            rows = conn.execute(
+                f"SELECT user_id, modifier FROM initiative_modifiers WHERE guild_id = ? AND user_id IN ({placeholders})",
+                (str(guild_id), *map(str, user_ids))
+            ).fetchall()
+        return {int(user_id): modifier for user_id, modifier in rows}
+
+    async def _roll_players(self, guild: discord.Guild) -> list[Dict[str, Any]]:
+        """Rola a iniciativa de todos os jogadores do servidor, com seus modificadores salvos."""
+        session_cog = self.bot.get_cog("Estatísticas de Sessão")
+        players = await session_cog.get_players(guild) if session_cog else []
+        if not players:
+            return []
+
+        modifiers = await asyncio.to_thread(self._get_modifiers, guild.id, [player.id for player in players])
+        return [
+            {
+                "name": player.display_name,
+                "initiative": random.randint(1, 20) + modifiers.get(player.id, 0),
+                "modifier": modifiers.get(player.id, 0),
+            }
+            for player in players
+        ]
+
+    @staticmethod
+    def _add_group_command(name: str, count: int, modifier: int) -> Callable[["InitiativeCog", Optional[Dict[str, Any]]], list]:
+        def add_group(cog, tracker):
+            _require_tracker(tracker, "Não há combate em andamento neste canal. Use `.init` para começar.")
+            added = cog._roll_group(tracker, name, count, modifier)
+            cog._add_participants(tracker, added)
+            return added
+        return add_group
+
+    def _describe_rolls(self, participants: list[Dict[str, Any]]) -> str:
+        rolls = ", ".join(f"{p['name']} ({p['initiative']})" for p in participants)
+        return f"{len(participants)} participante(s) adicionado(s): {rolls}"[:1900]
+
+    def _remove_tracker(self, channel_id: int):
+        self.trackers.pop(channel_id, None)
+        self._panel_messages.pop(channel_id, None)
+        self._dirty.discard(channel_id)
+        self._removed.add(channel_id)
+
+    # --- Journal em SQLite (write-behind) ---
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="initiative_restore")
+    def _restore_trackers(self) -> Dict[int, Dict[str, Any]]:
+        """Carrega do journal os combates que ainda não expiraram."""
+        trackers = {}
+        cutoff = time.time() - TRACKER_TTL_HOURS * 3600
         try:
-            await interaction.message.edit(embed=embed)
-        except discord.NotFound:
-            await interaction.channel.send("A mensagem de iniciativa original foi perdida. Por favor, inicie um novo combate com `.init`.", ephemeral=True)
-        except discord.Forbidden:
-            await interaction.channel.send("Não tenho permissão para editar a mensagem de iniciativa.", ephemeral=True)
+            with sqlite3.connect(DB_FILE) as conn:
+                conn.execute("DELETE FROM initiative_trackers WHERE updated_at < ?", (cutoff,))
+                for channel_id, state in conn.execute("SELECT channel_id, state FROM initiative_trackers"):
+                    trackers[int(channel_id)] = json.loads(state)
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            log.error(f"Falha ao restaurar os combates de iniciativa: {e}", exc_info=True)
+        return trackers
+
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="initiative_journal_flush")
+    def _write_journal(self, upserts: list[tuple[str, str, float]], removals: list[tuple[str]]):
+        with sqlite3.connect(DB_FILE) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO initiative_trackers (channel_id, state, updated_at) VALUES (?, ?, ?)",
+                upserts
+            )
+            conn.executemany("DELETE FROM initiative_trackers WHERE channel_id = ?", removals)
+
+    async def _flush(self):
+        """Grava de uma vez, em uma transação, o estado mais recente de cada canal alterado."""
+        if not self._dirty and not self._removed:
+            return
+
+        # O estado é serializado aqui, no loop, para que a thread grave uma foto consistente.
+        upserts = [
+            (str(channel_id), json.dumps(self.trackers[channel_id]), self.trackers[channel_id]["last_activity"])
+            for channel_id in self._dirty if channel_id in self.trackers
+        ]
+        removals = [(str(channel_id),) for channel_id in self._removed]
+        self._dirty.clear()
+        self._removed.clear()
+
+        try:
+            await asyncio.to_thread(self._write_journal, upserts, removals)
+        except sqlite3.Error as e:
+            log.error(f"Falha ao gravar o journal de iniciativa: {e}", exc_info=True)
+            # Devolve os canais para a fila; a próxima rodada tenta de novo com o estado mais novo.
+            self._dirty.update(int(channel_id) for channel_id, _, _ in upserts)
+            self._removed.update(int(channel_id) for channel_id, in removals)
+
+    @tasks.loop(seconds=JOURNAL_FLUSH_SECONDS)
+    async def flush_journal(self):
+        await self._flush()
+
+    @tasks.loop(minutes=10)
+    async def evict_idle_trackers(self):
+        cutoff = time.time() - TRACKER_TTL_HOURS * 3600
+        idle = [channel_id for channel_id, tracker in self.trackers.items() if tracker.get("last_activity", 0) < cutoff]
+        for channel_id in idle:
+            self._remove_tracker(channel_id)
+        if idle:
+            log.info(f"{len(idle)} combate(s) de iniciativa ocioso(s) descartado(s).")
+
+    # --- Renderização do painel (debounce por canal) ---
+    def _request_render(self, channel_id: int, message: discord.Message = None):
+        """
+        Agenda a atualização do painel do canal. Pedidos feitos enquanto uma atualização
+        está pendente são agrupados: só o estado mais recente é enviado, em uma única edição.
+        Sem 'message', usa o painel lembrado para o canal ou o 'message_id' salvo no combate.
+        """
+        if message is None and channel_id not in self._panel_messages:
+            tracker = self.trackers.get(channel_id)
+            channel = self.bot.get_channel(channel_id)
+            if not tracker or not tracker.get("message_id") or channel is None:
+                return
+            message = channel.get_partial_message(tracker["message_id"])
+        if message is not None:
+            self._panel_messages[channel_id] = message
+        self._render_pending.add(channel_id)
+        task = self._render_tasks.get(channel_id)
+        if task is None or task.done():
+            self._render_tasks[channel_id] = asyncio.create_task(self._render_worker(channel_id))
+
+    async def _render_worker(self, channel_id: int):
+        try:
+            while channel_id in self._render_pending:
+                await asyncio.sleep(RENDER_DEBOUNCE_SECONDS)
+                self._render_pending.discard(channel_id)
+
+                tracker = self.trackers.get(channel_id)
+                message = self._panel_messages.get(channel_id)
+                if tracker is None or message is None:
+                    return
+
+                try:
+                    # Num 429, o cliente HTTP do discord.py espera o retry-after antes de devolver;
+                    # os cliques que chegam nesse meio-tempo viram uma única edição na volta do laço.
+                    await message.edit(embed=self._generate_embed(tracker))
+                except discord.NotFound:
+                    await message.channel.send("A mensagem de iniciativa original foi perdida. Por favor, inicie um novo combate com `.init`.")
+                    return
+                except discord.Forbidden:
+                    await message.channel.send("Não tenho permissão para editar a mensagem de iniciativa.")
+                    return
+        except discord.HTTPException as e:
+            log.error(f"Falha ao atualizar o painel de iniciativa do canal {channel_id}: {e}")
+        finally:
+            self._render_tasks.pop(channel_id, None)
 
     def _generate_embed(self, tracker: Dict[str, Any]) -> discord.Embed:
         title = f"⚔️ Ordem de Iniciativa - Rodada {tracker['round']}"
@@ -194,32 +652,74 @@ class InitiativeCog(commands.Cog, name="Rastreador de Iniciativa"):
         embed.set_footer(text="Use os botões abaixo para gerenciar o combate.")
         return embed
 
-    @commands.command(name='init', help="Inicia um novo painel de iniciativa no canal.")
+    @commands.group(name='init', invoke_without_command=True,
+                    help="Inicia um novo painel de iniciativa no canal. Use `.init add Goblin x12 +2` para grupos.")
     @commands.guild_only()
     async def init(self, ctx: commands.Context):
-        if self._get_tracker(ctx.channel.id):
-            await ctx.reply("Já existe um combate em andamento neste canal. Use o botão `Encerrar` no painel de iniciativa.", delete_after=10)
+        def start(cog, tracker):
+            if tracker is not None:
+                raise InitiativeError("Já existe um combate em andamento neste canal. Use o botão `Encerrar` no painel de iniciativa.")
+            tracker = {
+                "participants": [],
+                "current_turn": 0,
+                "round": 1,
+                "last_activity": time.time()
+            }
+            cog.trackers[ctx.channel.id] = tracker
+            return tracker
+
+        try:
+            tracker = await self._submit(ctx.channel.id, start)
+        except InitiativeError as e:
+            await ctx.reply(str(e), delete_after=10)
             try:
                 await ctx.message.delete()
             except discord.HTTPException:
                 pass
             return
 
-        tracker = {
-            "participants": [],
-            "current_turn": 0,
-            "round": 1
-        }
-
         view = InitiativeView(self)
         embed = self._generate_embed(tracker)
-        await ctx.send(embed=embed, view=view)
-        self.trackers[ctx.channel.id] = tracker
+        message = await ctx.send(embed=embed, view=view)
+
+        def attach_panel(cog, tracker):
+            _require_tracker(tracker, "O combate foi encerrado antes de o painel ser enviado.")
+            tracker["message_id"] = message.id
+
+        try:
+            await self._submit(ctx.channel.id, attach_panel, message)
+        except InitiativeError:
+            pass
 
         try:
             await ctx.message.delete()
         except discord.HTTPException:
             pass
 
+    @init.command(name='add', help="Adiciona um grupo com iniciativa rolada. Ex: .init add Goblin x12 +2")
+    @commands.guild_only()
+    async def init_add(self, ctx: commands.Context, *, spec: str):
+        try:
+            name, count, modifier = parse_group_spec(spec)
+            added = await self._submit(ctx.channel.id, self._add_group_command(name, count, modifier))
+        except (ValueError, InitiativeError) as e:
+            await ctx.reply(str(e), delete_after=10)
+            return
+
+        await ctx.reply(f"🎲 {self._describe_rolls(added)}", delete_after=15)
+
+    @init.command(name='mod', help="Salva seu modificador de iniciativa para o botão 'Jogadores'. Ex: .init mod +3")
+    @commands.guild_only()
+    async def init_mod(self, ctx: commands.Context, modifier: int):
+        def save():
+            with sqlite3.connect(DB_FILE) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO initiative_modifiers (guild_id, user_id, modifier) VALUES (?, ?, ?)",
+                    (str(ctx.guild.id), str(ctx.author.id), modifier)
+                )
+
+        await asyncio.to_thread(save)
+        await ctx.reply(f"✅ Modificador de iniciativa de **{ctx.author.display_name}** salvo como `{modifier:+}`.")
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(InitiativeCog(bot))
\ No newline at end of file
@@ -1,56 +1,77 @@
 # src/cogs/logging_cog.py
 
 import logging
-import os  # Importe o módulo 'os'
+import os
+import time
+from datetime import datetime, timezone
 from discord.ext import commands
 
+from src.utils import metrics
+from src.utils.query_log import NdjsonWriter
+
 # Obtém um logger específico para este módulo.
 log = logging.getLogger(__name__)
 
-# --- ALTERAÇÃO AQUI: Define o diretório e o caminho do arquivo ---
 LOGS_DIR = "src/logs"
-RPG_LOG_FILE = os.path.join(LOGS_DIR, "rpg_questions_log.txt")
+RPG_LOG_FILE = os.path.join(LOGS_DIR, "rpg_queries.ndjson")
+LOGGED_COG = "Ferramentas de RPG"  # Nome do RpgCog; só os comandos dele são registrados.
 
 
 class LoggingCog(commands.Cog):
     """
-    Um cog dedicado a registrar os inputs de comandos específicos,
-    especialmente os direcionados ao Mestre de RPG.
+    Um cog dedicado a registrar as consultas feitas ao Mestre de RPG em NDJSON estruturado,
+    para analisar depois quais perguntas são lentas ou repetidas.
     """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.log_file = RPG_LOG_FILE
+        self.writer = NdjsonWriter(RPG_LOG_FILE)
+
+    async def cog_load(self):
+        self.writer.start()
+        metrics.QUEUE_DEPTH.set_function(lambda: self.writer.pending, queue="rpg_query_log")
+        log.info(f"LoggingCog carregado e registrando comandos do RPG em '{RPG_LOG_FILE}'.")
 
-        # --- ADIÇÃO AQUI: Garante que o diretório de logs exista ---
-        if not os.path.exists(LOGS_DIR):
-            os.makedirs(LOGS_DIR)
-            log.info(f"Diretório de logs '{LOGS_DIR}' criado.")
+    async def cog_unload(self):
+        metrics.QUEUE_DEPTH.remove(queue="rpg_query_log")
+        await self.writer.close()
 
-        log.info("LoggingCog carregado e pronto para registrar comandos do RPG.")
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context):
+        """Marca o início do comando para medir a latência total."""
+        ctx.log_started_at = time.perf_counter()
 
     @commands.Cog.listener()
     async def on_command_completion(self, ctx: commands.Context):
         """
         Este evento é acionado sempre que um comando é executado com sucesso.
+        Monta o registro no loop (barato) e deixa a gravação para o escritor em segundo plano.
         """
-        if not ctx.cog or ctx.cog.qualified_name != "Mestre de RPG":
+        if not ctx.cog or ctx.cog.qualified_name != LOGGED_COG:
             return
 
-        timestamp = ctx.message.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        user = f"{ctx.author.name}#{ctx.author.discriminator} ({ctx.author.id})"
-        guild = ctx.guild.name if ctx.guild else "Direct Message"
-        full_command = ctx.message.content
-
-        log_entry = f"[{timestamp}] | Guild: {guild} | User: {user} | Input: {full_command}\n"
+        query = getattr(ctx, "rpg_query", {})
+        stages = dict(query.get("stages_ms", {}))
+        started = getattr(ctx, "log_started_at", None)
+        if started is not None:
+            stages["total"] = round((time.perf_counter() - started) * 1000, 1)
 
-        try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-        except IOError as e:
-            log.error(f"Falha ao escrever no arquivo de log '{self.log_file}': {e}")
+        self.writer.submit({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "guild_id": ctx.guild.id if ctx.guild else None,
+            "guild": ctx.guild.name if ctx.guild else None,
+            "user_id": ctx.author.id,
+            "user": ctx.author.name,
+            "command": ctx.command.qualified_name,
+            "question": next((v for v in ctx.kwargs.values() if isinstance(v, str)), None),
+            "keyword": query.get("keyword"),
+            "passages": query.get("passages"),
+            "cache_hit": query.get("cache_hit"),
+            "outcome": query.get("outcome"),
+            "stages_ms": stages,
+        })
 
 
 async def setup(bot: commands.Bot):
     """Função que o discord.py chama para carregar a cog."""
-    await bot.add_cog(LoggingCog(bot))
\ No newline at end of file
+    await bot.add_cog(LoggingCog(bot))
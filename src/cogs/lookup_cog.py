@@ -5,11 +5,17 @@ from discord.ext import commands
 import requests
 import asyncio
 import logging
+import time
+from collections import OrderedDict
+
+from src.utils import metrics, tracing
 
 log = logging.getLogger(__name__)
 
 # URL base da API de D&D 5e
 DND_API_BASE_URL = "https://www.dnd5eapi.co/api/"
+API_CACHE_SIZE = 256  # Respostas da API mantidas em memória; o conteúdo do SRD praticamente não muda.
+FALLBACK_TIMEOUT = 45  # Segundos esperando a ficha gerada pela IA.
 
 
 def fetch_from_api_sync(endpoint: str, formatted_query: str):
@@ -18,12 +24,16 @@ def fetch_from_api_sync(endpoint: str, formatted_query: str):
     Retorna os dados em JSON ou None se não for encontrado (404).
     """
     url = f"{DND_API_BASE_URL}{endpoint}/{formatted_query}"
+    start = time.perf_counter()
+    outcome = "error"
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
+        outcome = "ok"
         return response.json()
     except requests.exceptions.HTTPError as http_err:
         if http_err.response.status_code == 404:
+            outcome = "not_found"
             log.warning(f"API D&D retornou 404 para: {formatted_query}")
             return None  # Retorna None explicitamente em caso de 404
         else:
@@ -32,6 +42,8 @@ def fetch_from_api_sync(endpoint: str, formatted_query: str):
     except requests.exceptions.RequestException as req_err:
         log.error(f"Erro de conexão com a API D&D: {req_err}", exc_info=True)
         raise
+    finally:
+        metrics.DND_API_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, outcome=outcome)
 
 
 class LookupCog(commands.Cog, name="Consulta Rápida"):
@@ -43,9 +55,26 @@ class LookupCog(commands.Cog, name="Consulta Rápida"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # Usaremos apenas o modelo Pro para o fallback
-        self.gemini_pro_model = self.bot.gemini_pro_model
+        self.fallback_model = self.bot.ai_pro_model
+        # Com AI_JOB_QUEUE, o fallback é gerado por um worker de IA (src/ai_worker.py).
+        self.ai_jobs = getattr(self.bot, "ai_jobs", None)
+        # Cache LRU de (endpoint, consulta) -> resposta da API (None para 404).
+        self._api_cache: OrderedDict[tuple[str, str], dict | None] = OrderedDict()
         log.info("LookupCog (Modo API com Fallback Gemini) inicializado.")
 
+    def snapshot_state(self) -> dict:
+        """Estado em memória passado para a nova instância no .reload."""
+        return {"api_cache": self._api_cache}
+
+    def restore_state(self, state: dict):
+        self._api_cache = state["api_cache"]
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        tracing.begin_command(ctx)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        tracing.end_command(ctx)
+
     def _format_api_spell_embed(self, data: dict) -> discord.Embed:
         """Cria um embed formatado para uma magia a partir dos dados da API."""
         embed = discord.Embed(
@@ -116,13 +145,32 @@ class LookupCog(commands.Cog, name="Consulta Rápida"):
         """
         Função de fallback que pergunta ao Gemini Pro sobre o tópico quando a API falha.
         """
-        if not self.gemini_pro_model:
+        if not self.fallback_model and not self.ai_jobs:
             await ctx.reply("A API de D&D não encontrou o item e meu assistente de IA (Gemini) está indisponível.")
             return
 
         log.info(f"API D&D falhou. Usando Gemini Pro como fallback para a query: '{query}'")
         await ctx.send(f"Não encontrei `{query}` na base de dados principal. Consultando o Mestre Tatu (IA)...", delete_after=10)
 
+        try:
+            if self.ai_jobs:
+                result = await self.ai_jobs.submit("lookup", {"query": query, "category": category}, timeout=FALLBACK_TIMEOUT)
+                response_text = result["text"]
+            else:
+                response_text = await self.describe_with_ai(query, category)
+            embed = discord.Embed(
+                title=f"📜 Consulta do Mestre Tatu sobre: {query.title()}",
+                description=response_text,
+                color=discord.Color.purple()  # Cor diferente para indicar que é da IA
+            )
+            embed.set_footer(text="Fonte: Mestre Tatu (IA Gemini Pro)")
+            await ctx.reply(embed=embed)
+        except Exception as e:
+            log.error(f"Erro no fallback do Gemini para '{query}'.", exc_info=True)
+            await ctx.reply("O Mestre Tatu tentou ajudar, mas se perdeu nos planos astrais. Tente novamente.")
+
+    async def describe_with_ai(self, query: str, category: str) -> str:
+        """Pede ao modelo a ficha de um termo que a API não conhece; roda aqui ou em um worker de IA."""
         # --- PROMPT ATUALIZADO para incluir armas ---
         prompt = f"""
         Você é o Mestre Tatu, uma enciclopédia viva de Dungeons & Dragons 5ª Edição.
@@ -138,21 +186,25 @@ class LookupCog(commands.Cog, name="Consulta Rápida"):
         7.  Se o termo "{query}" não for encontrado ou não pertencer a D&D 5e, sua única resposta deve ser: "Não encontrei informações sobre '{query}' nos meus tomos."
         """
 
-        try:
-            response = await asyncio.wait_for(
-                self.gemini_pro_model.generate_content_async(prompt),
-                timeout=45
-            )
-            embed = discord.Embed(
-                title=f"📜 Consulta do Mestre Tatu sobre: {query.title()}",
-                description=response.text,
-                color=discord.Color.purple()  # Cor diferente para indicar que é da IA
-            )
-            embed.set_footer(text="Fonte: Mestre Tatu (IA Gemini Pro)")
-            await ctx.reply(embed=embed)
-        except Exception as e:
-            log.error(f"Erro no fallback do Gemini para '{query}'.", exc_info=True)
-            await ctx.reply("O Mestre Tatu tentou ajudar, mas se perdeu nos planos astrais. Tente novamente.")
+        return await metrics.track_gemini(self.fallback_model, asyncio.wait_for(
+            self.fallback_model.generate(prompt),
+            timeout=FALLBACK_TIMEOUT
+        ))
+
+    async def _fetch_cached(self, endpoint: str, api_query: str) -> dict | None:
+        """Busca na API passando pelo cache em memória; erros de conexão não são guardados."""
+        key = (endpoint, api_query)
+        if key in self._api_cache:
+            self._api_cache.move_to_end(key)
+            metrics.CACHE_LOOKUPS.inc(cache="dnd_api", result="hit")
+            return self._api_cache[key]
+        metrics.CACHE_LOOKUPS.inc(cache="dnd_api", result="miss")
+
+        data = await asyncio.to_thread(fetch_from_api_sync, endpoint, api_query)
+        self._api_cache[key] = data
+        if len(self._api_cache) > API_CACHE_SIZE:
+            self._api_cache.popitem(last=False)
+        return data
 
     async def _perform_lookup(self, ctx: commands.Context, endpoint: str, category: str, query: str, embed_formatter):
         """
@@ -163,18 +215,23 @@ class LookupCog(commands.Cog, name="Consulta Rápida"):
             api_query = query.lower().strip().replace(" ", "-")
 
             # Passo 1: Tentar a API de D&D
-            data = await asyncio.to_thread(fetch_from_api_sync, endpoint, api_query)
+            cached = (endpoint, api_query) in self._api_cache
+            with tracing.span("lookup.api", endpoint=endpoint, cache_hit=cached) as span:
+                data = await self._fetch_cached(endpoint, api_query)
+                span.set(found=bool(data))
 
             if data:
                 # Sucesso! Formata e envia a resposta da API.
                 log.info(f"Encontrado '{query}' na API D&D.")
-                embed = embed_formatter(data)
-                await ctx.reply(embed=embed)
+                with tracing.span("lookup.send"):
+                    embed = embed_formatter(data)
+                    await ctx.reply(embed=embed)
                 return
 
             # Passo 2: A API falhou (404), usar o Gemini como fallback.
             # Usamos a query original do usuário, não a formatada.
-            await self._ask_gemini_fallback(ctx, query, category)
+            with tracing.span("lookup.gemini_fallback", model=metrics.model_label(self.fallback_model)):
+                await self._ask_gemini_fallback(ctx, query, category)
 
     @commands.command(name='spell', aliases=['magia'],
                       help='Busca uma magia. Tenta a API, depois a IA. Ex: .spell fireball')
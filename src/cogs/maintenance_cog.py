@@ -0,0 +1,389 @@
+# src/cogs/maintenance_cog.py
+
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import gc
+import glob
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+# --- Caminhos e Constantes de Manutenção ---
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")
+DB_FILE = os.path.join(DATA_DIR, 'stats.db')
+BACKUP_DIR = os.path.join(DATA_DIR, 'backups')
+BACKUP_KEEP = 7  # Quantos snapshots manter; os mais antigos são apagados na rotação.
+BACKUP_INTERVAL_HOURS = 24
+BACKUP_PAGES_PER_STEP = 256  # Páginas copiadas por passo da API de backup antes de liberar o banco.
+BACKUP_STEP_SLEEP = 0.01  # Pausa entre passos do backup, para que escritores não fiquem esperando.
+
+MAINTENANCE_INTERVAL_MINUTES = 30
+IDLE_THRESHOLD_SECONDS = 600  # A manutenção só roda se o bot estiver ocioso há pelo menos este tempo.
+VACUUM_PAGES_PER_STEP = 64
+VACUUM_MAX_STEPS = 32
+TOMBSTONE_RETENTION_DAYS = 30  # Lotes do .dellog mais antigos que isso não podem mais ser desfeitos.
+RULES_TARGETS = ("regras", "rules")  # Alvos do .reload que só remontam as regras do .rpg.
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="backup")
+def backup_database(db_path: str, backup_dir: str, keep: int) -> tuple[str, int]:
+    """
+    Gera um snapshot consistente do banco usando a API de backup online do SQLite.
+    A cópia é feita em passos pequenos, liberando o banco entre eles, e só é
+    renomeada para o nome final quando está completa. Retorna (caminho, tamanho em bytes).
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    target = os.path.join(backup_dir, f"stats-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.db")
+    partial = f"{target}.part"
+
+    source = sqlite3.connect(db_path)
+    destination = sqlite3.connect(partial)
+    try:
+        source.backup(
+            destination,
+            pages=BACKUP_PAGES_PER_STEP,
+            progress=lambda status, remaining, total: time.sleep(BACKUP_STEP_SLEEP)
+        )
+    finally:
+        destination.close()
+        source.close()
+
+    os.replace(partial, target)
+    _rotate_backups(backup_dir, keep)
+    return target, os.path.getsize(target)
+
+
+def _rotate_backups(backup_dir: str, keep: int):
+    """Apaga os snapshots mais antigos, mantendo apenas os 'keep' mais recentes."""
+    backups = sorted(glob.glob(os.path.join(backup_dir, "stats-*.db")))
+    for old_backup in backups[:-keep]:
+        try:
+            os.remove(old_backup)
+            log.info(f"Backup antigo removido: {old_backup}")
+        except OSError as e:
+            log.warning(f"Não foi possível remover o backup antigo '{old_backup}': {e}")
+
+
+def _latest_backup_age(backup_dir: str) -> float | None:
+    """Idade em segundos do snapshot mais recente, ou None se não houver nenhum."""
+    backups = glob.glob(os.path.join(backup_dir, "stats-*.db"))
+    if not backups:
+        return None
+    return time.time() - max(os.path.getmtime(b) for b in backups)
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="maintenance")
+def run_maintenance(db_path: str) -> dict:
+    """
+    Executa uma rodada de manutenção: expira lotes antigos da lixeira, atualiza as
+    estatísticas do planejador e devolve páginas livres ao sistema com vacuum incremental
+    em passos pequenos. Bancos criados antes do auto_vacuum incremental pulam essa última
+    etapa até o dono rodar '.backup vacuum'. Retorna um resumo do que foi feito.
+    """
+    summary = {"purged": 0, "freed_pages": 0, "needs_vacuum": False}
+    conn = sqlite3.connect(db_path)
+    try:
+        cutoff = (datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)).isoformat()
+        with conn:
+            summary["purged"] = conn.execute("""
+                DELETE FROM session_stats_deleted
+                WHERE batch_id IN (SELECT id FROM deletion_batches WHERE created_at < ?)
+            """, (cutoff,)).rowcount
+            conn.execute("DELETE FROM deletion_batches WHERE created_at < ?", (cutoff,))
+
+        # Na primeira rodada não há estatísticas; depois disso o 'optimize' decide quando reanalisar.
+        has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        conn.execute("PRAGMA optimize" if has_stats else "ANALYZE")
+
+        # Sem auto_vacuum=INCREMENTAL, o incremental_vacuum não faz nada. A conversão exige um VACUUM
+        # completo, que reescreve o arquivo bloqueando as escritas, então fica a cargo do dono.
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            summary["needs_vacuum"] = True
+            return summary
+
+        for _ in range(VACUUM_MAX_STEPS):
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free_pages:
+                break
+            # executescript executa o pragma até o fim; com execute() o SQLite libera só uma página por passo.
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP});")
+            summary["freed_pages"] += free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(BACKUP_STEP_SLEEP)
+    finally:
+        conn.close()
+    return summary
+
+
+@metrics.SQLITE_QUERY_LATENCY.time(operation="vacuum")
+def convert_to_incremental_vacuum(db_path: str) -> tuple[int, int]:
+    """
+    Ativa o auto_vacuum incremental em um banco antigo com um VACUUM completo. O arquivo inteiro
+    é reescrito e as escritas esperam até o fim. Retorna (tamanho antes, tamanho depois) em bytes.
+    """
+    size_before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return size_before, os.path.getsize(db_path)
+
+
+def current_rss_bytes() -> int | None:
+    """Memória residente atual do processo (Linux, via /proc); None onde não há /proc."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MaintenanceCog(commands.Cog, name="Manutenção"):
+    """Backups automáticos e manutenção periódica do banco de estatísticas."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.last_activity = time.monotonic()
+        self._backup_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.scheduled_backup.start()
+        self.idle_maintenance.start()
+
+    async def cog_unload(self):
+        self.scheduled_backup.cancel()
+        self.idle_maintenance.cancel()
+
+    def snapshot_state(self) -> dict:
+        """Estado em memória passado para a nova instância no .reload."""
+        return {"last_activity": self.last_activity}
+
+    def restore_state(self, state: dict):
+        self.last_activity = state["last_activity"]
+
+    # --- Rastreamento de atividade (para detectar ociosidade) ---
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context):
+        self.last_activity = time.monotonic()
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        self.last_activity = time.monotonic()
+
+    async def _backup(self) -> tuple[str, int, float]:
+        """Roda um backup em uma thread, serializado para nunca haver dois ao mesmo tempo."""
+        async with self._backup_lock:
+            start = time.perf_counter()
+            path, size = await asyncio.to_thread(backup_database, DB_FILE, BACKUP_DIR, BACKUP_KEEP)
+            return path, size, time.perf_counter() - start
+
+    # --- Tarefas em segundo plano ---
+    @tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+    async def scheduled_backup(self):
+        # Evita um snapshot a cada reinício: só faz backup se o último já estiver vencido.
+        age = await asyncio.to_thread(_latest_backup_age, BACKUP_DIR)
+        if age is not None and age < BACKUP_INTERVAL_HOURS * 3600:
+            return
+        try:
+            path, size, duration = await self._backup()
+            log.info(f"Backup automático concluído: '{path}' ({size / 1024:.1f} KiB em {duration:.2f}s).")
+        except (sqlite3.Error, OSError) as e:
+            log.error(f"Falha no backup automático do banco: {e}", exc_info=True)
+
+    @tasks.loop(minutes=MAINTENANCE_INTERVAL_MINUTES)
+    async def idle_maintenance(self):
+        if time.monotonic() - self.last_activity < IDLE_THRESHOLD_SECONDS:
+            return
+        try:
+            start = time.perf_counter()
+            summary = await asyncio.to_thread(run_maintenance, DB_FILE)
+            log.info(
+                f"Manutenção do banco concluída em {time.perf_counter() - start:.2f}s: "
+                f"{summary['purged']} entradas expiradas da lixeira, {summary['freed_pages']} páginas liberadas."
+            )
+            if summary["needs_vacuum"]:
+                log.warning(
+                    "O banco não usa auto_vacuum incremental, então o espaço livre não é devolvido. "
+                    "Rode '.backup vacuum' uma vez, num horário sem sessões, para convertê-lo."
+                )
+        except sqlite3.Error as e:
+            log.error(f"Falha na manutenção do banco: {e}", exc_info=True)
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
+
+    @idle_maintenance.before_loop
+    async def before_idle_maintenance(self):
+        await self.bot.wait_until_ready()
+
+    # --- Comandos ---
+    @commands.command(name='backup', help='Gera um backup do banco agora. Use "vacuum" para também compactá-lo. (Dono do bot)')
+    @commands.is_owner()
+    async def backup_now(self, ctx: commands.Context, mode: str = None):
+        """
+        Gera um snapshot imediato do banco e informa a duração e o tamanho.
+        Ex: .backup vacuum  (depois do backup, converte o banco para auto_vacuum incremental com
+        um VACUUM completo; as escritas ficam bloqueadas enquanto ele roda)
+        """
+        vacuum = mode is not None and mode.lower() == "vacuum"
+        if mode is not None and not vacuum:
+            await ctx.send("🤔 Opção inválida. Use `.backup` ou `.backup vacuum`.")
+            return
+
+        sizes = None
+        async with ctx.typing():
+            try:
+                path, size, duration = await self._backup()
+            except (sqlite3.Error, OSError) as e:
+                log.error(f"Falha no backup manual do banco: {e}", exc_info=True)
+                await ctx.send(f"🔥 Falha ao gerar o backup: {e}")
+                return
+            if vacuum:
+                try:
+                    # O mesmo lock do backup: um VACUUM nunca roda junto com um snapshot.
+                    async with self._backup_lock:
+                        vacuum_start = time.perf_counter()
+                        sizes = await asyncio.to_thread(convert_to_incremental_vacuum, DB_FILE)
+                        vacuum_duration = time.perf_counter() - vacuum_start
+                except (sqlite3.Error, OSError) as e:
+                    log.error(f"Falha no VACUUM do banco: {e}", exc_info=True)
+                    await ctx.send(f"🔥 O backup foi gerado, mas o VACUUM falhou: {e}")
+                    return
+
+        embed = discord.Embed(title="💾 Backup Concluído", color=discord.Color.green())
+        embed.add_field(name="Arquivo", value=f"`{os.path.basename(path)}`", inline=False)
+        embed.add_field(name="Tamanho", value=f"`{size / 1024:.1f} KiB`", inline=True)
+        embed.add_field(name="Duração", value=f"`{duration:.2f}s`", inline=True)
+        if sizes:
+            before, after = sizes
+            embed.add_field(
+                name="Vacuum",
+                value=f"`{before / 1024:.1f} → {after / 1024:.1f} KiB em {vacuum_duration:.2f}s`",
+                inline=False
+            )
+        embed.set_footer(text=f"Mantendo os {BACKUP_KEEP} backups mais recentes em {BACKUP_DIR}.")
+        await ctx.send(embed=embed)
+
+    # --- Recarga a quente ---
+    def _resolve_extensions(self, targets: tuple[str, ...]) -> list[str]:
+        """Converte 'rpg', 'rpg_cog' ou 'src.cogs.rpg_cog' no nome da extensão carregada."""
+        loaded = list(self.bot.extensions)
+        resolved = []
+        for target in targets:
+            name = target.lower().removeprefix("src.cogs.")
+            matches = [ext for ext in loaded if ext.rsplit(".", 1)[-1] in (name, f"{name}_cog")]
+            if not matches:
+                raise commands.BadArgument(f"Nenhuma cog carregada corresponde a `{target}`.")
+            resolved.extend(ext for ext in matches if ext not in resolved)
+        return resolved
+
+    async def _reload_extension(self, extension: str):
+        """
+        Recarrega uma extensão passando o estado em memória das cogs dela para as novas instâncias
+        (snapshot_state/restore_state). Comandos já em andamento terminam na instância antiga; a de
+        iniciativa aplica sua fila antes de descarregar e repassa à nova o que chegar depois.
+        Se o novo código falhar ao carregar, o discord.py volta à versão anterior, e o estado é
+        devolvido do mesmo jeito antes de a falha subir.
+        """
+        states = {
+            name: cog.snapshot_state() for name, cog in self.bot.cogs.items()
+            if cog.__module__ == extension and hasattr(cog, "snapshot_state")
+        }
+        try:
+            await self.bot.reload_extension(extension)
+        finally:
+            for name, state in states.items():
+                cog = self.bot.get_cog(name)
+                if cog is not None and hasattr(cog, "restore_state"):
+                    cog.restore_state(state)
+
+    @commands.command(name='reload', help='Recarrega cogs e regras sem reiniciar. Ex: .reload, .reload regras, .reload rpg dice (Dono do bot)')
+    @commands.is_owner()
+    async def reload(self, ctx: commands.Context, *targets: str):
+        """
+        Sem alvos, recarrega todas as cogs e remonta as regras do .rpg. 'regras' remonta só as
+        regras; nomes de cogs recarregam só essas. Informa a duração e a variação de memória.
+        """
+        cog_targets = tuple(target for target in targets if target.lower() not in RULES_TARGETS)
+        if cog_targets:
+            extensions = self._resolve_extensions(cog_targets)
+        else:
+            extensions = [] if targets else list(self.bot.extensions)
+        rebuild_rules = not targets or len(cog_targets) < len(targets)
+
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        reloaded, failed, rules_summary = [], [], None
+        async with ctx.typing():
+            # Esta própria cog por último, para que a anterior termine o comando sem surpresas.
+            for extension in sorted(extensions, key=lambda ext: ext == __name__):
+                short_name = extension.rsplit(".", 1)[-1]
+                try:
+                    await self._reload_extension(extension)
+                    reloaded.append(short_name)
+                except commands.ExtensionError as e:
+                    log.error(f"Falha ao recarregar '{extension}'; a versão anterior continua ativa.", exc_info=True)
+                    failed.append(f"{short_name}: {type(e.__cause__ or e).__name__}")
+
+            if rebuild_rules:
+                rpg_cog = self.bot.get_cog("Ferramentas de RPG")
+                if rpg_cog is None:
+                    rules_summary = "Cog de RPG não carregada."
+                else:
+                    rules_start = time.perf_counter()
+                    try:
+                        before, after = await rpg_cog.reload_rules()
+                        rules_summary = (f"{before / 1_000_000:.1f} → {after / 1_000_000:.1f} M caracteres "
+                                         f"em {time.perf_counter() - rules_start:.2f}s")
+                    except RuntimeError as e:
+                        rules_summary = str(e)
+                        failed.append("regras")
+
+        duration = time.perf_counter() - start
+        # Solta as instâncias e módulos antigos antes de medir, para o delta refletir o que ficou.
+        gc.collect()
+        rss_after = current_rss_bytes()
+        log.info(f".reload concluído em {duration:.2f}s: {len(reloaded)} cog(s), falhas: {failed or 'nenhuma'}.")
+
+        embed = discord.Embed(
+            title="♻️ Recarga Concluída" if not failed else "♻️ Recarga com Falhas",
+            color=discord.Color.green() if not failed else discord.Color.orange()
+        )
+        if extensions:
+            embed.add_field(name="Cogs", value=", ".join(f"`{name}`" for name in reloaded) or "Nenhuma", inline=False)
+        if failed:
+            embed.add_field(name="Falhas (versão anterior mantida)", value="\n".join(failed)[:1024], inline=False)
+        if rules_summary:
+            embed.add_field(name="Regras", value=rules_summary, inline=False)
+        embed.add_field(name="Duração", value=f"`{duration:.2f}s`", inline=True)
+        if rss_before is not None and rss_after is not None:
+            delta = (rss_after - rss_before) / 1024 / 1024
+            embed.add_field(
+                name="Memória",
+                value=f"`{rss_before / 1024 / 1024:.0f} → {rss_after / 1024 / 1024:.0f} MB ({delta:+.1f} MB)`",
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
+    async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError):
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("🚫 Você não tem permissão para usar este comando.")
+        elif isinstance(error, commands.BadArgument):
+            await ctx.send(f"⚠️ {error}")
+        else:
+            log.error(f"Erro inesperado no cog de Manutenção: {error}", exc_info=True)
+            await ctx.send("🔥 Ocorreu um erro inesperado ao processar o comando.")
+
+
+async def setup(bot: commands.Bot):
+    """Função que o discord.py chama para carregar a cog."""
+    await bot.add_cog(MaintenanceCog(bot))
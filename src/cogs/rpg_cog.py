@@ -4,12 +4,16 @@ import logging
 import os
 import asyncio
 import re
+from collections import OrderedDict
+
+from src.utils import metrics, tracing
 
 # --- Constantes ---
 log = logging.getLogger(__name__)
 RULES_FILE = 'src/rpg_books/compiled_rules.txt'
 CONTEXT_WINDOW_SIZE = 400  # Caracteres antes e depois da palavra-chave para formar o contexto.
 QUERY_TIMEOUT = 120  # Segundos de timeout para a resposta da IA.
+KEYWORD_CACHE_SIZE = 256  # Perguntas repetidas reaproveitam o termo extraído sem chamar a IA de novo.
 
 
 class RpgCog(commands.Cog, name="Ferramentas de RPG"):
@@ -17,10 +21,12 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Acessa os modelos de IA inicializados no main.py
-        self.rules_model = bot.gemini_pro_model
-        self.keyword_model = bot.gemini_flash_model
-        self.npc_model = bot.gemini_pro_model # Assuming you want to use the pro model for NPCs as well
+        # Acessa os modelos de IA inicializados no main.py (src/utils/ai_backend.py)
+        self.rules_model = bot.ai_pro_model
+        self.keyword_model = bot.ai_flash_model
+        self.npc_model = bot.ai_pro_model
+        # Com AI_JOB_QUEUE, a recuperação e a geração rodam nos workers (src/ai_worker.py).
+        self.ai_jobs = getattr(bot, "ai_jobs", None)
         self.system_prompt_rules = (
             "Você é o Mestre Tatu, um mestre de Dungeons & Dragons 5e amigável e experiente. "
             "Sua tarefa é responder perguntas sobre as regras do jogo de forma clara, concisa e amigável para iniciantes. "
@@ -30,6 +36,14 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
         self.rules_text = None
         # + Cria um Lock para evitar race conditions no carregamento do arquivo de regras.
         self._rules_lock = asyncio.Lock()
+        # Cache LRU de pergunta normalizada -> termo extraído pela IA.
+        self._keyword_cache: OrderedDict[str, str] = OrderedDict()
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        tracing.begin_command(ctx)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        tracing.end_command(ctx)
 
     async def _ensure_rules_loaded(self):
         """
@@ -46,7 +60,30 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
             #   enquanto esta esperava pelo lock.
             if self.rules_text is None:
                 log.info("Primeira chamada do comando .rpg, carregando regras na memória...")
-                self.rules_text = self._load_rules()
+                self.rules_text = await asyncio.to_thread(self._load_rules)
+
+    async def reload_rules(self) -> tuple[int, int]:
+        """
+        Relê o arquivo de regras em uma thread e só então troca a versão em uso, com uma única
+        atribuição: até lá, o .rpg continua buscando na versão anterior. Se a leitura falhar, a
+        versão anterior é mantida. Retorna (caracteres antes, caracteres depois).
+        """
+        async with self._rules_lock:
+            new_text = await asyncio.to_thread(self._load_rules)
+            old_chars = len(self.rules_text or "")
+            if not new_text and old_chars:
+                raise RuntimeError(f"O arquivo de regras '{RULES_FILE}' não pôde ser lido; a versão anterior foi mantida.")
+            self.rules_text = new_text
+        log.info(f"Regras recarregadas: {old_chars} -> {len(new_text)} caracteres.")
+        return old_chars, len(new_text)
+
+    def snapshot_state(self) -> dict:
+        """Estado em memória passado para a nova instância no .reload."""
+        return {"rules_text": self.rules_text, "keyword_cache": self._keyword_cache}
+
+    def restore_state(self, state: dict):
+        self.rules_text = state["rules_text"]
+        self._keyword_cache = state["keyword_cache"]
 
     def _load_rules(self) -> str | None:
         """
@@ -65,11 +102,22 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
             log.error(f"Falha ao carregar o arquivo de regras '{RULES_FILE}': {e}", exc_info=True)
             return ""
 
-    async def _extract_keyword(self, question: str) -> str:
-        """Usa um modelo de IA mais rápido para extrair o termo principal da pergunta."""
+    async def _extract_keyword(self, question: str) -> tuple[str, bool]:
+        """
+        Usa um modelo de IA mais rápido para extrair o termo principal da pergunta.
+        Retorna (termo, veio_do_cache).
+        """
         if not self.keyword_model:
             # Fallback para uma extração simples se a IA não estiver disponível.
-            return question.strip().split()[0]
+            return question.strip().split()[0], False
+
+        cache_key = " ".join(question.lower().split())
+        cached = self._keyword_cache.get(cache_key)
+        if cached is not None:
+            self._keyword_cache.move_to_end(cache_key)
+            metrics.CACHE_LOOKUPS.inc(cache="rpg_keyword", result="hit")
+            return cached, True
+        metrics.CACHE_LOOKUPS.inc(cache="rpg_keyword", result="miss")
 
         prompt = (
             f"Extraia o termo ou conceito principal de D&D 5e da seguinte pergunta. "
@@ -77,29 +125,36 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
             f"Pergunta: \"{question}\"\n\nTermo principal:"
         )
         try:
-            response = await self.keyword_model.generate_content_async(prompt)
-            return response.text.strip().title()
+            response_text = await metrics.track_gemini(self.keyword_model, self.keyword_model.generate(prompt))
+            term = response_text.strip().title()
         except Exception:
             log.error("Falha ao extrair palavra-chave com a IA. Usando fallback.", exc_info=True)
-            # Em caso de erro, usa a primeira palavra como fallback.
-            return question.strip().split()[0]
+            # Em caso de erro, usa a primeira palavra como fallback (sem guardar no cache).
+            return question.strip().split()[0], False
+
+        self._keyword_cache[cache_key] = term
+        if len(self._keyword_cache) > KEYWORD_CACHE_SIZE:
+            self._keyword_cache.popitem(last=False)
+        return term, False
 
     def _search_rules_for_term(self, term: str) -> list[str]:
         """
         Busca o termo no texto de regras carregado em memória.
         Retorna uma lista de trechos de texto contendo o termo.
         """
-        if not self.rules_text:
+        # Uma única leitura do atributo: um .reload que troque as regras não afeta esta busca.
+        rules_text = self.rules_text
+        if not rules_text:
             return []
 
         excerpts = []
         # re.finditer é um iterador eficiente que não carrega todas as correspondências na memória de uma vez.
         try:
             # Limita o número de trechos para evitar sobrecarregar o prompt da IA
-            for match in re.finditer(re.escape(term), self.rules_text, re.IGNORECASE):
+            for match in re.finditer(re.escape(term), rules_text, re.IGNORECASE):
                 start_index = max(0, match.start() - CONTEXT_WINDOW_SIZE)
-                end_index = min(len(self.rules_text), match.end() + CONTEXT_WINDOW_SIZE)
-                snippet = self.rules_text[start_index:end_index]
+                end_index = min(len(rules_text), match.end() + CONTEXT_WINDOW_SIZE)
+                snippet = rules_text[start_index:end_index]
                 excerpts.append(f"...{snippet}...")
                 if len(excerpts) >= 3: # Limita a 3 trechos para performance
                     break
@@ -108,87 +163,121 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
             log.error(f"Erro ao buscar o termo '{term}' nas regras: {e}")
             return []
 
+    async def answer_question(self, question: str, query: dict) -> tuple[str, str]:
+        """
+        Recuperação e geração do .rpg, sem nada do Discord, para rodar aqui ou em um worker de IA.
+        Preenche 'query' (termo, trechos, etapas) conforme avança e retorna (resposta, fonte).
+        """
+        stages = query["stages_ms"]
+        # Garante que as regras estão carregadas de forma segura
+        with tracing.span("rpg.load_rules") as span:
+            await self._ensure_rules_loaded()
+        stages["load_rules"] = span.duration_ms
+
+        # 1. Extrair o termo chave da pergunta
+        with tracing.span("rpg.extract_keyword") as span:
+            search_term, query["cache_hit"] = await self._extract_keyword(question)
+            span.set(keyword=search_term, cache_hit=query["cache_hit"])
+        stages["keyword"] = span.duration_ms
+        query["keyword"] = search_term
+        log.info(f"Termo de busca extraído para a pergunta sobre '{question}': '{search_term}'")
+
+        # 2. Buscar o termo no arquivo de regras pré-carregado
+        with tracing.span("rpg.search_rules", corpus_chars=len(self.rules_text or "")) as span:
+            context_excerpts = self._search_rules_for_term(search_term)
+            span.set(passages=len(context_excerpts))
+        stages["search"] = span.duration_ms
+        query["passages"] = len(context_excerpts)
+        source_text = "Conhecimento Geral da IA"
+
+        prompt_to_send = [self.system_prompt_rules]
+
+        if context_excerpts:
+            # 3. Se encontrou contexto, monta o prompt para RAG
+            log.info(f"Contexto encontrado para '{search_term}'. Usando modo RAG.")
+            full_context = "\n\n---\n\n".join(context_excerpts)
+            rag_prompt = (
+                f"Pergunta do Usuário: \"{question}\"\n\n"
+                f"Trechos Relevantes das Regras (sobre '{search_term}'):\n{full_context}\n\n"
+                "Sua Resposta (baseada nos trechos acima):"
+            )
+            prompt_to_send.append(rag_prompt)
+            source_text = "Livros de Regras (Busca Local)"
+        else:
+            # 4. Se não encontrou, usa o conhecimento geral da IA
+            log.info(f"Nenhum contexto encontrado para '{search_term}'. Usando modo de conhecimento geral.")
+            prompt_to_send.append(question)
+
+        # 5. Enviar para o Gemini e obter a resposta
+        with tracing.span("rpg.generate", model=metrics.model_label(self.rules_model)) as span:
+            response_text = await metrics.track_gemini(self.rules_model, asyncio.wait_for(
+                self.rules_model.generate(prompt_to_send),
+                timeout=QUERY_TIMEOUT
+            ))
+            span.set(response_chars=len(response_text))
+        stages["generate"] = span.duration_ms
+        return response_text, source_text
+
     @commands.command(name='rpg', help='Tira uma dúvida de D&D com o Mestre Tatu. Uso: .rpg sua pergunta')
     async def rpg_question(self, ctx: commands.Context, *, question: str = None):
         """Recebe uma pergunta de RPG, busca o termo chave no arquivo de regras e gera uma resposta contextualizada."""
-        if not self.rules_model:
+        # Detalhes da consulta lidos pelo LoggingCog ao fim do comando.
+        query = {"keyword": None, "passages": 0, "cache_hit": False, "outcome": None, "stages_ms": {}}
+        ctx.rpg_query = query
+        stages = query["stages_ms"]
+
+        if not self.rules_model and not self.ai_jobs:
+            query["outcome"] = "no_model"
             await ctx.reply("Desculpe, minha conexão com os planos astrais (API do Gemini) não está funcionando.")
             return
 
         if not question:
+            query["outcome"] = "empty"
             await ctx.reply("Por favor, faça uma pergunta após o comando. Ex: `.rpg Vantagem`")
             return
 
         async with ctx.typing():
-            # Garante que as regras estão carregadas de forma segura
-            await self._ensure_rules_loaded()
             try:
-                # 1. Extrair o termo chave da pergunta
-                search_term = await self._extract_keyword(question)
-                log.info(f"Termo de busca extraído para a pergunta sobre '{question}': '{search_term}'")
-
-                # 2. Buscar o termo no arquivo de regras pré-carregado
-                context_excerpts = self._search_rules_for_term(search_term)
-                source_text = "Conhecimento Geral da IA"
-
-                prompt_to_send = [self.system_prompt_rules]
-
-                if context_excerpts:
-                    # 3. Se encontrou contexto, monta o prompt para RAG
-                    log.info(f"Contexto encontrado para '{search_term}'. Usando modo RAG.")
-                    full_context = "\n\n---\n\n".join(context_excerpts)
-                    rag_prompt = (
-                        f"Pergunta do Usuário: \"{question}\"\n\n"
-                        f"Trechos Relevantes das Regras (sobre '{search_term}'):\n{full_context}\n\n"
-                        "Sua Resposta (baseada nos trechos acima):"
-                    )
-                    prompt_to_send.append(rag_prompt)
-                    source_text = "Livros de Regras (Busca Local)"
+                if self.ai_jobs:
+                    with tracing.span("rpg.job") as span:
+                        result = await self.ai_jobs.submit("rpg", {"question": question}, timeout=QUERY_TIMEOUT)
+                    # Etapas medidas no worker, mais o tempo total visto daqui (fila incluída).
+                    query.update({key: value for key, value in result["query"].items() if key != "stages_ms"})
+                    stages.update(result["query"]["stages_ms"], job=span.duration_ms)
+                    response_text, source_text = result["text"], result["source"]
                 else:
-                    # 4. Se não encontrou, usa o conhecimento geral da IA
-                    log.info(f"Nenhum contexto encontrado para '{search_term}'. Usando modo de conhecimento geral.")
-                    prompt_to_send.append(question)
-
-                # 5. Enviar para o Gemini e obter a resposta
-                response = await asyncio.wait_for(
-                    self.rules_model.generate_content_async(prompt_to_send),
-                    timeout=QUERY_TIMEOUT
-                )
-                response_text = response.text
+                    response_text, source_text = await self.answer_question(question, query)
                 embed_title = f"Mestre Tatu responde sobre: {question.title()}"
 
                 # 6. Enviar a resposta, dividindo em múltiplos embeds se for longa
-                if len(response_text) <= 4096:
-                    embed = discord.Embed(title=embed_title, description=response_text, color=discord.Color.blue())
-                    embed.set_footer(text=f"Fonte: {source_text}")
-                    await ctx.reply(embed=embed)
-                else:
-                    chunks = [response_text[i:i + 4000] for i in range(0, len(response_text), 4000)]
-                    for i, chunk in enumerate(chunks):
-                        part_title = f"{embed_title} (Parte {i + 1}/{len(chunks)})"
-                        embed = discord.Embed(title=part_title, description=chunk, color=discord.Color.blue())
+                with tracing.span("rpg.send") as span:
+                    if len(response_text) <= 4096:
+                        embed = discord.Embed(title=embed_title, description=response_text, color=discord.Color.blue())
                         embed.set_footer(text=f"Fonte: {source_text}")
-                        await ctx.send(embed=embed)
+                        await ctx.reply(embed=embed)
+                        span.set(messages=1)
+                    else:
+                        chunks = [response_text[i:i + 4000] for i in range(0, len(response_text), 4000)]
+                        for i, chunk in enumerate(chunks):
+                            part_title = f"{embed_title} (Parte {i + 1}/{len(chunks)})"
+                            embed = discord.Embed(title=part_title, description=chunk, color=discord.Color.blue())
+                            embed.set_footer(text=f"Fonte: {source_text}")
+                            await ctx.send(embed=embed)
+                        span.set(messages=len(chunks))
+                stages["reply"] = span.duration_ms
+                query["outcome"] = "ok"
 
             except asyncio.TimeoutError:
+                query["outcome"] = "timeout"
                 await ctx.reply(f"A resposta demorou mais de {QUERY_TIMEOUT} segundos e foi cancelada. Tente novamente.")
             except Exception as e:
+                query["outcome"] = "error"
                 log.error(f"Falha ao processar a pergunta de RPG '{question}'.", exc_info=True)
                 await ctx.reply("Desculpe, o Mestre Tatu parece estar meditando e não pôde responder agora.")
 
-    @commands.command(name='npc', help='Gera um NPC com base em uma descrição. Ex: .npc taverneiro anão')
-    async def generate_npc(self, ctx: commands.Context, *, description: str = None):
-        if not self.npc_model:
-            await ctx.reply("Desculpe, minha forja de almas (API do Gemini) parece estar fria no momento.")
-            return
-
-        if not description:
-            await ctx.reply(
-                "Por favor, me dê uma breve descrição do NPC que você quer criar. Ex: `.npc guarda de cidade elfo`")
-            return
-
-        async with ctx.typing():
-            prompt = f"""
+    async def forge_npc(self, description: str, stages: dict) -> str:
+        """Gera o texto bruto do NPC (ainda não validado), para rodar aqui ou em um worker de IA."""
+        prompt = f"""
             Você é o Arquiteto de Almas, uma entidade cósmica que forja personagens para mundos de fantasia.
             Sua tarefa é criar um personagem memorável e inspirador com base na descrição fornecida. A resposta deve ser rica em detalhes, mas concisa.
 
@@ -210,14 +299,42 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
 
             **Descrição para Forjar:** "{description}"
             """
+        with tracing.span("npc.generate", model=metrics.model_label(self.npc_model)) as span:
+            response_text = await metrics.track_gemini(self.npc_model, asyncio.wait_for(
+                self.npc_model.generate(prompt),
+                timeout=QUERY_TIMEOUT
+            ))
+        stages["generate"] = span.duration_ms
+        return response_text
+
+    @commands.command(name='npc', help='Gera um NPC com base em uma descrição. Ex: .npc taverneiro anão')
+    async def generate_npc(self, ctx: commands.Context, *, description: str = None):
+        query = {"outcome": None, "stages_ms": {}}
+        ctx.rpg_query = query
+
+        if not self.npc_model and not self.ai_jobs:
+            query["outcome"] = "no_model"
+            await ctx.reply("Desculpe, minha forja de almas (API do Gemini) parece estar fria no momento.")
+            return
+
+        if not description:
+            query["outcome"] = "empty"
+            await ctx.reply(
+                "Por favor, me dê uma breve descrição do NPC que você quer criar. Ex: `.npc guarda de cidade elfo`")
+            return
+
+        async with ctx.typing():
             try:
                 log.info(f"[{ctx.guild.id}] Comando 'npc' recebido com a descrição: '{description}'")
-                response = await asyncio.wait_for(
-                    self.npc_model.generate_content_async(prompt),
-                    timeout=QUERY_TIMEOUT
-                )
+                if self.ai_jobs:
+                    with tracing.span("npc.job") as span:
+                        result = await self.ai_jobs.submit("npc", {"description": description}, timeout=QUERY_TIMEOUT)
+                    response_text = result["text"]
+                    query["stages_ms"].update(result["stages_ms"], job=span.duration_ms)
+                else:
+                    response_text = await self.forge_npc(description, query["stages_ms"])
 
-                parts = response.text.strip().split('\n')
+                parts = response_text.strip().split('\n')
                 if len(parts) < 5:
                     raise ValueError("A resposta da IA não seguiu o formato esperado de 5 partes.")
 
@@ -239,11 +356,14 @@ class RpgCog(commands.Cog, name="Ferramentas de RPG"):
                 embed.set_footer(text=f"Conceito: {description}")
 
                 await ctx.reply(embed=embed)
+                query["outcome"] = "ok"
 
             except asyncio.TimeoutError:
+                query["outcome"] = "timeout"
                 log.warning(f"[{ctx.guild.id}] A geração do NPC excedeu o timeout de {QUERY_TIMEOUT}s.")
                 await ctx.reply("A inspiração cósmica demorou demais... Tente forjar outra alma.")
             except Exception as e:
+                query["outcome"] = "error"
                 log.error(f"[{ctx.guild.id}] Falha ao gerar o NPC.", exc_info=True)
                 await ctx.reply(
                     "Ocorreu um erro na forja de almas. A descrição pode ter sido muito complexa ou um erro inesperado aconteceu.")
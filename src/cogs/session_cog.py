@@ -1,27 +1,40 @@
 import discord
 from discord.ext import commands
+import abc
 import asyncio
 import logging
 import os
 import sqlite3
 import json
+import bisect
+import time
 from datetime import datetime
 from collections import defaultdict
 
+from src.utils import metrics, tracing
+
 log = logging.getLogger(__name__)
 
 # --- Constantes de Configuração ---
 PLAYER_ROLE_NAME = "Aventureiro"
+SELECT_PAGE_SIZE = 25  # Limite de opções de um discord.ui.Select.
+PLAYER_CACHE_TTL_SECONDS = 300  # Jogadores buscados via API (servidor sem cache de membros) valem por este tempo.
 
 # --- Caminhos para Arquivos Persistentes ---
-DB_FILE = '/data/stats.db'
-SESSION_DATA_FILE = '/data/session_data.json'
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")  # Volume persistente; pode ser trocado para testes e benchmarks.
+DB_FILE = os.path.join(DATA_DIR, 'stats.db')
+SESSION_DATA_FILE = os.path.join(DATA_DIR, 'session_data.json')
 
 def setup_database():
     """Garante que as tabelas do banco de dados existam no caminho correto."""
     try:
         with sqlite3.connect(DB_FILE) as conn:
             cursor = conn.cursor()
+            # Precisa vir antes da primeira tabela: num banco novo, o vacuum incremental da manutenção
+            # funciona sem a conversão por VACUUM completo. Em um banco existente não tem efeito.
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # WAL permite que leituras e backups online aconteçam sem bloquear as escritas.
+            cursor.execute("PRAGMA journal_mode=WAL")
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS session_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,32 +57,99 @@ def setup_database():
                     UNIQUE(guild_id, session_number)
                 )
             ''')
+            # Índice para as consultas por sessão (seletores paginados e logs de sessão).
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_session_stats_guild_session
+                ON session_stats (guild_id, session_number)
+            ''')
+            # Lixeira do .dellog: as entradas apagadas ficam aqui, agrupadas por lote, até o .undolog.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS deletion_batches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    description TEXT,
+                    row_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_stats_deleted (
+                    batch_id INTEGER NOT NULL,
+                    id INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    guild_id TEXT NOT NULL,
+                    session_number INTEGER NOT NULL,
+                    player_name TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    amount INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_session_stats_deleted_batch
+                ON session_stats_deleted (batch_id)
+            ''')
         log.info(f"Banco de dados '{DB_FILE}' verificado/criado com sucesso.")
     except Exception as e:
         log.error(f"Falha ao inicializar o banco de dados em '{DB_FILE}': {e}", exc_info=True)
 
 # --- VIEWS (Lógica de UI) ---
 
-class StatsSelectorView(discord.ui.View):
-    """Uma View para selecionar um jogador e mostrar suas estatísticas totais."""
+class SelectorSearchModal(discord.ui.Modal, title="Buscar"):
+    """Um formulário para filtrar as opções de um seletor paginado."""
+    def __init__(self, selector_view):
+        super().__init__()
+        self.selector_view = selector_view
+
+    query_input = discord.ui.TextInput(
+        label="Termo de busca",
+        placeholder="Deixe em branco para limpar a busca",
+        required=False,
+        style=discord.TextStyle.short
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        query = self.query_input.value.strip() if self.query_input.value else None
+        await self.selector_view.apply_search(interaction, query or None)
+
+
+class PagedSelectorView(discord.ui.View, metaclass=abc.ABCMeta):
+    """
+    Base para menus de seleção que ultrapassam o limite de 25 opções do Discord.
+    Cada página é buscada sob demanda via paginação por chave (keyset): a view guarda
+    apenas a pilha de cursores das páginas visitadas, nunca a lista completa.
+    As subclasses implementam _fetch_page e select_callback.
+    """
+    placeholder = "Selecione uma opção..."
 
     def __init__(self, author: discord.Member, cog_instance):
         super().__init__(timeout=180)
         self.author = author
         self.cog = cog_instance
         self.message = None
+        self.search = None
+        self.cursors = [None]  # Cursor de início de cada página visitada; o topo é a página atual.
+        self.next_cursor = None
 
-        # CORREÇÃO: Lógica para buscar jogadores, não sessões.
-        players = self.cog._get_players(author.guild)
-        if not players:
-            return
+        self.select_menu = discord.ui.Select(placeholder=self.placeholder, row=0)
+        self.select_menu.callback = self.select_callback
+        self.has_options = self._load_page()
 
-        options = [discord.SelectOption(label=player.display_name, value=str(player.id)) for player in players]
-        player_select_menu = discord.ui.Select(placeholder="Selecione um jogador...", options=options)
+    @abc.abstractmethod
+    def _fetch_page(self, cursor, search: str | None) -> tuple[list[discord.SelectOption], object]:
+        """Retorna (opções da página, cursor da próxima página ou None)."""
 
-        # CORREÇÃO: Atribuir o callback correto.
-        player_select_menu.callback = self.player_select_callback
-        self.add_item(player_select_menu)
+    def _load_page(self) -> bool:
+        options, self.next_cursor = self._fetch_page(self.cursors[-1], self.search)
+
+        if self.select_menu in self.children:
+            self.remove_item(self.select_menu)
+        if options:
+            self.select_menu.options = options
+            self.add_item(self.select_menu)
+
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+        return bool(options)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.author.id:
@@ -83,15 +163,84 @@ class StatsSelectorView(discord.ui.View):
                 item.disabled = True
             await self.message.edit(view=self)
 
-    async def player_select_callback(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        selected_player_id = self.children[0].values[0]
-        player = interaction.guild.get_member(int(selected_player_id))
+    async def apply_search(self, interaction: discord.Interaction, query: str | None):
+        self.search = query
+        self.cursors = [None]
+        if not self._load_page() and query:
+            await interaction.response.edit_message(
+                content=f"Nenhum resultado para `{query}`. Use 🔎 para buscar outro termo.", view=self
+            )
+            return
+        await interaction.response.edit_message(content=None, view=self)
+
+    @abc.abstractmethod
+    async def select_callback(self, interaction: discord.Interaction):
+        """Trata a opção escolhida em self.select_menu.values[0]."""
+
+    @discord.ui.button(label="Anterior", emoji="◀️", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        self._load_page()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="Próximo", emoji="▶️", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        self._load_page()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="Buscar", emoji="🔎", style=discord.ButtonStyle.primary, row=1)
+    async def search_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(SelectorSearchModal(self))
+
+
+class PlayerSelectorView(PagedSelectorView):
+    """Base para os seletores de jogador; as subclasses implementam on_player_selected."""
+    placeholder = "Selecione um jogador..."
+
+    def __init__(self, author: discord.Member, cog_instance, players: list[discord.Member]):
+        self.players = players
+        super().__init__(author, cog_instance)
+
+    def _fetch_page(self, cursor, search):
+        # A lista de jogadores já foi buscada pelo comando, então a paginação é feita
+        # em memória sobre a lista ordenada, com a mesma semântica de cursor das sessões.
+        players = list(self.players)
+        if search:
+            players = [p for p in players if search.lower() in p.display_name.lower()]
+        players.sort(key=lambda p: (p.display_name.lower(), p.id))
+
+        keys = [(p.display_name.lower(), p.id) for p in players]
+        start = bisect.bisect_right(keys, cursor) if cursor else 0
+        page = players[start:start + SELECT_PAGE_SIZE]
+
+        options = [discord.SelectOption(label=player.display_name, value=str(player.id)) for player in page]
+        has_more = start + SELECT_PAGE_SIZE < len(players)
+        return options, keys[start + SELECT_PAGE_SIZE - 1] if has_more else None
+
+    async def select_callback(self, interaction: discord.Interaction):
+        selected_player_id = int(self.select_menu.values[0])
+        player = next((p for p in self.players if p.id == selected_player_id), None)
 
         if not player:
-            await interaction.followup.send("Jogador não encontrado.", ephemeral=True)
+            await interaction.response.send_message("Jogador não encontrado.", ephemeral=True)
             return
 
+        await self.on_player_selected(interaction, player)
+        self.stop()
+
+    @abc.abstractmethod
+    async def on_player_selected(self, interaction: discord.Interaction, player: discord.Member):
+        """Recebe a interação ainda sem resposta e o jogador escolhido."""
+
+
+class StatsSelectorView(PlayerSelectorView):
+    """Uma View para selecionar um jogador e mostrar suas estatísticas totais."""
+
+    async def on_player_selected(self, interaction: discord.Interaction, player: discord.Member):
+        await interaction.response.defer()
         stats = self.cog._get_player_total_stats(interaction.guild.id, player.display_name)
 
         embed = discord.Embed(title=f"Estatísticas Totais de {player.display_name}", color=player.color)
@@ -104,51 +253,42 @@ class StatsSelectorView(discord.ui.View):
         embed.add_field(name="💀 Vezes Caído", value=f"`{stats['jogador_caido']}`", inline=True)
         embed.add_field(name="🎯 Eliminações", value=f"`{stats['eliminacao']}`", inline=True)
 
-        await interaction.edit_original_response(embed=embed, view=None)
+        await interaction.edit_original_response(content=None, embed=embed, view=None)
+
+
+class EventPlayerSelectorView(PlayerSelectorView):
+    """Seletor de jogador do .log; o registro do evento fica com a SessionTrackerView."""
 
+    def __init__(self, author: discord.Member, cog_instance, players: list[discord.Member], tracker):
+        self.tracker = tracker
+        super().__init__(author, cog_instance, players)
 
-class SessionStatsSelectorView(discord.ui.View):
+    async def on_player_selected(self, interaction: discord.Interaction, player: discord.Member):
+        await self.tracker.register_for_player(interaction, player)
+
+
+class SessionStatsSelectorView(PagedSelectorView):
     """Uma View para selecionar uma sessão e mostrar seus detalhes."""
-    def __init__(self, author: discord.Member, cog_instance):
-        super().__init__(timeout=180)
-        self.author = author
-        self.cog = cog_instance
-        self.message = None
+    placeholder = "Selecione uma sessão..."
 
-        sessions_data = self.cog._get_available_sessions(author.guild.id)
-        if not sessions_data:
-            return
+    def _fetch_page(self, cursor, search):
+        # Busca uma opção a mais que o limite apenas para saber se existe uma próxima página.
+        rows = self.cog._get_sessions_page(self.author.guild.id, before=cursor, limit=SELECT_PAGE_SIZE + 1, search=search)
+        page = rows[:SELECT_PAGE_SIZE]
 
         options = []
-        # CORREÇÃO: Iterar corretamente sobre a tupla (s_num, title).
-        for s_num, title in sessions_data:
+        for s_num, title in page:
             label = f"Sessão {s_num}"
             if title:
                 truncated_title = (title[:80] + '...') if len(title) > 80 else title
                 label += f": {truncated_title}"
-
-            # CORREÇÃO: O 'value' deve ser apenas o número da sessão como string.
             options.append(discord.SelectOption(label=label, value=str(s_num)))
 
-        session_select_menu = discord.ui.Select(placeholder="Selecione uma sessão...", options=options)
-        session_select_menu.callback = self.session_select_callback
-        self.add_item(session_select_menu)
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.author.id:
-            await interaction.response.send_message("Apenas quem iniciou o comando pode interagir.", ephemeral=True)
-            return False
-        return True
+        return options, page[-1][0] if len(rows) > SELECT_PAGE_SIZE else None
 
-    async def on_timeout(self):
-        if self.message:
-            for item in self.children:
-                item.disabled = True
-            await self.message.edit(view=self)
-
-    async def session_select_callback(self, interaction: discord.Interaction):
+    async def select_callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        selected_session = int(self.children[0].values[0])
+        selected_session = int(self.select_menu.values[0])
 
         session_info = self.cog._get_session_info(interaction.guild.id, selected_session)
         session_stats = self.cog._get_session_stats(interaction.guild.id, selected_session)
@@ -180,7 +320,7 @@ class SessionStatsSelectorView(discord.ui.View):
                 summary_text += "\n".join(player_lines) if player_lines else "Nenhuma atividade registrada."
             embed.add_field(name="Estatísticas da Sessão", value=summary_text, inline=False)
 
-        await interaction.edit_original_response(embed=embed, view=None)
+        await interaction.edit_original_response(content=None, embed=embed, view=None)
 
 
 class SessionTrackerView(discord.ui.View):
@@ -191,7 +331,6 @@ class SessionTrackerView(discord.ui.View):
         self.author = author
         self.bot = bot
         self.action_type = None
-        self.player_select_menu = None
         self.message = None
 
     def _create_embed(self, description: str, color: discord.Color = discord.Color.blue()) -> discord.Embed:
@@ -202,39 +341,29 @@ class SessionTrackerView(discord.ui.View):
             timeout_embed = self._create_embed("Este menu de registro de evento expirou.", color=discord.Color.orange())
             await self.message.edit(embed=timeout_embed, view=None)
 
-    def _get_players(self, guild: discord.Guild) -> list[discord.Member]:
-        player_role = discord.utils.find(lambda r: r.name.lower() == PLAYER_ROLE_NAME.lower(), guild.roles)
-        if not player_role:
-            return []
-        return [member for member in guild.members if player_role in member.roles and not member.bot]
-
     def _disable_all_buttons(self):
         for item in self.children:
             if isinstance(item, discord.ui.Button):
                 item.disabled = True
 
     async def _prompt_for_player(self, interaction: discord.Interaction, prompt_text: str):
-        players = self._get_players(interaction.guild)
+        # Sem o cache de membros, a lista pode vir da API e passar dos 3s que a interação tem.
+        await interaction.response.defer()
+        players = await self.bot.get_cog("Estatísticas de Sessão").get_players(interaction.guild)
         if not players:
             error_embed = self._create_embed(
                 f"Não encontrei nenhum membro com o cargo '{PLAYER_ROLE_NAME}'. Crie o cargo e atribua-o aos jogadores.",
                 color=discord.Color.red()
             )
-            await interaction.response.edit_message(embed=error_embed, view=None)
+            await interaction.edit_original_response(embed=error_embed, view=None)
             self.stop()
             return
 
-        options = [discord.SelectOption(label=player.display_name, value=str(player.id)) for player in players]
-        self.player_select_menu = discord.ui.Select(placeholder="Selecione o jogador...", options=options)
-
-        if self.action_type in ["causado", "recebido", "cura"]:
-            self.player_select_menu.callback = self.player_select_amount_callback
-        else:
-            self.player_select_menu.callback = self.player_select_event_callback
-
-        self.add_item(self.player_select_menu)
-        embed = self._create_embed(prompt_text)
-        await interaction.response.edit_message(embed=embed, view=self)
+        # O seletor paginado assume a mensagem; ele tem seu próprio timeout, então esta view para aqui.
+        selector = EventPlayerSelectorView(self.author, self.bot.get_cog("Estatísticas de Sessão"), players, self)
+        selector.message = self.message
+        await interaction.edit_original_response(embed=self._create_embed(prompt_text), view=selector)
+        self.stop()
 
     @discord.ui.button(label="Dano Causado", style=discord.ButtonStyle.green, row=0)
     async def damage_dealt_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -278,14 +407,17 @@ class SessionTrackerView(discord.ui.View):
         self._disable_all_buttons()
         await self._prompt_for_player(interaction, "Um inimigo foi **eliminado**. Selecione o jogador responsável:")
 
-    async def player_select_amount_callback(self, interaction: discord.Interaction):
-        self.player_select_menu.disabled = True
-        player_id = int(self.player_select_menu.values[0])
-        player = interaction.guild.get_member(player_id)
+    async def register_for_player(self, interaction: discord.Interaction, player: discord.Member):
+        """Chamado pelo seletor de jogador com a interação da escolha, ainda sem resposta."""
+        if self.action_type in ["causado", "recebido", "cura"]:
+            await self._register_amount(interaction, player)
+        else:
+            await self._register_event(interaction, player)
 
+    async def _register_amount(self, interaction: discord.Interaction, player: discord.Member):
         prompt_message = f"Qual foi o valor de **{self.action_type}** para **{player.display_name}**? Digite apenas o número."
         embed = self._create_embed(prompt_message)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.response.edit_message(embed=embed, view=None)
 
         try:
             message = await self.bot.wait_for(
@@ -295,7 +427,6 @@ class SessionTrackerView(discord.ui.View):
             )
         except asyncio.TimeoutError:
             await interaction.followup.send("Tempo esgotado. O registro foi cancelado.", ephemeral=True)
-            self.stop()
             return
 
         amount = int(message.content)
@@ -309,13 +440,9 @@ class SessionTrackerView(discord.ui.View):
             await message.delete()
         except discord.HTTPException:
             pass
-        self.stop()
-
-    async def player_select_event_callback(self, interaction: discord.Interaction):
-        self.player_select_menu.disabled = True
-        player_id = int(self.player_select_menu.values[0])
-        player = interaction.guild.get_member(player_id)
 
+    async def _register_event(self, interaction: discord.Interaction, player: discord.Member):
+        await interaction.response.defer()
         self.bot.get_cog("Estatísticas de Sessão")._log_event(interaction.guild.id, player, self.action_type, 1)
 
         event_text = self.action_type.replace('_', ' ').title()
@@ -333,8 +460,24 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.session_data = self._load_session_data()
+        # guild_id -> (momento da busca, jogadores); só para servidores sem cache de membros.
+        self._player_cache: dict[int, tuple[float, list[discord.Member]]] = {}
+        self._player_fetch_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
         setup_database()
 
+    async def cog_before_invoke(self, ctx: commands.Context):
+        tracing.begin_command(ctx)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        tracing.end_command(ctx)
+
+    def snapshot_state(self) -> dict:
+        """Estado em memória passado para a nova instância no .reload (a sessão ativa já está em disco)."""
+        return {"player_cache": self._player_cache}
+
+    def restore_state(self, state: dict):
+        self._player_cache = state["player_cache"]
+
     # --- Métodos de Gerenciamento de Dados (JSON para sessão ativa) ---
     def _load_session_data(self) -> dict:
         try:
@@ -343,6 +486,7 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
+    @tracing.traced("session.save_session_data")
     def _save_session_data(self):
         try:
             with open(SESSION_DATA_FILE, 'w', encoding='utf-8') as f:
@@ -351,6 +495,8 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
             log.error(f"Falha ao salvar os dados da sessão: {e}")
 
     # --- Métodos de Interação com o Banco de Dados (SQLite) ---
+    @tracing.traced("session.log_event")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="log_event")
     def _log_event(self, guild_id: int, player: discord.Member, action: str, amount: int):
         """Registra um evento no banco de dados SQLite."""
         timestamp = datetime.utcnow().isoformat()
@@ -367,6 +513,8 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
         except Exception as e:
             log.error(f"Falha ao escrever no banco de dados: {e}", exc_info=True)
 
+    @tracing.traced("session.player_totals")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="player_totals")
     def _get_player_total_stats(self, guild_id: int, player_name: str) -> defaultdict:
         """Busca as estatísticas totais de um jogador no banco de dados."""
         stats = defaultdict(int)
@@ -383,27 +531,49 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
             log.error(f"Erro ao buscar estatísticas de {player_name}: {e}", exc_info=True)
         return stats
 
-    def _get_available_sessions(self, guild_id: int) -> list[tuple[int, str | None]]:
-        """Retorna uma lista de tuplas (número_da_sessão, título) do banco de dados."""
+    @tracing.traced("session.sessions_page")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="sessions_page")
+    def _get_sessions_page(self, guild_id: int, before: int | None = None, limit: int = SELECT_PAGE_SIZE,
+                           search: str | None = None) -> list[tuple[int, str | None]]:
+        """
+        Retorna uma página de tuplas (número_da_sessão, título), da mais recente para a mais antiga.
+        'before' é o cursor (keyset): apenas sessões com número menor que ele são retornadas.
+        """
         sessions_data = []
+        clauses, params = ["guild_id = ?"], [str(guild_id)]
+        if before is not None:
+            clauses.append("session_number < ?")
+            params.append(before)
+        if search:
+            clauses.append(
+                "(session_number = ? OR session_number IN "
+                "(SELECT session_number FROM sessions WHERE guild_id = ? AND title LIKE ?))"
+            )
+            params.extend([int(search) if search.isdigit() else -1, str(guild_id), f"%{search}%"])
+
         try:
             with sqlite3.connect(DB_FILE) as conn:
                 cursor = conn.cursor()
-                # Usamos LEFT JOIN para garantir que todas as sessões com logs apareçam,
-                # mesmo que não tenham um título/descrição na tabela 'sessions'.
-                cursor.execute("""
-                               SELECT DISTINCT s.session_number, ses.title
-                               FROM session_stats s
+                # A subconsulta percorre apenas o índice (guild_id, session_number) e para no LIMIT;
+                # o LEFT JOIN garante que sessões sem título/descrição também apareçam.
+                cursor.execute(f"""
+                               SELECT s.session_number, ses.title
+                               FROM (SELECT DISTINCT session_number
+                                     FROM session_stats
+                                     WHERE {' AND '.join(clauses)}
+                                     ORDER BY session_number DESC
+                                     LIMIT ?) s
                                         LEFT JOIN sessions ses
-                                                  ON s.guild_id = ses.guild_id AND s.session_number = ses.session_number
-                               WHERE s.guild_id = ?
+                                                  ON ses.guild_id = ? AND ses.session_number = s.session_number
                                ORDER BY s.session_number DESC
-                               """, (str(guild_id),))
+                               """, (*params, limit, str(guild_id)))
                 sessions_data = cursor.fetchall()
         except Exception as e:
             log.error(f"Erro ao buscar sessões disponíveis: {e}", exc_info=True)
         return sessions_data
 
+    @tracing.traced("session.session_stats")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="session_stats")
     def _get_session_stats(self, guild_id: int, session_number: int) -> defaultdict:
         """Busca as estatísticas de uma sessão específica do banco de dados."""
         session_stats = defaultdict(lambda: defaultdict(int))
@@ -420,6 +590,8 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
             log.error(f"Erro ao buscar estatísticas da sessão {session_number}: {e}", exc_info=True)
         return session_stats
 
+    @tracing.traced("session.session_info")
+    @metrics.SQLITE_QUERY_LATENCY.time(operation="session_info")
     def _get_session_info(self, guild_id: int, session_number: int) -> dict:
         """Busca o título e a descrição de uma sessão específica."""
         info = {}
@@ -438,10 +610,39 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
             log.error(f"Erro ao buscar informações da sessão {session_number}: {e}", exc_info=True)
         return info
 
-    def _get_players(self, guild: discord.Guild) -> list[discord.Member]:
-        """Helper para pegar membros com o cargo de jogador."""
+    async def get_players(self, guild: discord.Guild) -> list[discord.Member]:
+        """
+        Membros com o cargo de jogador. Com o cache de membros completo (servidor carregado na
+        partida), filtra o cache. No modo de pouca memória, percorre a lista de membros pela API
+        guardando só os jogadores, e o resultado fica em cache por PLAYER_CACHE_TTL_SECONDS.
+        """
         player_role = discord.utils.find(lambda r: r.name.lower() == PLAYER_ROLE_NAME.lower(), guild.roles)
-        return [m for m in guild.members if player_role and player_role in m.roles and not m.bot] if player_role else []
+        if not player_role:
+            return []
+        if guild.chunked:
+            return [m for m in player_role.members if not m.bot]
+
+        async with self._player_fetch_locks[guild.id]:
+            cached = self._player_cache.get(guild.id)
+            if cached and time.monotonic() - cached[0] < PLAYER_CACHE_TTL_SECONDS:
+                metrics.CACHE_LOOKUPS.inc(cache="players", result="hit")
+                return list(cached[1])
+            metrics.CACHE_LOOKUPS.inc(cache="players", result="miss")
+
+            with tracing.span("session.fetch_players") as span:
+                players = [
+                    member async for member in guild.fetch_members(limit=None)
+                    if not member.bot and member.get_role(player_role.id)
+                ]
+                span.set(players=len(players))
+
+            # Descarta as listas vencidas de outros servidores: a memória acompanha só as mesas ativas.
+            now = time.monotonic()
+            expired = [g for g, (fetched_at, _) in self._player_cache.items() if now - fetched_at >= PLAYER_CACHE_TTL_SECONDS]
+            for guild_id in expired:
+                del self._player_cache[guild_id]
+            self._player_cache[guild.id] = (now, players)
+            return list(players)
 
     # --- Comandos do Bot ---
     @commands.command(name='log', help='Abre um menu para registrar eventos da sessão.')
@@ -457,8 +658,9 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
     @commands.guild_only()
     async def show_stats(self, ctx: commands.Context):
         """Inicia um menu para visualizar as estatísticas totais de um jogador."""
-        view = StatsSelectorView(author=ctx.author, cog_instance=self)
-        if not view.children:
+        players = await self.get_players(ctx.guild)
+        view = StatsSelectorView(author=ctx.author, cog_instance=self, players=players)
+        if not view.has_options:
             embed = discord.Embed(
                 title="Visualizador de Estatísticas",
                 description=f"Não encontrei nenhum membro com o cargo '{PLAYER_ROLE_NAME}'.\nCrie o cargo e atribua-o aos jogadores para usar este comando.",
@@ -480,7 +682,7 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
     async def show_session_stats(self, ctx: commands.Context):
         """Inicia um menu para visualizar as estatísticas de uma sessão específica."""
         view = SessionStatsSelectorView(author=ctx.author, cog_instance=self)
-        if not view.children:
+        if not view.has_options:
             embed = discord.Embed(
                 title="Visualizador de Estatísticas de Sessão",
                 description="Nenhum dado de sessão foi registrado neste servidor ainda. Use o comando `.log` para começar.",
@@ -540,7 +742,8 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
                 )
 
                 found_any_mvp = False
-                with sqlite3.connect(DB_FILE) as conn:
+                with tracing.span("session.mvps_query"), metrics.SQLITE_QUERY_LATENCY.time(operation="mvps"), \
+                        sqlite3.connect(DB_FILE) as conn:
                     cursor = conn.cursor()
                     for action, (title, desc) in action_map.items():
                         cursor.execute("""
@@ -597,17 +800,18 @@ class SessionCog(commands.Cog, name="Estatísticas de Sessão"):
         timestamp = datetime.utcnow().isoformat()
 
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
+            with tracing.span("session.end_session_write"), metrics.SQLITE_QUERY_LATENCY.time(operation="end_session"):
+                conn = sqlite3.connect(DB_FILE)
+                cursor = conn.cursor()
 
-            # INSERT OR REPLACE atualiza a entrada se ela já existir, útil para correções.
-            cursor.execute("""
-                    INSERT OR REPLACE INTO sessions (guild_id, session_number, title, description, end_timestamp)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (guild_id, session_number, title, description, timestamp))
+                # INSERT OR REPLACE atualiza a entrada se ela já existir, útil para correções.
+                cursor.execute("""
+                        INSERT OR REPLACE INTO sessions (guild_id, session_number, title, description, end_timestamp)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (guild_id, session_number, title, description, timestamp))
 
-            conn.commit()
-            conn.close()
+                conn.commit()
+                conn.close()
 
             embed = discord.Embed(
                 title=f"✅ Sessão {session_number} Finalizada com Sucesso!",
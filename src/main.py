@@ -1,14 +1,22 @@
 # src/main.py
 
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import os
 import random
 import discord
 from discord.ext import commands, tasks
 import asyncio
 from dotenv import load_dotenv
-import google.generativeai as genai
 import logging
 
+from src.utils import ai_backend, job_queue, metrics
+from src.utils.metrics import MetricsServer
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
 # --- Setup Logging ---
 # Using a more standard logging setup
 log = logging.getLogger(__name__)
@@ -18,62 +26,148 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
+# Ordem das cogs; é também a ordem das categorias no .help.
+COGS_TO_LOAD = [
+    'message_cog', 'help_cog', 'rpg_cog', 'admin_cog',
+    'dice_cog', 'lookup_cog', 'logging_cog', 'session_cog', 'initiative_cog',
+    'maintenance_cog', 'diagnostics_cog'
+]
+# Carregadas antes das demais, uma a uma: a session_cog cria o stats.db (com WAL) que as outras usam.
+CORE_COGS = ['message_cog', 'session_cog']
+
+
 # --- Classe Principal do Bot ---
 class TatuBot(commands.Bot):
     def __init__(self, *args, **kwargs):
+        start = time.perf_counter()
         super().__init__(*args, **kwargs)
         log.info("Inicializando o TatuBot...")
+        self.metrics_server = None
+        self.extension_order = [f'src.cogs.{cog_name}' for cog_name in COGS_TO_LOAD]
+        # Duração de cada fase da partida, em segundos; resumida no log quando o bot fica pronto.
+        self.startup_phases = {"import": IMPORT_SECONDS}
+        self._setup_finished_at = None
+        self._ai_warm_up_task = None
         self.initialize_services()
+        self.startup_phases["init"] = time.perf_counter() - start
 
     def initialize_services(self):
-        """Inicializa serviços externos como Gemini."""
+        """
+        Inicializa o backend de IA escolhido em AI_BACKEND (Gemini, falso ou cassetes).
+        Só cria os objetos; o SDK do Gemini é carregado em segundo plano depois do on_ready.
+        Com AI_JOB_QUEUE, o gateway não cria modelos: os trabalhos de IA vão para a fila.
+        """
+        self.ai_jobs = None
+        if os.getenv("AI_JOB_QUEUE"):
+            try:
+                broker = job_queue.create_broker()
+                self.ai_jobs = job_queue.JobClient(broker)
+                self.ai_pro_model = None
+                self.ai_flash_model = None
+                log.info(f"Modo de fila de IA ativo ({type(broker).__name__}); rode os workers com 'python -m src.ai_worker'.")
+                return
+            except Exception:
+                log.error("Falha ao abrir a fila de IA. Voltando a gerar as respostas neste processo.", exc_info=True)
         try:
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
-            if not gemini_api_key:
-                log.warning("GEMINI_API_KEY não encontrada. Funcionalidades de IA serão desativadas.")
-                self.gemini_pro_model = None
-                self.gemini_flash_model = None
-            else:
-                genai.configure(api_key=gemini_api_key)
-                self.gemini_pro_model = genai.GenerativeModel(
-                    model_name="gemini-2.5-pro",
-                    generation_config={"temperature": 0.2}
-                )
-                log.info("Modelo Gemini PRO (gemini-2.5-pro) inicializado com sucesso.")
-                self.gemini_flash_model = genai.GenerativeModel(
-                    model_name="gemini-2.5-flash",
-                    generation_config={"temperature": 0.0}
-                )
-                log.info("Modelo Gemini FLASH (gemini-2.5-flash) inicializado com sucesso.")
+            self.ai_pro_model, self.ai_flash_model = ai_backend.create_models()
         except Exception:
-            log.error("Falha ao inicializar os modelos Gemini.", exc_info=True)
-            self.gemini_pro_model = None
-            self.gemini_flash_model = None
+            log.error("Falha ao inicializar os modelos de IA.", exc_info=True)
+            self.ai_pro_model = None
+            self.ai_flash_model = None
 
     async def setup_hook(self):
         """Hook executado para carregar as extensões (cogs) antes do bot conectar."""
+        start = time.perf_counter()
+        await self.start_metrics_server()
+        self.startup_phases["metrics_server"] = time.perf_counter() - start
+
         log.info("Carregando extensões (cogs)...")
-        cogs_to_load = [
-            'message_cog', 'help_cog', 'rpg_cog', 'admin_cog',
-            'dice_cog', 'lookup_cog', 'logging_cog', 'session_cog', 'initiative_cog'
-        ]
-        for cog_name in cogs_to_load:
-            try:
-                # --- THE FIX: Correct the import path for cogs ---
-                await self.load_extension(f'src.cogs.{cog_name}')
-                log.info(f'-> Cog {cog_name}.py carregado com sucesso.')
-            except commands.ExtensionNotFound:
-                log.warning(f'-> AVISO: Cog {cog_name}.py não encontrado.')
-            except Exception:
-                log.error(f'-> FALHA ao carregar o cog {cog_name}.py.', exc_info=True)
+        cogs_start = time.perf_counter()
+        for cog_name in CORE_COGS:
+            await self.load_cog(cog_name)
+        # As demais não dependem umas das outras ao carregar: enquanto uma espera o banco numa
+        # thread (cog_load), as outras seguem importando.
+        await asyncio.gather(*(self.load_cog(cog_name) for cog_name in COGS_TO_LOAD if cog_name not in CORE_COGS))
+        self.startup_phases["cogs"] = time.perf_counter() - cogs_start
+        self.startup_phases["setup_hook"] = time.perf_counter() - start
+        self._setup_finished_at = time.perf_counter()
+
+    async def load_cog(self, cog_name: str):
+        """Carrega uma cog registrando o tempo gasto; falhas são logadas sem derrubar as outras."""
+        start = time.perf_counter()
+        try:
+            # --- THE FIX: Correct the import path for cogs ---
+            await self.load_extension(f'src.cogs.{cog_name}')
+            log.info(f'-> Cog {cog_name}.py carregado com sucesso.')
+        except commands.ExtensionNotFound:
+            log.warning(f'-> AVISO: Cog {cog_name}.py não encontrado.')
+        except Exception:
+            log.error(f'-> FALHA ao carregar o cog {cog_name}.py.', exc_info=True)
+        finally:
+            self.startup_phases[f"cog:{cog_name}"] = time.perf_counter() - start
+
+    async def start_metrics_server(self):
+        """Sobe o endpoint de métricas e o /healthz se METRICS_PORT estiver definido."""
+        port = os.getenv("METRICS_PORT")
+        if not port:
+            return
+        try:
+            self.metrics_server = MetricsServer(self, os.getenv("METRICS_HOST", "127.0.0.1"), int(port))
+            await self.metrics_server.start()
+        except Exception:
+            log.error("Falha ao iniciar o servidor de métricas. O bot continuará sem ele.", exc_info=True)
+            self.metrics_server = None
+
+    async def close(self):
+        if self._ai_warm_up_task and not self._ai_warm_up_task.done():
+            self._ai_warm_up_task.cancel()
+        if self.ai_jobs:
+            await self.ai_jobs.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await super().close()
 
     async def on_ready(self):
         """Evento executado quando o bot está pronto e online."""
         log.info(f'Logado como {self.user.name} (ID: {self.user.id})')
         log.info('------')
+        if "connect" not in self.startup_phases and self._setup_finished_at is not None:
+            self.startup_phases["connect"] = time.perf_counter() - self._setup_finished_at
+            self.log_startup_phases()
+            self._ai_warm_up_task = asyncio.create_task(self.warm_up_ai())
         if not self.change_status.is_running():
             self.change_status.start()
 
+    def log_startup_phases(self):
+        """Resume as fases da partida em uma linha de log e as expõe em tatu_startup_phase_seconds."""
+        for phase, seconds in self.startup_phases.items():
+            metrics.STARTUP_PHASE.set(seconds, phase=phase)
+        total = time.perf_counter() - _IMPORT_START
+        slowest_cogs = sorted(
+            ((phase[4:], seconds) for phase, seconds in self.startup_phases.items() if phase.startswith("cog:")),
+            key=lambda item: item[1], reverse=True
+        )[:3]
+        main_phases = ", ".join(
+            f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_phases.items() if not phase.startswith("cog:")
+        )
+        cogs = ", ".join(f"{cog_name} {seconds:.2f}s" for cog_name, seconds in slowest_cogs)
+        log.info(f"Partida concluída em {total:.2f}s ({main_phases}). Cogs mais lentas: {cogs}.")
+
+    async def warm_up_ai(self):
+        """Carrega o SDK da IA em segundo plano, para que a primeira pergunta não pague a importação."""
+        models = {model for model in (self.ai_pro_model, self.ai_flash_model) if model is not None}
+        if not models:
+            return
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(model.warm_up() for model in models))
+        except Exception:
+            log.error("Falha ao aquecer os modelos de IA; eles tentarão de novo na primeira chamada.", exc_info=True)
+            return
+        self.startup_phases["ai_warm_up"] = time.perf_counter() - start
+        metrics.STARTUP_PHASE.set(self.startup_phases["ai_warm_up"], phase="ai_warm_up")
+        log.info(f"Modelos de IA prontos em segundo plano ({self.startup_phases['ai_warm_up']:.2f}s).")
+
     @tasks.loop(minutes=15)
     async def change_status(self):
         """Muda o status do bot periodicamente para refletir suas várias funções."""
@@ -101,9 +195,17 @@ async def main():
     intents.guilds = True
     # --- THE FIX: Removed voice_states intent to stop the PyNaCl warning ---
     # intents.voice_states = True
+    # Continua necessário no modo de pouca memória: a listagem de membros pela API exige o intent.
     intents.members = True
 
-    bot = TatuBot(command_prefix='.', intents=intents, help_command=None)
+    cache_options = {}
+    if os.getenv("LOW_MEMORY_MODE", "").strip().lower() in ("1", "true", "yes", "sim"):
+        # Nada de baixar todos os membros na partida nem de guardá-los depois: os jogadores
+        # (cargo Aventureiro) são buscados sob demanda pela SessionCog, com cache por servidor.
+        cache_options = {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+        log.info("Modo de pouca memória ativo: cache de membros desligado e sem carga de membros na partida.")
+
+    bot = TatuBot(command_prefix='.', intents=intents, help_command=None, **cache_options)
 
     # Lógica de Retry com Exponential Backoff
     max_retries = 5
@@ -0,0 +1,242 @@
+"""
+Backends de IA usados pelas cogs.
+
+As cogs dependem só de `AIModel.generate(prompt) -> str`; qual implementação está por trás é
+escolhido pela variável AI_BACKEND:
+
+- `gemini` (padrão): google.generativeai, com GEMINI_API_KEY. O SDK (e o protobuf/gRPC que ele
+  traz) só é importado no aquecimento em segundo plano ou na primeira chamada, nunca na partida.
+- `fake`: respostas locais e determinísticas, no formato que cada comando espera, sem rede.
+  AI_FAKE_LATENCY (segundos) simula a demora da API.
+- `record`: usa o Gemini e grava cada par prompt→resposta como "cassete" em AI_CASSETTE_DIR.
+- `replay`: responde só a partir dos cassetes gravados; um prompt sem cassete é um erro.
+  Como o cassete é identificado pelo prompt, qualquer mudança no prompt aparece como falta.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from datetime import datetime, timezone
+
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ("gemini", "fake", "record", "replay")
+PRO_MODEL = ("gemini-2.5-pro", 0.2)  # (nome, temperatura): respostas de regras, NPCs e fallback das consultas.
+FLASH_MODEL = ("gemini-2.5-flash", 0.0)  # Extração de palavras-chave, onde a resposta precisa ser estável.
+DEFAULT_CASSETTE_DIR = "src/ai_cassettes"
+
+
+class AIBackendError(Exception):
+    """Falha do backend de IA que não veio da API em si (configuração, cassete ausente)."""
+
+
+class AIModel:
+    """
+    Interface dos modelos de IA. Subclasses implementam `_generate`; `generate` normaliza o
+    prompt, contabiliza o tamanho dele e devolve só o texto da resposta.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.calls = 0
+        self.prompt_chars = 0
+
+    @staticmethod
+    def prompt_text(prompt: str | list[str]) -> str:
+        """O prompt como um único texto; listas (instrução de sistema + pergunta) são unidas por linhas em branco."""
+        return prompt if isinstance(prompt, str) else "\n\n".join(map(str, prompt))
+
+    async def generate(self, prompt: str | list[str]) -> str:
+        text = self.prompt_text(prompt)
+        self.calls += 1
+        self.prompt_chars += len(text)
+        metrics.AI_PROMPT_CHARS.observe(len(text), model=metrics.model_label(self))
+        return await self._generate(prompt)
+
+    async def _generate(self, prompt: str | list[str]) -> str:
+        raise NotImplementedError
+
+    async def warm_up(self):
+        """Prepara o modelo para a primeira chamada. Por padrão não há nada a preparar."""
+
+
+_genai_configured_key = None
+
+
+def _import_genai(api_key: str):
+    """Importa e configura o google.generativeai uma única vez. Bloqueante: rode fora do event loop."""
+    global _genai_configured_key
+    import google.generativeai as genai
+
+    if _genai_configured_key != api_key:
+        genai.configure(api_key=api_key)
+        _genai_configured_key = api_key
+    return genai
+
+
+class GeminiModel(AIModel):
+    """
+    Modelo do Gemini criado sob demanda: o SDK é importado em uma thread no `warm_up` (chamado em
+    segundo plano depois que o bot conecta) ou, se ele ainda não rodou, na primeira geração.
+    """
+
+    def __init__(self, model_name: str, temperature: float, api_key: str):
+        super().__init__(model_name)
+        self.temperature = temperature
+        self._api_key = api_key
+        self._model = None
+        self._lock = asyncio.Lock()
+
+    def _build(self):
+        genai = _import_genai(self._api_key)
+        return genai.GenerativeModel(model_name=self.model_name, generation_config={"temperature": self.temperature})
+
+    async def warm_up(self):
+        async with self._lock:
+            if self._model is None:
+                self._model = await asyncio.to_thread(self._build)
+
+    async def _generate(self, prompt):
+        if self._model is None:
+            await self.warm_up()
+        response = await self._model.generate_content_async(prompt)
+        return response.text
+
+
+# Respostas do modelo falso. Ele reconhece o tipo de pedido por trechos fixos dos prompts das cogs.
+FAKE_KEYWORD_TERMS = ("Vantagem", "Concentração", "Agarrado", "Contramágica Suprema", "Xyzzy Inexistente")
+FAKE_NPC = (
+    "Nome: Bryn Pedrafunda\n"
+    "Idade: Meia-idade\n"
+    "Aparência: Anã de ombros largos, barba trançada com anéis de cobre e avental chamuscado.\n"
+    "Personalidade: Fala alto, ri mais alto ainda e desconfia de quem não bebe.\n"
+    "Segredo/Objetivo: Esconde no porão o mapa de uma mina que o próprio clã jura não existir."
+)
+FAKE_SENTENCE = "O Mestre Tatu consulta os tomos antigos e explica a regra com calma. "
+
+
+class FakeModel(AIModel):
+    """
+    Modelo local e determinístico: a mesma pergunta sempre gera a mesma resposta.
+    'latency' e 'jitter' (segundos) simulam a demora da API; o jitter usa um gerador com semente.
+    """
+
+    def __init__(self, model_name: str, latency: float = 0.0, jitter: float = 0.0,
+                 response_chars: int = 1200, seed: int = 0):
+        super().__init__(model_name)
+        self.latency = latency
+        self.jitter = jitter
+        self.response_chars = response_chars
+        self._rng = random.Random(seed)
+
+    def respond(self, text: str) -> str:
+        if "Termo principal:" in text:
+            question = text.rsplit("Pergunta:", 1)[-1]
+            return FAKE_KEYWORD_TERMS[sum(map(ord, question)) % len(FAKE_KEYWORD_TERMS)]
+        if "Arquiteto de Almas" in text:
+            return FAKE_NPC
+        return (FAKE_SENTENCE * (self.response_chars // len(FAKE_SENTENCE) + 1))[:self.response_chars]
+
+    async def _generate(self, prompt):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._rng.random() * self.jitter)
+        return self.respond(self.prompt_text(prompt))
+
+
+class RecordReplayModel(AIModel):
+    """
+    Grava (mode="record") ou reproduz (mode="replay") respostas em cassetes JSON, um arquivo por
+    prompt em <cassette_dir>/<modelo>/<hash do prompt>.json. Em "record", 'inner' é o modelo real.
+    """
+
+    def __init__(self, inner: AIModel | None, model_name: str, cassette_dir: str, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo de cassete inválido: '{mode}'.")
+        if mode == "record" and inner is None:
+            raise ValueError("O modo 'record' precisa de um modelo real para gravar.")
+        super().__init__(model_name)
+        self.inner = inner
+        self.mode = mode
+        self.directory = os.path.join(cassette_dir, model_name)
+
+    async def warm_up(self):
+        if self.inner is not None:
+            await self.inner.warm_up()
+
+    @staticmethod
+    def cassette_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+    def _path(self, text: str) -> str:
+        return os.path.join(self.directory, f"{self.cassette_key(text)}.json")
+
+    def _read(self, text: str) -> str:
+        try:
+            with open(self._path(text), "r", encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            raise AIBackendError(
+                f"Nenhum cassete para este prompt de {self.model_name} ({len(text)} caracteres). "
+                "Grave de novo com AI_BACKEND=record."
+            ) from None
+
+    def _write(self, text: str, response: str):
+        os.makedirs(self.directory, exist_ok=True)
+        cassette = {
+            "model": self.model_name,
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "prompt_chars": len(text),
+            "prompt": text,
+            "response": response,
+        }
+        path = self._path(text)
+        with open(f"{path}.part", "w", encoding="utf-8") as f:
+            json.dump(cassette, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.part", path)
+
+    async def _generate(self, prompt):
+        text = self.prompt_text(prompt)
+        if self.mode == "replay":
+            return await asyncio.to_thread(self._read, text)
+        # O modelo interno é chamado direto (e não via generate) para não contar o prompt duas vezes.
+        response = await self.inner._generate(prompt)
+        await asyncio.to_thread(self._write, text, response)
+        return response
+
+
+def create_models(backend: str = None) -> tuple[AIModel | None, AIModel | None]:
+    """
+    Cria os modelos (pro, flash) do backend escolhido (padrão: AI_BACKEND, ou 'gemini').
+    Retorna (None, None) quando o Gemini é necessário e não há GEMINI_API_KEY.
+    """
+    backend = (backend or os.getenv("AI_BACKEND") or "gemini").strip().lower()
+    if backend not in BACKENDS:
+        raise AIBackendError(f"AI_BACKEND desconhecido: '{backend}'. Opções: {', '.join(BACKENDS)}.")
+
+    if backend == "fake":
+        latency = float(os.getenv("AI_FAKE_LATENCY", "0"))
+        log.info(f"Backend de IA falso ativo (latência simulada de {latency}s).")
+        return FakeModel(PRO_MODEL[0], latency), FakeModel(FLASH_MODEL[0], latency / 4)
+
+    cassette_dir = os.getenv("AI_CASSETTE_DIR", DEFAULT_CASSETTE_DIR)
+    if backend == "replay":
+        log.info(f"Backend de IA em modo de reprodução, a partir de '{cassette_dir}'.")
+        return (RecordReplayModel(None, PRO_MODEL[0], cassette_dir, "replay"),
+                RecordReplayModel(None, FLASH_MODEL[0], cassette_dir, "replay"))
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        log.warning("GEMINI_API_KEY não encontrada. Funcionalidades de IA serão desativadas.")
+        return None, None
+
+    pro, flash = GeminiModel(*PRO_MODEL, api_key), GeminiModel(*FLASH_MODEL, api_key)
+    log.info(f"Modelos Gemini {pro.model_name} e {flash.model_name} configurados; o SDK será carregado em segundo plano.")
+    if backend == "record":
+        log.info(f"Gravando as respostas da IA como cassetes em '{cassette_dir}'.")
+        return (RecordReplayModel(pro, pro.model_name, cassette_dir, "record"),
+                RecordReplayModel(flash, flash.model_name, cassette_dir, "record"))
+    return pro, flash
@@ -0,0 +1,271 @@
+"""
+Simulador de combate por Monte Carlo, vetorizado com NumPy.
+
+Estima chance de acerto, dano esperado, chance de derrubar o alvo e rodadas até derrubá-lo
+para um perfil de ataque como "+7 vs CA 15, 2d6+4, crit 19, 3 ataques, pv 45". As tentativas
+são geradas em lotes de matrizes, sem laços Python por rolagem, e o gerador aceita uma seed
+para que os resultados sejam reproduzíveis.
+
+O dano usa a mesma notação do `.roll` (`src.utils.dice`); em um crítico, os dados do dano são
+rolados duas vezes, como no D&D 5e.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.utils.dice import MAX_EXTRA_ROLLS, BinOp, Comparison, Dice, DiceError, Negate, Node, Number, compile_expression
+
+DEFAULT_TRIALS = 100_000
+MAX_TRIALS = 1_000_000
+BATCH_CELLS = 2_000_000  # Dados rolados por lote; limita a memória das matrizes intermediárias.
+MAX_ATTACKS = 20
+MAX_ROUNDS = 20  # Rodadas simuladas por tentativa ao medir quanto tempo leva para derrubar o alvo.
+PERCENTILES = (10, 50, 90)
+
+
+@dataclass(frozen=True)
+class AttackProfile:
+    bonus: int
+    armor_class: int
+    damage: str
+    crit_range: int = 20  # Menor resultado natural do d20 que é crítico.
+    attacks: int = 1
+    hit_points: Optional[int] = None
+    advantage: int = 0  # 1 = vantagem, -1 = desvantagem.
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    trials: int
+    seed: Optional[int]
+    hit_chance: float
+    crit_chance: float
+    damage_per_attack: float
+    damage_per_round: float
+    damage_std: float
+    damage_percentiles: Dict[int, float]
+    kill_chance: Optional[float] = None  # Chance de derrubar o alvo em uma única rodada.
+    rounds_to_kill: Optional[float] = None  # Média entre as tentativas que derrubaram o alvo.
+    rounds_percentiles: Optional[Dict[int, float]] = None
+    unresolved: Optional[float] = None  # Fração das tentativas que não derrubou o alvo em MAX_ROUNDS.
+
+
+_ATTACK_RE = re.compile(r"^(?P<bonus>[+-]?\d+)\s*vs\.?\s*(?:ac|ca)?\s*(?P<ac>\d+)$")
+_CRIT_RE = re.compile(r"^cr[ií]t(?:ico|ical)?\s*(?:on\s+|em\s+)?(?P<low>\d+)(?:\s*[-–]\s*20)?$")
+_ATTACKS_RE = re.compile(r"^(?:x\s*(?P<x>\d+)|(?P<n>\d+)\s*(?:ataques?|attacks?))$")
+_HP_RE = re.compile(r"^(?:pv|hp)\s*(?P<hp>\d+)$")
+_TRIALS_RE = re.compile(r"^(?:n|tentativas|trials)\s*(?P<n>\d+)$")
+_SEED_RE = re.compile(r"^seed\s*(?P<seed>\d+)$")
+
+
+def parse_attack_spec(spec: str) -> tuple[AttackProfile, int, Optional[int]]:
+    """
+    Interpreta '+7 vs CA 15, 2d6+4, crit 19-20, 3 ataques, pv 45, n 200000, seed 42'.
+    As duas primeiras partes (ataque e dano) são obrigatórias; as demais podem vir em qualquer ordem.
+    Retorna (perfil, tentativas, seed).
+    """
+    parts = [part.strip() for part in spec.lower().split(",") if part.strip()]
+    if len(parts) < 2:
+        raise DiceError("Use algo como `.sim +7 vs CA 15, 2d6+4, crit 19, 3 ataques, pv 45`.")
+
+    attack = _ATTACK_RE.match(parts[0])
+    if not attack:
+        raise DiceError("O ataque deve ter o formato `+7 vs CA 15`.")
+    damage = compile_expression(parts[1])
+    if isinstance(damage.ast, Comparison):
+        raise DiceError("O dano não pode ter comparação.")
+
+    options = {"crit_range": 20, "attacks": 1, "hit_points": None, "advantage": 0}
+    trials, seed = DEFAULT_TRIALS, None
+    for part in parts[2:]:
+        if match := _CRIT_RE.match(part):
+            options["crit_range"] = int(match.group("low"))
+        elif match := _ATTACKS_RE.match(part):
+            options["attacks"] = int(match.group("x") or match.group("n"))
+        elif match := _HP_RE.match(part):
+            options["hit_points"] = int(match.group("hp"))
+        elif match := _TRIALS_RE.match(part):
+            trials = int(match.group("n"))
+        elif match := _SEED_RE.match(part):
+            seed = int(match.group("seed"))
+        elif part in ("vantagem", "adv", "advantage"):
+            options["advantage"] = 1
+        elif part in ("desvantagem", "dis", "disadvantage"):
+            options["advantage"] = -1
+        else:
+            raise DiceError(f"Opção desconhecida: `{part}`.")
+
+    if not 2 <= options["crit_range"] <= 20:
+        raise DiceError("A margem de crítico deve estar entre 2 e 20.")
+    if not 1 <= options["attacks"] <= MAX_ATTACKS:
+        raise DiceError(f"O número de ataques deve estar entre 1 e {MAX_ATTACKS}.")
+    if options["hit_points"] is not None and options["hit_points"] <= 0:
+        raise DiceError("Os pontos de vida do alvo devem ser positivos.")
+    if not 1 <= trials <= MAX_TRIALS:
+        raise DiceError(f"O número de tentativas deve estar entre 1 e {MAX_TRIALS}.")
+
+    profile = AttackProfile(int(attack.group("bonus")), int(attack.group("ac")), damage.normalized, **options)
+    return profile, trials, seed
+
+
+# --- Amostragem vetorizada da AST de dados ---
+
+def _sample_dice(node: Dice, rng: np.random.Generator, size: int) -> np.ndarray:
+    """Rola 'size' vezes o grupo de dados de uma vez, numa matriz (size, count)."""
+    rolls = rng.integers(1, node.sides + 1, size=(size, node.count))
+
+    if node.reroll:
+        op, target, once = node.reroll
+        compare = _COMPARE[op]
+        for _ in range(1 if once else MAX_EXTRA_ROLLS):
+            hit = compare(rolls, target)
+            if not hit.any():
+                break
+            rolls = np.where(hit, rng.integers(1, node.sides + 1, size=rolls.shape), rolls)
+
+    if node.explode:
+        compare = _COMPARE[node.explode[0]]
+        chain = rolls
+        for _ in range(MAX_EXTRA_ROLLS):
+            exploding = compare(chain, node.explode[1])
+            if not exploding.any():
+                break
+            chain = np.where(exploding, rng.integers(1, node.sides + 1, size=chain.shape), 0)
+            rolls = np.concatenate([rolls, chain], axis=1)
+
+    if node.keep:
+        mode, amount = node.keep
+        ordered = np.sort(rolls, axis=1)
+        columns = ordered.shape[1]
+        if mode == "kh":
+            return ordered[:, columns - amount:].sum(axis=1)
+        if mode == "kl":
+            return ordered[:, :amount].sum(axis=1)
+        if mode == "dh":
+            return ordered[:, :columns - amount].sum(axis=1)
+        return ordered[:, amount:].sum(axis=1)
+    return rolls.sum(axis=1)
+
+
+_COMPARE = {">=": np.greater_equal, "<=": np.less_equal, ">": np.greater, "<": np.less, "=": np.equal}
+
+
+def sample(node: Node, rng: np.random.Generator, size: int, crit: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Avalia a AST 'size' vezes de uma vez. Com 'crit', os grupos de dados das linhas marcadas
+    são rolados uma segunda vez e somados (crítico do 5e: dobra os dados, não o modificador).
+    """
+    if isinstance(node, Number):
+        return np.full(size, node.value, dtype=np.int64)
+    if isinstance(node, Dice):
+        if node.explode and node.keep:
+            raise DiceError("A simulação ainda não aceita dados que explodem e também mantêm/descartam.")
+        values = _sample_dice(node, rng, size)
+        if crit is not None and crit.any():
+            # Só as linhas de crítico rolam os dados de novo.
+            values[crit] += _sample_dice(node, rng, int(crit.sum()))
+        return values
+    if isinstance(node, Negate):
+        return -sample(node.operand, rng, size, crit)
+    if isinstance(node, BinOp):
+        left, right = sample(node.left, rng, size, crit), sample(node.right, rng, size, crit)
+        if node.op == "+":
+            return left + right
+        if node.op == "-":
+            return left - right
+        if node.op == "*":
+            return left * right
+        if (right == 0).any():
+            raise DiceError("Divisão por zero na expressão.")
+        return np.floor_divide(left, right)
+    raise DiceError("Comparações não são aceitas aqui.")
+
+
+# --- Simulação ---
+
+def _attack_rolls(profile: AttackProfile, rng: np.random.Generator, shape: tuple) -> np.ndarray:
+    d20 = rng.integers(1, 21, size=shape)
+    if profile.advantage:
+        other = rng.integers(1, 21, size=shape)
+        d20 = np.maximum(d20, other) if profile.advantage > 0 else np.minimum(d20, other)
+    return d20
+
+
+def _simulate_round(profile: AttackProfile, damage: Node, rng: np.random.Generator, size: int):
+    """Uma rodada de ataques para 'size' tentativas: matrizes (size, ataques) de acertos e críticos, e o dano total."""
+    shape = (size, profile.attacks)
+    d20 = _attack_rolls(profile, rng, shape)
+    crits = d20 >= profile.crit_range
+    # 1 natural sempre erra; crítico (inclui o 20 natural) sempre acerta.
+    hits = crits | ((d20 != 1) & (d20 + profile.bonus >= profile.armor_class))
+
+    # O dano só é rolado para os ataques que acertaram.
+    damage_rolls = np.zeros(shape, dtype=np.int64)
+    if hits.any():
+        damage_rolls[hits] = np.maximum(sample(damage, rng, int(hits.sum()), crits[hits]), 0)
+    return hits, crits, damage_rolls.sum(axis=1)
+
+
+def simulate(profile: AttackProfile, trials: int = DEFAULT_TRIALS, seed: Optional[int] = None) -> SimulationResult:
+    """
+    Roda 'trials' tentativas em lotes e agrega as estatísticas; a mesma seed gera o mesmo resultado.
+    Com PV do alvo, cada lote simula rodada a rodada só as tentativas em que o alvo ainda está de pé.
+    """
+    rng = np.random.default_rng(seed)
+    program = compile_expression(profile.damage)
+    damage = program.ast
+    # Cada tentativa rola, por rodada, ataques * (d20 + dados de dano); o lote cresce quando isso é pequeno.
+    batch_size = max(1, BATCH_CELLS // (profile.attacks * (program.dice_count + 1)))
+
+    hits = crits = 0
+    round_damage, kill_rounds = [], []
+    remaining = trials
+    while remaining:
+        size = min(batch_size, remaining)
+        remaining -= size
+
+        batch_hits, batch_crits, first = _simulate_round(profile, damage, rng, size)
+        hits += int(batch_hits.sum())
+        crits += int(batch_crits.sum())
+        round_damage.append(first)
+        if not profile.hit_points:
+            continue
+
+        # Rodada em que o dano acumulado alcançou os PV; 0 = não derrubou em MAX_ROUNDS.
+        killed_at = np.zeros(size, dtype=np.int64)
+        total = first.copy()
+        standing = np.arange(size)
+        for round_number in range(1, MAX_ROUNDS + 1):
+            if round_number > 1:
+                total[standing] += _simulate_round(profile, damage, rng, standing.size)[2]
+            down = total[standing] >= profile.hit_points
+            killed_at[standing[down]] = round_number
+            standing = standing[~down]
+            if not standing.size:
+                break
+        kill_rounds.append(killed_at)
+    first_round = np.concatenate(round_damage)
+    attacks = trials * profile.attacks
+    result = dict(
+        trials=trials,
+        seed=seed,
+        hit_chance=hits / attacks,
+        crit_chance=crits / attacks,
+        damage_per_attack=float(first_round.mean()) / profile.attacks,
+        damage_per_round=float(first_round.mean()),
+        damage_std=float(first_round.std()),
+        damage_percentiles={q: float(np.percentile(first_round, q)) for q in PERCENTILES},
+    )
+
+    if profile.hit_points:
+        kills = np.concatenate(kill_rounds)
+        resolved = kills[kills > 0]
+        result.update(
+            kill_chance=float((kills == 1).mean()),
+            rounds_to_kill=float(resolved.mean()) if resolved.size else None,
+            rounds_percentiles={q: float(np.percentile(resolved, q)) for q in PERCENTILES} if resolved.size else None,
+            unresolved=float((kills == 0).mean()),
+        )
+    return SimulationResult(**result)
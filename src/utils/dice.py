@@ -0,0 +1,479 @@
+"""
+Compilador de expressões de dados.
+
+Transforma textos como `2d6+1d4+3`, `4d6kh3`, `(1d8+2)*2`, `1d6!`, `1d20r1` ou
+`1d20+5>=15` em um programa reutilizável, em três etapas: tokenizador -> parser
+(AST) -> closures. Os programas compilados ficam em um cache LRU, então macros
+repetidas como `.r 4d6kh3` não passam pelo parser de novo.
+
+Gramática:
+    expressao   := soma [comparacao soma]
+    soma        := produto (('+' | '-') produto)*
+    produto     := unario (('*' | '/') unario)*
+    unario      := ('-' | '+') unario | atomo
+    atomo       := NUM | dados | '(' soma ')'
+    dados       := [NUM] 'd' (NUM | '%') modificador*
+    modificador := ('kh' | 'kl' | 'k' | 'dh' | 'dl' | 'd') [NUM]
+                 | '!' [comparacao] [NUM]
+                 | ('r' | 'ro') [comparacao] NUM
+"""
+import operator
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple, Union
+
+MAX_DICE = 100  # Dados por expressão, somando todos os grupos (o mesmo limite do rolador antigo).
+MAX_SIDES = 1000
+MAX_EXTRA_ROLLS = 100  # Rolagens extras (explosões e rerrolagens) permitidas por grupo de dados.
+MAX_EXPRESSION_LENGTH = 200
+PROGRAM_CACHE_SIZE = 512
+
+COMPARATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "=": operator.eq,
+}
+
+
+class DiceError(ValueError):
+    """Expressão de dados inválida; a mensagem é mostrada ao usuário."""
+
+
+# --- AST ---
+
+@dataclass(frozen=True)
+class Number:
+    value: int
+
+    def __str__(self):
+        return str(self.value)
+
+
+@dataclass(frozen=True)
+class Dice:
+    count: int
+    sides: int
+    keep: Optional[Tuple[str, int]] = None  # ('kh' | 'kl' | 'dh' | 'dl', quantidade)
+    explode: Optional[Tuple[str, int]] = None  # (comparação, alvo)
+    reroll: Optional[Tuple[str, int, bool]] = None  # (comparação, alvo, só uma vez)
+
+    def __str__(self):
+        text = f"{self.count}d{self.sides}"
+        if self.reroll:
+            op, target, once = self.reroll
+            text += f"{'ro' if once else 'r'}{'' if op == '=' else op}{target}"
+        if self.explode:
+            op, target = self.explode
+            text += "!" if (op, target) == ("=", self.sides) else f"!{'' if op == '=' else op}{target}"
+        if self.keep:
+            text += f"{self.keep[0]}{self.keep[1]}"
+        return text
+
+
+@dataclass(frozen=True)
+class Negate:
+    operand: "Node"
+
+    def __str__(self):
+        return f"-{_wrap(self.operand, 3)}"
+
+
+@dataclass(frozen=True)
+class BinOp:
+    op: str
+    left: "Node"
+    right: "Node"
+
+    def __str__(self):
+        precedence = _PRECEDENCE[self.op]
+        # O lado direito de '-' e '/' precisa de parênteses mesmo com a mesma precedência.
+        right_min = precedence + 1 if self.op in "-/" else precedence
+        return f"{_wrap(self.left, precedence)}{self.op}{_wrap(self.right, right_min)}"
+
+
+@dataclass(frozen=True)
+class Comparison:
+    op: str
+    left: "Node"
+    right: "Node"
+
+    def __str__(self):
+        return f"{self.left}{self.op}{self.right}"
+
+
+Node = Union[Number, Dice, Negate, BinOp, Comparison]
+
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+
+def _needs_parens(node: Node, min_precedence: int) -> bool:
+    return isinstance(node, BinOp) and _PRECEDENCE[node.op] < min_precedence
+
+
+def _wrap(node: Node, min_precedence: int) -> str:
+    return f"({node})" if _needs_parens(node, min_precedence) else str(node)
+
+
+# --- Tokenizador ---
+
+_TOKEN_RE = re.compile(r"""
+      (?P<num>\d+)
+    | (?P<cmp>>=|<=|==|=|>|<)
+    | (?P<mod>kh|kl|dh|dl|ro|k|r|!)
+    | (?P<dice>d)
+    | (?P<pct>%)
+    | (?P<op>[-+*/])
+    | (?P<lparen>\()
+    | (?P<rparen>\))
+""", re.VERBOSE)
+
+
+def tokenize(text: str) -> List[Tuple[str, str, int]]:
+    """Quebra a expressão em tokens (tipo, texto, posição), terminando com um token 'end'."""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise DiceError(f"Caractere inesperado `{text[pos]}` na posição {pos + 1}.")
+        tokens.append((match.lastgroup, match.group(), pos))
+        pos = match.end()
+    tokens.append(("end", "", pos))
+    return tokens
+
+
+# --- Parser ---
+
+class _Parser:
+    """Parser descendente recursivo; também valida limites enquanto monta a AST."""
+
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.index = 0
+        self.dice_count = 0
+
+    def peek(self, offset: int = 0) -> Tuple[str, str, int]:
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, kind: str, description: str) -> Tuple[str, str, int]:
+        token = self.peek()
+        if token[0] != kind:
+            raise DiceError(f"Esperava {description} na posição {token[2] + 1}.")
+        return self.advance()
+
+    def parse(self) -> Node:
+        node = self.sum()
+        if self.peek()[0] == "cmp":
+            op = self.advance()[1]
+            node = Comparison("=" if op == "==" else op, node, self.sum())
+        token = self.peek()
+        if token[0] != "end":
+            raise DiceError(f"Trecho inesperado `{token[1]}` na posição {token[2] + 1}.")
+        return node
+
+    def sum(self) -> Node:
+        node = self.product()
+        while self.peek()[0] == "op" and self.peek()[1] in "+-":
+            op = self.advance()[1]
+            node = BinOp(op, node, self.product())
+        return node
+
+    def product(self) -> Node:
+        node = self.unary()
+        while self.peek()[0] == "op" and self.peek()[1] in "*/":
+            op = self.advance()[1]
+            node = BinOp(op, node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        token = self.peek()
+        if token[0] == "op" and token[1] == "-":
+            self.advance()
+            operand = self.unary()
+            return Number(-operand.value) if isinstance(operand, Number) else Negate(operand)
+        if token[0] == "op" and token[1] == "+":
+            self.advance()
+            return self.unary()
+        return self.atom()
+
+    def atom(self) -> Node:
+        kind, value, pos = self.peek()
+        if kind == "num":
+            self.advance()
+            if self.peek()[0] == "dice":
+                return self.dice(int(value))
+            return Number(int(value))
+        if kind == "dice":
+            return self.dice(1)
+        if kind == "lparen":
+            self.advance()
+            node = self.sum()
+            self.expect("rparen", "`)`")
+            return node
+        if kind == "end":
+            raise DiceError("A expressão terminou antes do esperado.")
+        raise DiceError(f"Trecho inesperado `{value}` na posição {pos + 1}.")
+
+    def dice(self, count: int) -> Dice:
+        self.advance()  # 'd'
+        kind, value, pos = self.peek()
+        if kind == "pct":
+            self.advance()
+            sides = 100
+        elif kind == "num":
+            self.advance()
+            sides = int(value)
+        else:
+            raise DiceError(f"Esperava o número de lados do dado na posição {pos + 1}.")
+
+        if count <= 0 or sides <= 0:
+            raise DiceError("Número de dados ou lados inválido. Use valores positivos.")
+        if sides > MAX_SIDES:
+            raise DiceError(f"Os dados podem ter no máximo {MAX_SIDES} lados.")
+        self.dice_count += count
+        if self.dice_count > MAX_DICE:
+            raise DiceError(f"Número de dados inválido. Use no máximo {MAX_DICE} dados por rolagem.")
+
+        keep = explode = reroll = None
+        while True:
+            kind, value, pos = self.peek()
+            if kind == "dice" and self.peek(1)[0] == "num":
+                value, kind = "dl", "mod"  # '4d6d1' é o mesmo que '4d6dl1'.
+            if kind != "mod":
+                break
+            self.advance()
+
+            if value in ("kh", "kl", "k", "dh", "dl"):
+                if keep:
+                    raise DiceError("Use apenas um modificador de manter/descartar por grupo de dados.")
+                amount = int(self.advance()[1]) if self.peek()[0] == "num" else 1
+                if not 1 <= amount < count:
+                    raise DiceError("Não é possível manter/descartar mais dados do que o total rolado.")
+                keep = ("kh" if value == "k" else value, amount)
+            elif value == "!":
+                if explode:
+                    raise DiceError("Use apenas um modificador de explosão por grupo de dados.")
+                explode = self.condition(default=sides)
+                if all(COMPARATORS[explode[0]](face, explode[1]) for face in range(1, sides + 1)):
+                    raise DiceError("A condição de explosão não pode incluir todas as faces do dado.")
+            else:
+                if reroll:
+                    raise DiceError("Use apenas um modificador de rerrolagem por grupo de dados.")
+                op, target = self.condition(default=None)
+                if all(COMPARATORS[op](face, target) for face in range(1, sides + 1)):
+                    raise DiceError("A condição de rerrolagem não pode incluir todas as faces do dado.")
+                reroll = (op, target, value == "ro")
+
+        return Dice(count, sides, keep, explode, reroll)
+
+    def condition(self, default: Optional[int]) -> Tuple[str, int]:
+        """Lê '[comparação] NUM' de explosões e rerrolagens; sem comparação, vale igualdade."""
+        op = "="
+        if self.peek()[0] == "cmp":
+            op = self.advance()[1]
+            op = "=" if op == "==" else op
+        if self.peek()[0] == "num":
+            return op, int(self.advance()[1])
+        if default is None or op != "=":
+            raise DiceError(f"Esperava um número na posição {self.peek()[2] + 1}.")
+        return op, default
+
+
+# --- Compilação e execução ---
+
+@dataclass
+class DiceGroupResult:
+    """Detalhes de um grupo de dados rolado, para exibição e para o histórico de rolagens."""
+    expression: str
+    sides: int
+    rolls: List[int]
+    kept: List[int]
+    dropped: List[int]
+    rerolled: List[int]
+
+
+@dataclass
+class RollResult:
+    total: int
+    calculation: str
+    groups: List[DiceGroupResult]
+    success: Optional[bool] = None  # Preenchido apenas em expressões com comparação.
+    target: Optional[int] = None
+
+    @property
+    def dropped(self) -> List[int]:
+        return [value for group in self.groups for value in group.dropped]
+
+
+Evaluator = Callable[[random.Random, List[DiceGroupResult]], Tuple[int, str]]
+
+
+def _compile_node(node: Node) -> Evaluator:
+    """Converte a AST em closures aninhadas; rolar não precisa mais inspecionar a árvore."""
+    if isinstance(node, Number):
+        value, text = node.value, str(node.value)
+        return lambda rng, groups: (value, text)
+
+    if isinstance(node, Negate):
+        operand = _compile_node(node.operand)
+        template = "-({})" if _needs_parens(node.operand, 3) else "-{}"
+
+        def negate(rng, groups):
+            value, text = operand(rng, groups)
+            return -value, template.format(text)
+        return negate
+
+    if isinstance(node, BinOp):
+        left, right, op = _compile_node(node.left), _compile_node(node.right), node.op
+        precedence = _PRECEDENCE[op]
+        # Os parênteses da expressão original são repetidos no texto do cálculo.
+        template = "{}" if not _needs_parens(node.left, precedence) else "({})"
+        template += f" {op} "
+        template += "({})" if _needs_parens(node.right, precedence + 1 if op in "-/" else precedence) else "{}"
+
+        def binop(rng, groups):
+            left_value, left_text = left(rng, groups)
+            right_value, right_text = right(rng, groups)
+            if op == "+":
+                value = left_value + right_value
+            elif op == "-":
+                value = left_value - right_value
+            elif op == "*":
+                value = left_value * right_value
+            else:
+                if right_value == 0:
+                    raise DiceError("Divisão por zero na expressão.")
+                value = left_value // right_value  # Regra do D&D: divisões arredondam para baixo.
+            return value, template.format(left_text, right_text)
+        return binop
+
+    if isinstance(node, Dice):
+        return _compile_dice(node)
+
+    raise DiceError("Comparações só podem aparecer uma vez, no fim da expressão.")
+
+
+def _compile_dice(node: Dice) -> Evaluator:
+    count, sides, label = node.count, node.sides, str(node)
+    explode_test = (lambda v, c=COMPARATORS[node.explode[0]], t=node.explode[1]: c(v, t)) if node.explode else None
+    reroll_test = (lambda v, c=COMPARATORS[node.reroll[0]], t=node.reroll[1]: c(v, t)) if node.reroll else None
+    reroll_once = bool(node.reroll and node.reroll[2])
+    keep_mode, keep_amount = node.keep or (None, 0)
+
+    def roll_dice(rng, groups):
+        rolls, rerolled, extra = [], [], 0
+        for _ in range(count):
+            value = rng.randint(1, sides)
+            if reroll_test:
+                while reroll_test(value) and extra < MAX_EXTRA_ROLLS:
+                    rerolled.append(value)
+                    value = rng.randint(1, sides)
+                    extra += 1
+                    if reroll_once:
+                        break
+            rolls.append(value)
+            if explode_test:
+                while explode_test(value) and extra < MAX_EXTRA_ROLLS:
+                    value = rng.randint(1, sides)
+                    extra += 1
+                    rolls.append(value)
+
+        kept, dropped = rolls, []
+        if keep_mode:
+            order = sorted(range(len(rolls)), key=rolls.__getitem__)
+            if keep_mode == "kh":
+                kept_indices = set(order[-keep_amount:])
+            elif keep_mode == "kl":
+                kept_indices = set(order[:keep_amount])
+            elif keep_mode == "dh":
+                kept_indices = set(order[:-keep_amount])
+            else:
+                kept_indices = set(order[keep_amount:])
+            kept = [v for i, v in enumerate(rolls) if i in kept_indices]
+            dropped = [v for i, v in enumerate(rolls) if i not in kept_indices]
+
+        groups.append(DiceGroupResult(label, sides, rolls, kept, dropped, rerolled))
+        text = str(kept[0]) if len(kept) == 1 else f"({' + '.join(map(str, kept))})"
+        return sum(kept), text
+    return roll_dice
+
+
+class Program:
+    """Expressão compilada: guarda a AST, a forma normalizada e as closures de avaliação."""
+    __slots__ = ("ast", "normalized", "dice_count", "_left", "_right", "_comparison")
+
+    def __init__(self, ast: Node, dice_count: int):
+        self.ast = ast
+        self.normalized = str(ast)
+        self.dice_count = dice_count
+        if isinstance(ast, Comparison):
+            self._comparison = ast.op
+            self._left, self._right = _compile_node(ast.left), _compile_node(ast.right)
+        else:
+            self._comparison = None
+            self._left, self._right = _compile_node(ast), None
+
+    def roll(self, rng: random.Random = random) -> RollResult:
+        groups: List[DiceGroupResult] = []
+        total, calculation = self._left(rng, groups)
+        if self._comparison is None:
+            return RollResult(total, calculation, groups)
+
+        target, target_text = self._right(rng, groups)
+        success = COMPARATORS[self._comparison](total, target)
+        return RollResult(total, f"{calculation} = {total} {self._comparison} {target_text}", groups, success, target)
+
+
+def normalize(expression: str) -> str:
+    return re.sub(r"\s+", "", expression.lower())
+
+
+@lru_cache(maxsize=PROGRAM_CACHE_SIZE)
+def _compile(normalized: str) -> Program:
+    if not normalized:
+        raise DiceError("Expressão de rolagem vazia.")
+    if len(normalized) > MAX_EXPRESSION_LENGTH:
+        raise DiceError(f"Expressão muito longa. Use no máximo {MAX_EXPRESSION_LENGTH} caracteres.")
+    parser = _Parser(normalized)
+    return Program(parser.parse(), parser.dice_count)
+
+
+def compile_expression(expression: str) -> Program:
+    """Compila a expressão, reaproveitando o programa do cache LRU quando ela já foi vista."""
+    return _compile(normalize(expression))
+
+
+def roll(expression: str, rng: random.Random = random) -> RollResult:
+    return compile_expression(expression).roll(rng)
+
+
+# --- Rolagens embutidas em mensagens ---
+
+INLINE_OPEN = "[["
+INLINE_ROLL_RE = re.compile(r"\[\[([^\[\]]{1,%d})\]\]" % MAX_EXPRESSION_LENGTH)
+
+
+def find_inline_rolls(content: str, limit: int) -> List[str]:
+    """
+    Expressões `[[...]]` de uma mensagem, no máximo 'limit'. A checagem de substring vem antes
+    de qualquer regex: a grande maioria das mensagens não tem rolagem e sai na primeira linha.
+    Procurar um único caractere usa memchr e é bem mais rápido que procurar "[[" direto,
+    então o "[[" só é procurado quando há algum "[".
+    """
+    if "[" not in content or INLINE_OPEN not in content:
+        return []
+    matches = []
+    for match in INLINE_ROLL_RE.finditer(content):
+        matches.append(match.group(1))
+        if len(matches) >= limit:
+            break
+    return matches
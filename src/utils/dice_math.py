@@ -0,0 +1,318 @@
+"""
+Distribuições exatas de expressões de dados.
+
+Usa a mesma AST de `src.utils.dice`, então `.prob`/`.dist` entendem exatamente o que `.roll`
+entende. Cada nó vira uma distribuição discreta (um vetor NumPy de probabilidades mais o
+valor do índice 0):
+    - somas e subtrações são convoluções (FFT quando os vetores são grandes);
+    - NdS é a potência de convolução de um dado, por quadrados sucessivos;
+    - manter/descartar usa programação dinâmica sobre estatísticas de ordem, face a face,
+      em vez de enumerar os S^N resultados possíveis;
+    - explosões e rerrolagens ajustam a distribuição de um único dado antes da soma.
+Os resultados são memorizados por expressão normalizada.
+"""
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.utils.dice import (
+    COMPARATORS, MAX_EXTRA_ROLLS, BinOp, Comparison, Dice, DiceError, Negate, Node, Number, compile_expression,
+)
+
+DISTRIBUTION_CACHE_SIZE = 256
+FFT_THRESHOLD = 50_000  # Acima deste len(a) * len(b), a convolução usa FFT.
+MAX_OUTCOMES = 1_000_000  # Limite de pares de valores ao multiplicar ou dividir duas distribuições.
+MAX_KEEP_CELLS = 500_000_000  # Orçamento (células visitadas) da programação dinâmica de manter/descartar.
+TAIL_EPSILON = 1e-15  # Probabilidades abaixo disso nas pontas são descartadas.
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_TAIL = 0.05  # Percentual de cada cauda agrupado nas pontas do histograma.
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Distribuição discreta: probs[i] é a probabilidade do valor offset + i."""
+    offset: int
+    probs: np.ndarray
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.offset, self.offset + len(self.probs))
+
+    @property
+    def minimum(self) -> int:
+        return self.offset
+
+    @property
+    def maximum(self) -> int:
+        return self.offset + len(self.probs) - 1
+
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.probs))
+
+    @property
+    def std(self) -> float:
+        return float(math.sqrt(max(np.dot((self.values - self.mean) ** 2, self.probs), 0.0)))
+
+    def percentile(self, q: float) -> int:
+        """Menor valor cuja probabilidade acumulada alcança q por cento."""
+        index = int(np.searchsorted(np.cumsum(self.probs), q / 100 - 1e-12))
+        return self.offset + min(index, len(self.probs) - 1)
+
+    def probability(self, op: str, target: int) -> float:
+        return float(self.probs[COMPARATORS[op](self.values, target)].sum())
+
+    def histogram(self, max_rows: int = 16, width: int = 20) -> str:
+        """
+        Histograma em texto. Quando os valores não cabem em max_rows linhas, as caudas abaixo de
+        0,05% e acima de 99,95% entram na primeira e na última faixa, e o resto é agrupado.
+        """
+        first, last = 0, len(self.probs) - 1
+        if len(self.probs) > max_rows:
+            first = self.percentile(HISTOGRAM_TAIL) - self.offset
+            last = max(self.percentile(100 - HISTOGRAM_TAIL) - self.offset, first)
+        probs = self.probs[first:last + 1].copy()
+        probs[0] += self.probs[:first].sum()
+        probs[-1] += self.probs[last + 1:].sum()
+
+        bucket = max(1, math.ceil(len(probs) / max_rows))
+        padded = np.pad(probs, (0, -len(probs) % bucket))
+        rows = padded.reshape(-1, bucket).sum(axis=1)
+        peak = rows.max()
+
+        labels = []
+        for i in range(len(rows)):
+            low = self.offset + first + i * bucket
+            high = min(low + bucket - 1, self.offset + last)
+            label = str(low) if low == high else f"{low}-{high}"
+            if i == 0 and first > 0:
+                label = f"≤{high}"
+            elif i == len(rows) - 1 and last < len(self.probs) - 1:
+                label = f"≥{low}"
+            labels.append(label)
+        label_width = max(map(len, labels))
+
+        lines = []
+        for label, p in zip(labels, rows):
+            bar = "█" * int(round(p / peak * width)) if peak else ""
+            lines.append(f"{label:>{label_width}} │{bar:<{width}} {p * 100:5.2f}%")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class Analysis:
+    expression: str
+    distribution: Distribution
+    comparison: Optional[str] = None
+    success: Optional[float] = None  # Probabilidade de a comparação ser verdadeira.
+
+    @property
+    def percentiles(self) -> Dict[int, int]:
+        return {q: self.distribution.percentile(q) for q in PERCENTILES}
+
+
+# --- Operações sobre vetores de probabilidade ---
+
+def _trim(offset: int, probs: np.ndarray) -> Distribution:
+    nonzero = np.flatnonzero(probs > TAIL_EPSILON)
+    if not len(nonzero):
+        return Distribution(offset, np.array([1.0]))
+    start, end = nonzero[0], nonzero[-1] + 1
+    probs = probs[start:end]
+    return Distribution(offset + int(start), probs / probs.sum())
+
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) * len(b) <= FFT_THRESHOLD:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    n = 1 << (size - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:size]
+    return np.clip(result, 0.0, None)
+
+
+def _power(probs: np.ndarray, count: int) -> np.ndarray:
+    """Soma de 'count' cópias independentes, por quadrados sucessivos: O(log count) convoluções."""
+    result = np.array([1.0])
+    while count:
+        if count & 1:
+            result = _convolve(result, probs)
+        count >>= 1
+        if count:
+            probs = _convolve(probs, probs)
+    return result
+
+
+def _add(a: Distribution, b: Distribution) -> Distribution:
+    return _trim(a.offset + b.offset, _convolve(a.probs, b.probs))
+
+
+def _negate(a: Distribution) -> Distribution:
+    return Distribution(-a.maximum, a.probs[::-1].copy())
+
+
+def _combine(a: Distribution, b: Distribution, op: str) -> Distribution:
+    """Multiplicação ou divisão (arredondando para baixo) entre duas distribuições, par a par."""
+    if len(a.probs) * len(b.probs) > MAX_OUTCOMES:
+        raise DiceError("Expressão grande demais para o cálculo exato de multiplicação/divisão.")
+
+    left, right = np.meshgrid(a.values, b.values, indexing="ij")
+    weights = np.outer(a.probs, b.probs)
+    if op == "*":
+        outcomes = left * right
+    else:
+        if b.probability("=", 0) > 0:
+            raise DiceError("A expressão pode dividir por zero.")
+        outcomes = np.floor_divide(left, right)
+
+    low = int(outcomes.min())
+    return _trim(low, np.bincount((outcomes - low).ravel(), weights=weights.ravel()))
+
+
+# --- Um grupo de dados ---
+
+def _single_die(node: Dice) -> np.ndarray:
+    """Distribuição de um dado (faces 1..S no índice 0..S-1), já com a rerrolagem aplicada."""
+    faces = np.arange(1, node.sides + 1)
+    probs = np.full(node.sides, 1 / node.sides)
+    if node.reroll:
+        op, target, once = node.reroll
+        hit = COMPARATORS[op](faces, target)
+        if once:
+            # Se a primeira rolagem acertar a condição, vale a segunda, seja ela qual for.
+            probs = np.where(hit, 0.0, probs) + hit.mean() / node.sides
+        else:
+            # Rerrolar até sair do conjunto é o mesmo que sortear entre as faces restantes.
+            probs = np.where(hit, 0.0, 1.0 / (~hit).sum())
+    return probs
+
+
+def _exploding_die(node: Dice, first: np.ndarray) -> np.ndarray:
+    """Soma da cadeia de explosões de um dado: v, ou v + nova rolagem, enquanto a condição valer."""
+    faces = np.arange(1, node.sides + 1)
+    hit = COMPARATORS[node.explode[0]](faces, node.explode[1])
+    fresh = np.full(node.sides, 1 / node.sides)
+    # As explosões são rolagens simples, sem rerrolagem; o índice 0 do vetor é o valor 0.
+    fresh_stop = np.concatenate(([0.0], np.where(hit, 0.0, fresh)))
+    fresh_go = np.concatenate(([0.0], np.where(hit, fresh, 0.0)))
+
+    result = np.concatenate(([0.0], np.where(hit, 0.0, first)))
+    chain = np.concatenate(([0.0], np.where(hit, first, 0.0)))
+    for _ in range(MAX_EXTRA_ROLLS):
+        if chain.sum() < TAIL_EPSILON:
+            break
+        stop = _convolve(chain, fresh_stop)
+        result = np.pad(result, (0, len(stop) - len(result)))
+        result += stop
+        chain = _convolve(chain, fresh_go)
+    return result[1:]  # Volta para o índice 0 = valor 1.
+
+
+def _keep_highest(probs: np.ndarray, count: int, keep: int) -> np.ndarray:
+    """
+    Distribuição da soma dos 'keep' maiores entre 'count' dados independentes (índices 0..L-1).
+
+    Percorre as faces da maior para a menor. O estado é uma matriz [dados já mantidos, soma
+    parcial]; em cada face v, os m dados restantes são todos <= v, e quantos mostram exatamente
+    v segue uma binomial com q = P(v) / P(X <= v). Assim que 'keep' dados foram mantidos, a
+    linha é finalizada, porque o resto não altera a soma.
+    """
+    faces = len(probs)
+    width = keep * (faces - 1) + 1
+    if faces * keep * keep * width > MAX_KEEP_CELLS:
+        raise DiceError("Expressão grande demais para o cálculo exato de manter/descartar.")
+
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, count + 1)))))
+    kept = np.arange(keep)[:, None]
+    shown = np.arange(count + 1)[None, :]
+    remaining = count - kept
+    valid = shown <= remaining
+    log_comb = np.where(
+        valid,
+        log_fact[remaining] - log_fact[np.minimum(shown, remaining)] - log_fact[np.clip(remaining - shown, 0, None)],
+        -np.inf
+    )
+    misses = np.clip(remaining - shown, 0, None)
+    needed = keep - np.arange(keep)
+
+    cdf = np.cumsum(probs)
+    states = np.zeros((keep, width))
+    states[0, 0] = 1.0
+    result = np.zeros(width)
+
+    for v in range(faces - 1, -1, -1):
+        if cdf[v] <= 0 or not states.any():
+            break
+        q = min(probs[v] / cdf[v], 1.0)
+        # q pode ser 0 ou 1; os termos 0 * log(0) são descartados pelos np.where.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_q, log_not_q = np.log(q), np.log1p(-q)
+            exponent = log_comb + np.where(shown == 0, 0.0, shown * log_q) + np.where(misses == 0, 0.0, misses * log_not_q)
+        binomial = np.where(valid, np.exp(exponent), 0.0)
+
+        # Linhas que completam 'keep' nesta face: somam needed * v e saem da matriz.
+        done = np.array([binomial[j, needed[j]:].sum() for j in range(keep)])
+        for j in np.flatnonzero(done):
+            shift = needed[j] * v
+            result[shift:] += states[j, :width - shift] * done[j]
+
+        next_states = np.zeros_like(states)
+        for c in range(keep):
+            rows, shift = keep - c, c * v
+            next_states[c:, shift:] += states[:rows, :width - shift] * binomial[:rows, c][:, None]
+        states = next_states
+    return result
+
+
+def _dice(node: Dice) -> Distribution:
+    first = _single_die(node)
+    if node.explode:
+        if node.keep:
+            raise DiceError("Ainda não há cálculo exato para dados que explodem e também mantêm/descartam.")
+        return _trim(node.count, _power(_exploding_die(node, first), node.count))
+
+    if not node.keep:
+        return _trim(node.count, _power(first, node.count))
+
+    mode, amount = node.keep
+    keep = amount if mode in ("kh", "kl") else node.count - amount
+    if mode in ("kh", "dl"):
+        return _trim(keep, _keep_highest(first, node.count, keep))
+    # Manter os menores é manter os maiores com as faces espelhadas.
+    return _trim(keep, _keep_highest(first[::-1], node.count, keep)[::-1])
+
+
+def _distribution(node: Node) -> Distribution:
+    if isinstance(node, Number):
+        return Distribution(node.value, np.array([1.0]))
+    if isinstance(node, Dice):
+        return _dice(node)
+    if isinstance(node, Negate):
+        return _negate(_distribution(node.operand))
+    if isinstance(node, BinOp):
+        left, right = _distribution(node.left), _distribution(node.right)
+        if node.op == "+":
+            return _add(left, right)
+        if node.op == "-":
+            return _add(left, _negate(right))
+        return _combine(left, right, node.op)
+    raise DiceError("Comparações só podem aparecer uma vez, no fim da expressão.")
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def _analyze(normalized: str) -> Analysis:
+    ast = compile_expression(normalized).ast
+    if not isinstance(ast, Comparison):
+        return Analysis(normalized, _distribution(ast))
+
+    left = _distribution(ast.left)
+    difference = _add(left, _negate(_distribution(ast.right)))
+    return Analysis(normalized, left, ast.op, difference.probability(ast.op, 0))
+
+
+def analyze(expression: str) -> Analysis:
+    """Distribuição exata da expressão (e a chance de sucesso, se houver comparação), memorizada."""
+    return _analyze(compile_expression(expression).normalized)
@@ -0,0 +1,415 @@
+"""
+Fila de trabalhos de IA para o modo de workers (AI_JOB_QUEUE).
+
+Com a fila ativa, o processo do gateway não roda a recuperação nem a geração do .rpg, do .npc e
+do fallback das consultas: ele enfileira um trabalho, e processos `python -m src.ai_worker`
+(quantos forem necessários, em um ou mais hosts com o mesmo volume) o executam e devolvem o
+resultado, que o gateway entrega no Discord.
+
+O broker é plugável; todos implementam a interface síncrona de `Broker` (o gateway a chama via
+`asyncio.to_thread`):
+
+- `sqlite` (padrão): tabela ai_jobs em um banco próprio, em WAL. Um `BEGIN IMMEDIATE` garante
+  que cada trabalho seja reivindicado por um único worker.
+- `file`: um arquivo JSON por trabalho em queued/, running/ e done/; a reivindicação é um
+  `os.rename`, atômico no mesmo sistema de arquivos. Suficiente para testes e depuração.
+
+Um trabalho reivindicado por um worker que morreu volta para a fila depois de `lease_seconds`,
+até MAX_ATTEMPTS tentativas. Trabalhos cujo prazo venceu (o gateway desistiu de esperar) são
+descartados pelo worker sem chamar a IA.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import time
+from dataclasses import dataclass, field
+
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+BROKERS = ("sqlite", "file")
+DATA_DIR = os.getenv("TATU_DATA_DIR", "/data")
+DEFAULT_PATHS = {"sqlite": os.path.join(DATA_DIR, "ai_jobs.db"), "file": os.path.join(DATA_DIR, "ai_jobs")}
+MAX_ATTEMPTS = 2  # Reivindicações por trabalho; um worker que morre no meio conta como uma.
+POLL_INTERVAL = 0.1  # Segundos entre as buscas de resultados no gateway.
+RESULT_TTL_SECONDS = 3600  # Resultados que ninguém buscou (o gateway reiniciou) são apagados depois disso.
+
+
+class JobFailed(Exception):
+    """O worker não conseguiu executar o trabalho; a mensagem é o erro que ele registrou."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict
+    deadline: float  # time.time() depois do qual o gateway não espera mais o resultado.
+    status: str = "queued"  # queued, running, done ou failed.
+    attempts: int = 0
+    result: dict | None = None
+    error: str | None = None
+    worker: str | None = None
+    claimed_at: float | None = None
+    enqueued_at: float = field(default_factory=time.time)
+
+    @property
+    def expired(self) -> bool:
+        return time.time() > self.deadline
+
+
+class Broker:
+    """Interface dos brokers. Todas as operações são bloqueantes e seguras entre processos."""
+
+    def enqueue(self, kind: str, payload: dict, deadline: float) -> str:
+        """Coloca um trabalho na fila e retorna o id dele."""
+        raise NotImplementedError
+
+    def claim(self, worker: str) -> Job | None:
+        """Reivindica o trabalho mais antigo da fila para 'worker', ou None se a fila está vazia."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, result: dict):
+        raise NotImplementedError
+
+    def fail(self, job_id: str, error: str):
+        raise NotImplementedError
+
+    def collect(self, job_ids: list[str]) -> list[Job]:
+        """Retorna os trabalhos terminados (done ou failed) entre 'job_ids' e os remove do broker."""
+        raise NotImplementedError
+
+    def cancel(self, job_id: str):
+        """Desiste de um trabalho: ele sai da fila, ou o resultado é descartado quando chegar."""
+        raise NotImplementedError
+
+    def requeue_stale(self, lease_seconds: float) -> int:
+        """Devolve à fila trabalhos reivindicados há mais de 'lease_seconds'. Retorna quantos."""
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """Apaga resultados terminados há mais de 'older_than' segundos. Retorna quantos."""
+        raise NotImplementedError
+
+    def depth(self) -> int:
+        """Trabalhos aguardando um worker."""
+        raise NotImplementedError
+
+
+class SqliteBroker(Broker):
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    enqueued_at REAL NOT NULL,
+                    deadline REAL NOT NULL,
+                    claimed_at REAL,
+                    finished_at REAL,
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_jobs_status ON ai_jobs (status, id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Vários workers disputam a mesma fila; o timeout faz esperarem o lock em vez de falhar.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def enqueue(self, kind, payload, deadline):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO ai_jobs (kind, payload, enqueued_at, deadline) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), time.time(), deadline)
+            )
+        return str(cursor.lastrowid)
+
+    def claim(self, worker):
+        conn = self._connect()
+        conn.isolation_level = None  # Transação controlada à mão: o BEGIN IMMEDIATE reserva a escrita.
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, payload, deadline, attempts, enqueued_at FROM ai_jobs "
+                "WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE ai_jobs SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        job_id, kind, payload, deadline, attempts, enqueued_at = row
+        return Job(str(job_id), kind, json.loads(payload), deadline, "running", attempts + 1,
+                   worker=worker, claimed_at=now, enqueued_at=enqueued_at)
+
+    def _finish(self, job_id: str, status: str, result: dict | None, error: str | None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ai_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error,
+                 time.time(), int(job_id))
+            )
+
+    def complete(self, job_id, result):
+        self._finish(job_id, "done", result, None)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, "failed", None, error)
+
+    def collect(self, job_ids):
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        ids = [int(job_id) for job_id in job_ids]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, kind, payload, deadline, status, attempts, result, error, worker, claimed_at, enqueued_at "
+                f"FROM ai_jobs WHERE id IN ({placeholders}) AND status IN ('done', 'failed')", ids
+            ).fetchall()
+            if rows:
+                conn.execute(f"DELETE FROM ai_jobs WHERE id IN ({','.join('?' * len(rows))})", [row[0] for row in rows])
+        return [
+            Job(str(job_id), kind, json.loads(payload), deadline, status, attempts,
+                json.loads(result) if result is not None else None, error, worker, claimed_at, enqueued_at)
+            for job_id, kind, payload, deadline, status, attempts, result, error, worker, claimed_at, enqueued_at in rows
+        ]
+
+    def cancel(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ai_jobs WHERE id = ?", (int(job_id),))
+
+    def requeue_stale(self, lease_seconds):
+        cutoff = time.time() - lease_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ai_jobs SET status = 'failed', error = 'Worker parou de responder.', finished_at = ? "
+                "WHERE status = 'running' AND claimed_at < ? AND attempts >= ?",
+                (time.time(), cutoff, MAX_ATTEMPTS)
+            )
+            cursor = conn.execute(
+                "UPDATE ai_jobs SET status = 'queued', worker = NULL, claimed_at = NULL "
+                "WHERE status = 'running' AND claimed_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+    def purge(self, older_than):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM ai_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - older_than,)
+            )
+        return cursor.rowcount
+
+    def depth(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM ai_jobs WHERE status = 'queued'").fetchone()[0]
+
+
+class FileBroker(Broker):
+    """
+    Um arquivo JSON por trabalho. Os ids começam pelo instante em nanossegundos, então a ordem
+    alfabética de queued/ é a ordem de chegada.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for state in ("queued", "running", "done"):
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.directory, state, f"{job_id}.json")
+
+    @staticmethod
+    def _read(path: str) -> Job:
+        with open(path, "r", encoding="utf-8") as f:
+            return Job(**json.load(f))
+
+    @staticmethod
+    def _write(path: str, job: Job):
+        with open(f"{path}.part", "w", encoding="utf-8") as f:
+            json.dump(job.__dict__, f, ensure_ascii=False)
+        os.replace(f"{path}.part", path)
+
+    def enqueue(self, kind, payload, deadline):
+        job = Job(f"{time.time_ns():020d}-{secrets.token_hex(4)}", kind, payload, deadline)
+        self._write(self._path("queued", job.id), job)
+        return job.id
+
+    def claim(self, worker):
+        for name in sorted(os.listdir(os.path.join(self.directory, "queued"))):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            try:
+                os.rename(self._path("queued", job_id), self._path("running", job_id))
+            except FileNotFoundError:
+                continue  # Outro worker chegou antes.
+            job = self._read(self._path("running", job_id))
+            job.status, job.worker, job.claimed_at = "running", worker, time.time()
+            job.attempts += 1
+            self._write(self._path("running", job_id), job)
+            return job
+        return None
+
+    def _finish(self, job_id: str, status: str, result: dict | None, error: str | None):
+        try:
+            job = self._read(self._path("running", job_id))
+        except FileNotFoundError:
+            return  # Cancelado ou devolvido à fila enquanto rodava.
+        job.status, job.result, job.error = status, result, error
+        self._write(self._path("done", job_id), job)
+        os.remove(self._path("running", job_id))
+
+    def complete(self, job_id, result):
+        self._finish(job_id, "done", result, None)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, "failed", None, error)
+
+    def collect(self, job_ids):
+        jobs = []
+        for job_id in job_ids:
+            path = self._path("done", job_id)
+            try:
+                jobs.append(self._read(path))
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+        return jobs
+
+    def cancel(self, job_id):
+        for state in ("queued", "running", "done"):
+            try:
+                os.remove(self._path(state, job_id))
+            except FileNotFoundError:
+                pass
+
+    def requeue_stale(self, lease_seconds):
+        requeued = 0
+        cutoff = time.time() - lease_seconds
+        for name in os.listdir(os.path.join(self.directory, "running")):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            try:
+                job = self._read(self._path("running", job_id))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if job.claimed_at is None or job.claimed_at >= cutoff:
+                continue
+            if job.attempts >= MAX_ATTEMPTS:
+                self.fail(job_id, "Worker parou de responder.")
+                continue
+            job.status, job.worker, job.claimed_at = "queued", None, None
+            self._write(self._path("queued", job_id), job)
+            os.remove(self._path("running", job_id))
+            requeued += 1
+        return requeued
+
+    def purge(self, older_than):
+        purged = 0
+        cutoff = time.time() - older_than
+        done_dir = os.path.join(self.directory, "done")
+        for name in os.listdir(done_dir):
+            path = os.path.join(done_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    purged += 1
+            except FileNotFoundError:
+                continue
+        return purged
+
+    def depth(self):
+        return sum(1 for name in os.listdir(os.path.join(self.directory, "queued")) if name.endswith(".json"))
+
+
+def create_broker(kind: str = None, path: str = None) -> Broker:
+    """Cria o broker escolhido (padrão: AI_JOB_QUEUE, ou 'sqlite'), em AI_JOB_QUEUE_PATH se definido."""
+    kind = (kind or os.getenv("AI_JOB_QUEUE") or "sqlite").strip().lower()
+    if kind not in BROKERS:
+        raise ValueError(f"AI_JOB_QUEUE desconhecido: '{kind}'. Opções: {', '.join(BROKERS)}.")
+    path = path or os.getenv("AI_JOB_QUEUE_PATH") or DEFAULT_PATHS[kind]
+    return SqliteBroker(path) if kind == "sqlite" else FileBroker(path)
+
+
+class JobClient:
+    """
+    Lado do gateway: enfileira trabalhos e espera os resultados. Uma única tarefa busca os
+    resultados de todos os trabalhos pendentes a cada POLL_INTERVAL, em vez de uma por comando.
+    """
+
+    def __init__(self, broker: Broker, poll_interval: float = POLL_INTERVAL):
+        self.broker = broker
+        self.poll_interval = poll_interval
+        self._waiting: dict[str, asyncio.Future] = {}
+        self._poller: asyncio.Task | None = None
+        self._last_purge = 0.0
+
+    async def submit(self, kind: str, payload: dict, timeout: float) -> dict:
+        """
+        Enfileira um trabalho e espera o resultado por até 'timeout' segundos.
+        Levanta asyncio.TimeoutError se ele não chegar a tempo e JobFailed se o worker falhar.
+        """
+        job_id = await asyncio.to_thread(self.broker.enqueue, kind, payload, time.time() + timeout)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[job_id] = future
+        metrics.QUEUE_DEPTH.set(len(self._waiting), queue="ai_jobs")
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(self.broker.cancel, job_id)
+            raise
+        finally:
+            self._waiting.pop(job_id, None)
+            metrics.QUEUE_DEPTH.set(len(self._waiting), queue="ai_jobs")
+
+    async def _poll(self):
+        while self._waiting:
+            try:
+                jobs = await asyncio.to_thread(self.broker.collect, list(self._waiting))
+                for job in jobs:
+                    future = self._waiting.get(job.id)
+                    if future is None or future.done():
+                        continue
+                    if job.status == "done":
+                        future.set_result(job.result)
+                    else:
+                        future.set_exception(JobFailed(job.error or "Erro desconhecido no worker."))
+                if time.monotonic() - self._last_purge > RESULT_TTL_SECONDS / 4:
+                    self._last_purge = time.monotonic()
+                    await asyncio.to_thread(self.broker.purge, RESULT_TTL_SECONDS)
+            except Exception:
+                log.error("Falha ao buscar resultados na fila de IA.", exc_info=True)
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        if self._poller and not self._poller.done():
+            self._poller.cancel()
+        for future in self._waiting.values():
+            if not future.done():
+                future.cancel()
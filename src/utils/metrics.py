@@ -0,0 +1,314 @@
+"""
+Métricas do processo do bot no formato texto do Prometheus.
+
+O registro é mínimo e não depende de bibliotecas externas: contadores, gauges e histogramas
+com rótulos, seguros para uso a partir das threads do `asyncio.to_thread`. O servidor HTTP
+(aiohttp, que já vem com o discord.py) é opcional e expõe `/metrics` e `/healthz`.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import ContextDecorator
+
+log = logging.getLogger(__name__)
+
+# Buckets em segundos, do mais rápido (consultas SQLite) ao mais lento (respostas da IA).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+PROMPT_CHARS_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+LOOP_LAG_INTERVAL = 0.5  # Segundos entre amostras do atraso do loop de eventos.
+HEALTH_MAX_LOOP_LAG = 5.0  # Acima disso (na última amostra) o /healthz responde 503.
+
+_REGISTRY: list["_Metric"] = []
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+        _REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"A métrica '{self.name}' espera os rótulos {self.labelnames}, recebeu {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function, **labels):
+        """Registra uma função lida a cada coleta, para valores que já existem em outro lugar (ex.: tamanho de fila)."""
+        self.set(function, **labels)
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        lines = []
+        for key, value in items:
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    log.debug(f"Falha ao coletar o gauge '{self.name}'.", exc_info=True)
+                    continue
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _Timer(ContextDecorator):
+    """Mede a duração de um bloco ou função e registra no histograma ao sair."""
+
+    def __init__(self, histogram: "Histogram", labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Como decorador, cada chamada ganha seu próprio cronômetro (chamadas concorrentes em threads).
+        return _Timer(self.histogram, self.labels)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels) -> _Timer:
+        """Uso: `with HISTOGRAMA.time(op="x"):` ou como decorador `@HISTOGRAMA.time(op="x")`."""
+        self._key(labels)
+        return _Timer(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render() -> str:
+    return "".join(metric.render() for metric in _REGISTRY)
+
+
+# --- Métricas do bot ---
+COMMAND_LATENCY = Histogram(
+    "tatu_command_duration_seconds", "Duração dos comandos de prefixo, da invocação ao fim.", ("command", "outcome"))
+GEMINI_LATENCY = Histogram(
+    "tatu_gemini_request_duration_seconds", "Duração das chamadas ao Gemini.", ("model", "outcome"))
+AI_PROMPT_CHARS = Histogram(
+    "tatu_ai_prompt_chars", "Tamanho dos prompts enviados à IA, em caracteres.", ("model",), buckets=PROMPT_CHARS_BUCKETS)
+DND_API_LATENCY = Histogram(
+    "tatu_dnd_api_request_duration_seconds", "Duração das requisições à API de D&D 5e.", ("endpoint", "outcome"))
+CACHE_LOOKUPS = Counter(
+    "tatu_cache_lookups_total", "Consultas a caches em memória, por resultado (hit/miss).", ("cache", "result"))
+SQLITE_QUERY_LATENCY = Histogram(
+    "tatu_sqlite_query_duration_seconds", "Duração das operações no banco SQLite.", ("operation",))
+QUEUE_DEPTH = Gauge("tatu_queue_depth", "Itens aguardando em filas internas.", ("queue",))
+GATEWAY_LATENCY = Gauge("tatu_gateway_latency_seconds", "Latência do heartbeat do gateway do Discord.")
+LOOP_LAG = Histogram(
+    "tatu_event_loop_lag_seconds", "Atraso do loop de eventos em relação ao agendado.", buckets=LOOP_LAG_BUCKETS)
+GUILDS = Gauge("tatu_guilds", "Servidores em que o bot está.")
+STARTUP_PHASE = Gauge(
+    "tatu_startup_phase_seconds", "Duração de cada fase da última partida do bot.", ("phase",))
+LOOP_STALLS = Counter(
+    "tatu_event_loop_stalls_total", "Travamentos do loop de eventos acima do limite, por local do código.", ("site",))
+LOOP_STALL_DURATION = Histogram(
+    "tatu_event_loop_stall_seconds", "Duração dos travamentos do loop de eventos.", buckets=LOOP_LAG_BUCKETS)
+
+
+def model_label(model) -> str:
+    """Nome curto do modelo de IA para usar como rótulo (ex.: 'gemini-2.5-pro')."""
+    return str(getattr(model, "model_name", "desconhecido")).removeprefix("models/")
+
+
+async def track_gemini(model, awaitable):
+    """Aguarda uma chamada ao Gemini registrando a duração por modelo e resultado."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await awaitable
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        GEMINI_LATENCY.observe(time.perf_counter() - start, model=model_label(model), outcome=outcome)
+
+
+# --- Servidor HTTP e coletores ligados ao bot ---
+class MetricsServer:
+    """Servidor aiohttp com /metrics e /healthz, mais a amostragem do atraso do loop."""
+
+    def __init__(self, bot, host: str, port: int):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.last_loop_lag = 0.0
+        self._runner = None
+        self._lag_task = None
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/healthz", self._healthz)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        self.bot.add_listener(self._on_command, "on_command")
+        self.bot.add_listener(self._on_command_completion, "on_command_completion")
+        self.bot.add_listener(self._on_command_error, "on_command_error")
+        GATEWAY_LATENCY.set_function(lambda: self.bot.latency if math.isfinite(self.bot.latency) else -1)
+        GUILDS.set_function(lambda: len(self.bot.guilds))
+        self._lag_task = asyncio.create_task(self._sample_loop_lag())
+        log.info(f"Métricas disponíveis em http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.last_loop_lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.observe(self.last_loop_lag)
+
+    def health(self) -> tuple[bool, dict]:
+        latency = self.bot.latency
+        checks = {
+            "ready": self.bot.is_ready(),
+            "closed": self.bot.is_closed(),
+            "gateway_latency": latency if math.isfinite(latency) else None,
+            "loop_lag": round(self.last_loop_lag, 4),
+        }
+        healthy = (checks["ready"] and not checks["closed"] and checks["gateway_latency"] is not None
+                   and self.last_loop_lag < HEALTH_MAX_LOOP_LAG)
+        return healthy, checks
+
+    async def _metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def _healthz(self, request):
+        from aiohttp import web
+        healthy, checks = self.health()
+        return web.json_response({"status": "ok" if healthy else "unhealthy", **checks}, status=200 if healthy else 503)
+
+    # --- Latência dos comandos ---
+    async def _on_command(self, ctx):
+        ctx.metrics_started_at = time.perf_counter()
+
+    def _observe_command(self, ctx, outcome: str):
+        started = getattr(ctx, "metrics_started_at", None)
+        if started is None or ctx.command is None:
+            return
+        COMMAND_LATENCY.observe(time.perf_counter() - started, command=ctx.command.qualified_name, outcome=outcome)
+
+    async def _on_command_completion(self, ctx):
+        self._observe_command(ctx, "ok")
+
+    async def _on_command_error(self, ctx, error):
+        self._observe_command(ctx, "error")
+        # Com qualquer listener de on_command_error registrado, o Bot.on_command_error padrão do
+        # discord.py não loga mais nada; o log dele é refeito aqui para comandos e cogs sem tratamento.
+        if ctx.command is not None and ctx.command.has_error_handler():
+            return
+        if ctx.cog is not None and ctx.cog.has_error_handler():
+            return
+        log.error(f"Exceção ignorada no comando {ctx.command}", exc_info=error)
@@ -0,0 +1,136 @@
+"""
+Gravação assíncrona de registros estruturados em NDJSON (um objeto JSON por linha).
+
+Os eventos entram numa fila em memória sem bloquear o loop de eventos; uma tarefa em
+segundo plano junta vários em lote e grava cada lote de uma vez em uma thread. O arquivo
+ativo é rotacionado quando passa do tamanho máximo ou quando vira o dia (UTC); os arquivos
+rotacionados são comprimidos com gzip e só os mais recentes são mantidos.
+"""
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+MAX_FILE_BYTES = 10 * 1024 * 1024  # Tamanho a partir do qual o arquivo ativo é rotacionado.
+ARCHIVE_KEEP = 30  # Arquivos comprimidos mantidos; os mais antigos são apagados.
+BATCH_SIZE = 100  # Máximo de eventos gravados por escrita.
+FLUSH_INTERVAL = 2.0  # Segundos que um evento pode esperar na fila por outros do mesmo lote.
+QUEUE_MAX = 10_000  # Acima disso os eventos são descartados em vez de acumular memória.
+
+_STOP = object()
+
+
+class NdjsonWriter:
+    """Fila de eventos com um escritor em lote e rotação por tamanho e por dia."""
+
+    def __init__(self, path: str, max_bytes: int = MAX_FILE_BYTES, keep: int = ARCHIVE_KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.dropped = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=QUEUE_MAX)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Grava tudo o que ainda está na fila e encerra o escritor."""
+        if not self._task:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, entry: dict) -> bool:
+        """Enfileira um evento sem bloquear. Retorna False se a fila estiver cheia (evento descartado)."""
+        if not self._task:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                log.warning(f"Fila de registros de '{self.path}' cheia; {self.dropped} eventos descartados até agora.")
+            return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception:
+                log.error(f"Falha ao gravar {len(batch)} registros em '{self.path}'.", exc_info=True)
+
+    # --- Executado na thread de escrita ---
+    def _write_batch(self, batch: list[dict]):
+        lines = "".join(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+            for entry in batch
+        )
+        self._rotate_if_needed()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _rotate_if_needed(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        if stat.st_size < self.max_bytes and modified.date() == datetime.now(timezone.utc).date():
+            return
+
+        base, ext = os.path.splitext(self.path)
+        stamp = modified.strftime('%Y%m%d-%H%M%S')
+        archive = f"{base}-{stamp}{ext}.gz"
+        suffix = 1
+        while os.path.exists(archive):  # Duas rotações no mesmo segundo não podem se sobrescrever.
+            archive = f"{base}-{stamp}.{suffix}{ext}.gz"
+            suffix += 1
+        partial = f"{archive}.part"
+        with open(self.path, "rb") as source, gzip.open(partial, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(partial, archive)
+        os.remove(self.path)
+        log.info(f"Registro '{self.path}' rotacionado para '{archive}'.")
+        self._prune_archives(base, ext)
+
+    def _prune_archives(self, base: str, ext: str):
+        archives = sorted(glob.glob(f"{glob.escape(base)}-*{ext}.gz"))
+        for old_archive in archives[:-self.keep]:
+            try:
+                os.remove(old_archive)
+            except OSError as e:
+                log.warning(f"Não foi possível remover o registro antigo '{old_archive}': {e}")
@@ -0,0 +1,159 @@
+"""
+Histórico compacto de rolagens e análise de "sorte".
+
+Cada servidor tem um buffer circular de tamanho fixo, guardado em arrays NumPy paralelos
+(jogador, tamanho do dado, face, horário): anexar é O(1) por rolagem, a memória não cresce
+e as consultas do `.luck` são máscaras vetorizadas sobre o buffer, sem varrer tabelas.
+O buffer também lembra até onde já foi gravado, para que o flush em lote para o SQLite
+envie só as rolagens novas.
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+RING_CAPACITY = 8192  # Rolagens mantidas em memória por servidor (cerca de 160 KiB).
+MIN_EXPECTED_PER_FACE = 5  # Abaixo disso por face, o qui-quadrado é só uma aproximação grosseira.
+
+
+class RollRingBuffer:
+    """Buffer circular de rolagens de um servidor, em arrays de tamanho fixo."""
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self.user_ids = np.zeros(capacity, dtype=np.uint64)
+        self.dice = np.zeros(capacity, dtype=np.uint16)
+        self.faces = np.zeros(capacity, dtype=np.uint16)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.total = 0  # Rolagens já anexadas desde a criação; a próxima vai para total % capacity.
+        self.flushed = 0  # Valor de 'total' no último flush bem-sucedido.
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def extend(self, user_id: int, die: int, faces: List[int], timestamp: float):
+        """Anexa várias faces do mesmo jogador e dado; as mais antigas do buffer são sobrescritas."""
+        count = len(faces)
+        if not count:
+            return
+        kept = faces[-self.capacity:]
+        positions = (self.total + count - len(kept) + np.arange(len(kept))) % self.capacity
+        self.user_ids[positions] = user_id
+        self.dice[positions] = die
+        self.faces[positions] = kept
+        self.timestamps[positions] = timestamp
+        self.total += count
+
+    def pending(self) -> Tuple[int, List[Tuple[int, int, int, float]], int]:
+        """
+        Rolagens anexadas desde o último flush que ainda estão no buffer.
+        Retorna (marca para mark_flushed, linhas (jogador, dado, face, horário), rolagens perdidas).
+        """
+        start = max(self.flushed, self.total - self.capacity)
+        positions = np.arange(start, self.total) % self.capacity
+        rows = list(zip(
+            self.user_ids[positions].tolist(),
+            self.dice[positions].tolist(),
+            self.faces[positions].tolist(),
+            self.timestamps[positions].tolist(),
+        ))
+        return self.total, rows, start - self.flushed
+
+    def mark_flushed(self, mark: int):
+        self.flushed = max(self.flushed, mark)
+
+    def faces_for(self, user_id: int, die: int) -> np.ndarray:
+        size = len(self)
+        mask = (self.user_ids[:size] == user_id) & (self.dice[:size] == die)
+        return self.faces[:size][mask]
+
+    def dice_for(self, user_id: int) -> dict[int, int]:
+        """Quantas rolagens do jogador existem no buffer, por tamanho de dado."""
+        size = len(self)
+        dice, counts = np.unique(self.dice[:size][self.user_ids[:size] == user_id], return_counts=True)
+        return dict(zip(dice.tolist(), counts.tolist()))
+
+
+# --- Estatística ---
+
+def _gamma_q(a: float, x: float) -> float:
+    """Função gama incompleta superior regularizada Q(a, x), por série ou fração contínua."""
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(500):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+
+    # Fração contínua de Lentz.
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 500):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def chi_square_sf(statistic: float, dof: int) -> float:
+    """P-valor do teste qui-quadrado: probabilidade de um desvio pelo menos tão grande por acaso."""
+    return _gamma_q(dof / 2, statistic / 2)
+
+
+@dataclass(frozen=True)
+class LuckReport:
+    sides: int
+    rolls: int
+    counts: np.ndarray  # counts[i] = quantas vezes saiu a face i + 1.
+    mean: float
+    expected_mean: float
+    chi_square: float
+    p_value: float
+    reliable: bool  # False quando há poucas rolagens por face para o qui-quadrado.
+
+    @property
+    def max_rate(self) -> float:
+        return self.counts[-1] / self.rolls
+
+    @property
+    def min_rate(self) -> float:
+        return self.counts[0] / self.rolls
+
+
+def luck_report(faces: np.ndarray, sides: int) -> Optional[LuckReport]:
+    """Frequência das faces, média e teste de aderência qui-quadrado contra um dado justo."""
+    rolls = len(faces)
+    if not rolls:
+        return None
+    counts = np.bincount(faces, minlength=sides + 1)[1:sides + 1]
+    expected = rolls / sides
+    statistic = float(((counts - expected) ** 2 / expected).sum())
+    return LuckReport(
+        sides=sides,
+        rolls=rolls,
+        counts=counts,
+        mean=float(faces.mean()),
+        expected_mean=(sides + 1) / 2,
+        chi_square=statistic,
+        p_value=chi_square_sf(statistic, sides - 1),
+        reliable=expected >= MIN_EXPECTED_PER_FACE,
+    )
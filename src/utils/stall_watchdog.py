@@ -0,0 +1,142 @@
+"""
+Detector de travamentos do loop de eventos.
+
+O loop agenda um "batimento" a cada poucos milissegundos; uma thread de vigia confere se o
+último batimento está atrasado além do limite. Quando está, o loop está preso executando
+algo síncrono, e a vigia captura a pilha da thread do loop naquele instante, com
+`sys._current_frames()`. Cada travamento é atribuído ao ponto do código do projeto mais interno
+da pilha e acumulado por local (contagem, pior duração, pilha do pior caso).
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+BEAT_INTERVAL = 0.05  # Segundos entre batimentos do loop.
+DEFAULT_THRESHOLD = 0.25  # Atraso a partir do qual um batimento perdido conta como travamento.
+MAX_SITES = 200  # Locais distintos acompanhados; travamentos em locais novos além disso vão para OTHER_SITE.
+OTHER_SITE = "(outros)"
+STACK_DEPTH = 12  # Frames guardados da pilha do pior travamento de cada local.
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+@dataclass
+class StallSite:
+    site: str
+    count: int = 0
+    total: float = 0.0
+    worst: float = 0.0
+    worst_stack: list[str] = field(default_factory=list)
+    last_seen: float = 0.0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+def _call_site(stack: traceback.StackSummary) -> str:
+    """O frame mais interno que pertence ao projeto (ou o mais interno de todos, se nenhum pertencer)."""
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_PROJECT_ROOT) and path != _THIS_FILE:
+            return f"{os.path.relpath(path, _PROJECT_ROOT)}:{frame.lineno} em {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} em {frame.name}"
+    return "(desconhecido)"
+
+
+class LoopStallWatchdog:
+    """Vigia em thread separada que mede e atribui travamentos do loop de eventos."""
+
+    def __init__(self, loop, threshold: float = DEFAULT_THRESHOLD):
+        self.loop = loop
+        self.threshold = threshold
+        self.sites: dict[str, StallSite] = {}
+        self.total_stalls = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        self._beat_handle = None
+        self._thread = None
+        self._loop_thread_id = None
+        self._current = None  # (batimento em que o travamento começou, pilha capturada)
+
+    def start(self):
+        """Precisa ser chamado de dentro do loop vigiado."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._beat_handle:
+            self._beat_handle.cancel()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def reset(self):
+        with self._lock:
+            self.sites.clear()
+            self.total_stalls = 0
+
+    def top_sites(self, limit: int) -> list[StallSite]:
+        with self._lock:
+            return sorted(self.sites.values(), key=lambda s: (s.count, s.worst), reverse=True)[:limit]
+
+    def worst_site(self) -> StallSite | None:
+        with self._lock:
+            return max(self.sites.values(), key=lambda s: s.worst, default=None)
+
+    # --- Lado do loop ---
+    def _beat(self):
+        self._last_beat = time.monotonic()
+        if not self._stop.is_set():
+            self._beat_handle = self.loop.call_later(BEAT_INTERVAL, self._beat)
+
+    # --- Lado da thread de vigia ---
+    def _watch(self):
+        check_interval = min(BEAT_INTERVAL, self.threshold / 4)
+        while not self._stop.wait(check_interval):
+            beat = self._last_beat
+            if self._current is None:
+                if time.monotonic() - beat - BEAT_INTERVAL >= self.threshold:
+                    frame = sys._current_frames().get(self._loop_thread_id)
+                    stack = traceback.extract_stack(frame) if frame is not None else traceback.StackSummary()
+                    self._current = (beat, stack)
+            elif beat != self._current[0]:
+                # O loop voltou a bater: o travamento durou do batimento anterior até este, menos o intervalo.
+                started, stack = self._current
+                self._current = None
+                self._record(max(0.0, beat - started - BEAT_INTERVAL), stack)
+
+    def _record(self, duration: float, stack: traceback.StackSummary):
+        site = _call_site(stack)
+        with self._lock:
+            if site not in self.sites and len(self.sites) >= MAX_SITES:
+                site = OTHER_SITE
+            entry = self.sites.get(site)
+            if entry is None:
+                entry = self.sites[site] = StallSite(site)
+            entry.count += 1
+            entry.total += duration
+            entry.last_seen = time.time()
+            if duration >= entry.worst:
+                entry.worst = duration
+                entry.worst_stack = traceback.format_list(stack[-STACK_DEPTH:])
+            self.total_stalls += 1
+
+        metrics.LOOP_STALLS.inc(site=site)
+        metrics.LOOP_STALL_DURATION.observe(duration)
+        log.warning(f"Loop de eventos travado por {duration * 1000:.0f} ms em {site}.")
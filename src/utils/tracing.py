@@ -0,0 +1,168 @@
+"""
+Rastreamento leve por requisição (spans), propagado por contextvars.
+
+Um span sem pai abre um novo trace; spans abertos dentro dele (inclusive em tarefas
+criadas a partir dele e em `asyncio.to_thread`, que copiam o contexto) viram filhos.
+Quando o span raiz termina, o trace completo vai para um buffer em memória (consultado
+pelo `.trace`) e para o exportador configurado, normalmente um arquivo JSONL rotativo.
+"""
+import functools
+import inspect
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Optional
+
+RECENT_TRACES = 500  # Traces completos mantidos em memória para o `.trace`.
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("tatu_current_span", default=None)
+_recent: deque = deque(maxlen=RECENT_TRACES)
+_recent_lock = threading.Lock()
+_exporter: Callable[[dict], object] | None = None
+
+
+class Span:
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start", "_t0", "duration_ms", "error")
+
+    def __init__(self, name: str, trace: "_Trace", parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.start - self.trace.root.start) * 1000, 1),
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _Trace:
+    __slots__ = ("trace_id", "root", "spans")
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.root: Span | None = None
+        self.spans: list[Span] = []  # Spans terminados; list.append é seguro entre threads.
+
+
+def set_exporter(exporter: Callable[[dict], object] | None):
+    """Define quem recebe cada trace concluído (ex.: `NdjsonWriter.submit`)."""
+    global _exporter
+    _exporter = exporter
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes) -> tuple[Span, Token]:
+    """Abre um span como filho do span atual (ou como raiz de um novo trace) e o torna o atual."""
+    parent = _current_span.get()
+    trace = parent.trace if parent else _Trace()
+    span = Span(name, trace, parent, attributes)
+    if parent is None:
+        trace.root = span
+    return span, _current_span.set(span)
+
+
+def end_span(span: Span, token: Token, error: str | None = None):
+    """Fecha o span e restaura o anterior; fechar a raiz publica o trace inteiro."""
+    span.duration_ms = round((time.perf_counter() - span._t0) * 1000, 1)
+    if error:
+        span.error = error
+    _current_span.reset(token)
+    span.trace.spans.append(span)
+    if span is span.trace.root:
+        _publish(span.trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Uso: `with tracing.span("rpg.search", term=termo) as s: ...`."""
+    current, token = start_span(name, **attributes)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        end_span(current, token, error)
+
+
+def traced(name: str):
+    """Decorador que envolve a função (síncrona ou assíncrona) em um span."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Ganchos de comando (usados em cog_before_invoke / cog_after_invoke) ---
+def begin_command(ctx):
+    """Abre o span raiz do comando. Roda na mesma tarefa do comando, então os spans internos herdam o contexto."""
+    ctx.trace_span = start_span(
+        f"command.{ctx.command.qualified_name}",
+        guild_id=ctx.guild.id if ctx.guild else None,
+        channel_id=ctx.channel.id,
+        user_id=ctx.author.id,
+    )
+
+
+def end_command(ctx):
+    started = getattr(ctx, "trace_span", None)
+    if started is None:
+        return
+    ctx.trace_span = None
+    span, token = started
+    end_span(span, token, "CommandError" if ctx.command_failed else None)
+
+
+def _publish(trace: _Trace):
+    root = trace.root
+    record = {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "start": root.start,
+        "duration_ms": root.duration_ms,
+        "error": root.error,
+        "attributes": root.attributes,
+        "spans": [s.to_dict() for s in sorted(trace.spans, key=lambda s: s.start)],
+    }
+    with _recent_lock:
+        _recent.append(record)
+    if _exporter is not None:
+        _exporter(record)
+
+
+def recent_traces(last: int) -> list[dict]:
+    """Os 'last' traces mais recentes, do mais antigo ao mais novo."""
+    with _recent_lock:
+        return list(_recent)[-last:] if last > 0 else []
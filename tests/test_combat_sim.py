@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.utils import dice_math
+from src.utils.combat_sim import parse_attack_spec, sample, simulate
+from src.utils.dice import DiceError, compile_expression
+
+
+def test_parses_request_example():
+    profile, trials, seed = parse_attack_spec("+7 vs AC 15, 2d6+4, crit on 19–20, 3 attacks")
+
+    assert (profile.bonus, profile.armor_class, profile.crit_range, profile.attacks) == (7, 15, 19, 3)
+    assert profile.hit_points is None
+    assert seed is None
+
+
+@pytest.mark.parametrize("crit", ["crit 19", "crit 19-20", "crit on 19–20", "crítico em 19-20", "critico em 19"])
+def test_crit_range_variants(crit):
+    profile, _, _ = parse_attack_spec(f"+5 vs CA 12, 1d8+3, {crit}")
+
+    assert profile.crit_range == 19
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(DiceError):
+        parse_attack_spec("+5 vs CA 12, 1d8+3, crit sometimes")
+
+
+def test_same_seed_gives_same_result():
+    profile, _, _ = parse_attack_spec("+7 vs AC 15, 2d6+4, crit on 19–20, 3 attacks, pv 45")
+
+    assert simulate(profile, trials=5_000, seed=42) == simulate(profile, trials=5_000, seed=42)
+
+
+@pytest.mark.parametrize("expression", ["1d6!", "2d6!+3", "4d6!>=5"])
+def test_exploding_sample_matches_exact_mean(expression):
+    trials = 200_000
+    values = sample(compile_expression(expression).ast, np.random.default_rng(7), trials)
+    exact = dice_math.analyze(expression).distribution
+
+    assert abs(values.mean() - exact.mean) < 5 * exact.std / trials ** 0.5
+
+
+def test_exploding_damage_simulates():
+    profile, _, _ = parse_attack_spec("+5 vs CA 12, 1d6!")
+
+    result = simulate(profile, trials=10_000, seed=1)
+
+    assert result.damage_per_attack > 0
@@ -0,0 +1,155 @@
+import pytest
+
+from src.utils.dice import (
+    MAX_DICE, MAX_EXPRESSION_LENGTH, MAX_EXTRA_ROLLS, BinOp, Comparison, Dice, DiceError, Number,
+    compile_expression, find_inline_rolls, roll,
+)
+
+
+class ScriptedRng:
+    """Devolve as faces na ordem dada, para testar a avaliação sem sorte."""
+
+    def __init__(self, *faces):
+        self.faces = list(faces)
+
+    def randint(self, low, high):
+        face = self.faces.pop(0)
+        assert low <= face <= high
+        return face
+
+
+@pytest.mark.parametrize("expression, normalized", [
+    ("2d6 + 3", "2d6+3"),
+    ("D20", "1d20"),
+    ("d%", "1d100"),
+    ("4d6k", "4d6kh1"),
+    ("4d6d1", "4d6dl1"),
+    ("1d6!", "1d6!"),
+    ("1d6!>=5", "1d6!>=5"),
+    ("1d20ro1", "1d20ro1"),
+    ("1d20r<3", "1d20r<3"),
+    ("1d20 + 5 >= 15", "1d20+5>=15"),
+    ("1d6==6", "1d6=6"),
+    ("(1+2)*3", "(1+2)*3"),
+    ("10-(2-3)", "10-(2-3)"),
+    ("--3", "3"),
+    ("+5", "5"),
+])
+def test_normalized_form(expression, normalized):
+    assert compile_expression(expression).normalized == normalized
+
+
+def test_precedence_and_associativity():
+    assert roll("1+2*3").total == 7
+    assert roll("(1+2)*3").total == 9
+    assert roll("10-2-3").total == 5
+    assert roll("2*-3").total == -6
+
+
+def test_division_rounds_down():
+    assert roll("7/2").total == 3
+    assert roll("-7/2").total == -4
+
+
+def test_ast_shape():
+    ast = compile_expression("4d6kh3+2>=10").ast
+
+    assert isinstance(ast, Comparison) and ast.op == ">="
+    assert ast.left == BinOp("+", Dice(4, 6, keep=("kh", 3)), Number(2))
+    assert ast.right == Number(10)
+
+
+def test_dice_count_sums_all_groups():
+    assert compile_expression("2d6+1d4+3d8").dice_count == 6
+
+
+def test_keep_highest_keeps_original_order():
+    result = compile_expression("4d6kh3").roll(ScriptedRng(1, 5, 3, 6))
+
+    assert result.total == 14
+    assert result.calculation == "(5 + 3 + 6)"
+    assert result.dropped == [1]
+
+
+def test_drop_lowest_matches_keep_highest():
+    assert compile_expression("4d6dl1").roll(ScriptedRng(1, 5, 3, 6)).total == 14
+
+
+def test_keep_lowest():
+    assert compile_expression("2d20kl1").roll(ScriptedRng(17, 4)).total == 4
+
+
+def test_explode_chains_until_condition_fails():
+    result = compile_expression("1d6!").roll(ScriptedRng(6, 6, 2))
+
+    assert result.total == 14
+    assert result.groups[0].rolls == [6, 6, 2]
+
+
+def test_explode_is_capped():
+    faces = [6] * (MAX_EXTRA_ROLLS + 1)
+    result = compile_expression("1d6!").roll(ScriptedRng(*faces))
+
+    assert len(result.groups[0].rolls) == MAX_EXTRA_ROLLS + 1
+
+
+def test_reroll_until_condition_fails():
+    result = compile_expression("1d20r<3").roll(ScriptedRng(1, 2, 15))
+
+    assert result.total == 15
+    assert result.groups[0].rerolled == [1, 2]
+
+
+def test_reroll_once_keeps_second_roll():
+    assert compile_expression("1d20ro1").roll(ScriptedRng(1, 1)).total == 1
+
+
+def test_comparison_sets_success_and_target():
+    result = compile_expression("1d20+5>=15").roll(ScriptedRng(10))
+
+    assert (result.total, result.success, result.target) == (15, True, 15)
+    assert result.calculation == "10 + 5 = 15 >= 15"
+
+
+def test_calculation_repeats_parentheses():
+    assert compile_expression("(1d8+2)*2").roll(ScriptedRng(3)).calculation == "(3 + 2) * 2"
+
+
+def test_programs_are_cached():
+    assert compile_expression("2d6 + 3") is compile_expression("2D6+3")
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("", "Expressão de rolagem vazia."),
+    ("x" * (MAX_EXPRESSION_LENGTH + 1), f"Expressão muito longa. Use no máximo {MAX_EXPRESSION_LENGTH} caracteres."),
+    ("1d6 &", "Caractere inesperado `&` na posição 4."),
+    ("1d", "Esperava o número de lados do dado na posição 3."),
+    ("3+", "A expressão terminou antes do esperado."),
+    ("(1d6", "Esperava `)` na posição 5."),
+    ("1d6)", "Trecho inesperado `)` na posição 4."),
+    ("1d6>3>2", "Trecho inesperado `>` na posição 6."),
+    ("(1d6>3)+1", "Esperava `)` na posição 5."),
+    ("0d6", "Número de dados ou lados inválido. Use valores positivos."),
+    ("2d0", "Número de dados ou lados inválido. Use valores positivos."),
+    ("1d1001", "Os dados podem ter no máximo 1000 lados."),
+    (f"{MAX_DICE + 1}d6", f"Número de dados inválido. Use no máximo {MAX_DICE} dados por rolagem."),
+    ("60d6+50d4", f"Número de dados inválido. Use no máximo {MAX_DICE} dados por rolagem."),
+    ("1d6kh7", "Não é possível manter/descartar mais dados do que o total rolado."),
+    ("4d6kh3kl1", "Use apenas um modificador de manter/descartar por grupo de dados."),
+    ("1d6!!", "Use apenas um modificador de explosão por grupo de dados."),
+    ("1d6!<=6", "A condição de explosão não pode incluir todas as faces do dado."),
+    ("1d6r1r2", "Use apenas um modificador de rerrolagem por grupo de dados."),
+    ("1d6r<=6", "A condição de rerrolagem não pode incluir todas as faces do dado."),
+    ("1d6r", "Esperava um número na posição 5."),
+    ("1/0", "Divisão por zero na expressão."),
+])
+def test_invalid_expressions(expression, message):
+    with pytest.raises(DiceError) as error:
+        roll(expression)
+
+    assert str(error.value) == message
+
+
+def test_find_inline_rolls():
+    assert find_inline_rolls("ataco [[1d20+5]] e [[2d6]] e [[3]]", limit=2) == ["1d20+5", "2d6"]
+    assert find_inline_rolls("sem rolagem [aqui]", limit=3) == []
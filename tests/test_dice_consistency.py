@@ -0,0 +1,46 @@
+"""
+O rolador (dice), o cálculo exato (dice_math) e a amostragem vetorizada (combat_sim) partem
+da mesma AST; as médias amostradas devem cair perto da média exata.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from src.utils import dice_math
+from src.utils.combat_sim import sample
+from src.utils.dice import compile_expression
+
+EXPRESSIONS = [
+    "2d6+3", "4d6kh3", "4d6dl1", "2d20kl1", "1d20r1", "1d20ro<3",
+    "1d6!", "3d6!>5", "1d10r1!", "(1d8+2)*2", "1d12/2", "-1d4+10",
+]
+TOLERANCE = 5  # Erros-padrão aceitos entre a média amostrada e a exata.
+
+
+def _assert_close(values: np.ndarray, expression: str):
+    exact = dice_math.analyze(expression).distribution
+    standard_error = exact.std / len(values) ** 0.5
+    assert abs(values.mean() - exact.mean) < TOLERANCE * standard_error
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_roller_matches_exact_mean(expression):
+    program, rng = compile_expression(expression), random.Random(11)
+    _assert_close(np.array([program.roll(rng).total for _ in range(20_000)]), expression)
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_vectorized_sampler_matches_exact_mean(expression):
+    values = sample(compile_expression(expression).ast, np.random.default_rng(11), 200_000)
+    _assert_close(values, expression)
+
+
+def test_comparison_success_matches_roller():
+    expression = "1d20+5>=15"
+    program, rng = compile_expression(expression), random.Random(11)
+    trials = 20_000
+    hits = sum(program.roll(rng).success for _ in range(trials))
+    p = dice_math.analyze(expression).success
+
+    assert abs(hits / trials - p) < TOLERANCE * (p * (1 - p) / trials) ** 0.5